@@ -1,12 +1,27 @@
+import csv
+import io
+import json
+import mimetypes
 import os
+import stat
+import time
+from collections import OrderedDict
+from threading import Lock
 from datetime import datetime, timedelta
+from urllib.parse import quote
 from flask import (
     Flask, render_template, redirect, url_for, flash, request,
-    jsonify, send_file, send_from_directory, current_app, abort
+    jsonify, send_from_directory, current_app, abort,
+    Response, stream_with_context,
 )
+from flask.json.provider import DefaultJSONProvider
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_mail import Mail
 from flask_migrate import Migrate
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy.orm import selectinload, joinedload, lazyload, load_only, make_transient_to_detached
+from werkzeug.exceptions import HTTPException, InternalServerError
+from werkzeug.security import safe_join
 
 # Project imports
 from config import Config
@@ -18,31 +33,120 @@ from models import (
     Attachment,
     TicketHistory,
     EmailLog,
-    NotificationRead   # used in notification routes
+    NotificationRead,   # used in notification routes
+    next_ticket_no,
+    count_tickets,
 )
+from db_bulk import bulk_insert
 
-from forms import LoginForm, RegisterForm, TicketForm, AdminUserForm
+from forms import LoginForm, RegisterForm, TicketForm, AdminUserForm, email_registered
 
 import utils
-import pandas as pd
+
+try:
+    import redis
+except ImportError:  # optional: API caches are skipped without it
+    redis = None
+
+try:
+    import orjson
+except ImportError:  # optional: jsonify falls back to Flask's stdlib provider
+    orjson = None
 
 
 # ---------------------------
 # APP FACTORY
 # ---------------------------
+def patch_psycopg_for_gevent():
+    """Make psycopg2 cooperative when running under gevent-patched workers (optional)."""
+    try:
+        from gevent import monkey
+        if not monkey.is_module_patched("socket"):
+            return
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        return
+    patch_psycopg()
+
+
+def _private_dir(path):
+    """
+    Create path (0700) if missing; True only if it is a directory owned by
+    this user and not writable by group or others. Cached bytecode is
+    executed on load, so anyone who can write there could run code as us.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(st.st_mode)
+        and st.st_uid == os.getuid()
+        and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    )
+
+
 def create_app():
+    patch_psycopg_for_gevent()
+
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.config.from_object(Config)
 
     # Ensure upload folder exists
     os.makedirs(app.config.get("UPLOAD_FOLDER", "uploads"), exist_ok=True)
 
+    # Normalized once so allowed_file() is a single set lookup per upload
+    app.config["ALLOWED_EXTENSIONS_SET"] = frozenset(
+        ext.lower() for ext in app.config.get("ALLOWED_EXTENSIONS", ())
+    )
+
+    # Keep compiled templates on disk so restarted workers skip recompiling them
+    jinja_cache_dir = app.config.get("JINJA_CACHE_DIR")
+    if jinja_cache_dir is None:
+        # Jinja creates a per-user directory and checks its owner and mode
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(pattern="%s.cache")
+    elif jinja_cache_dir:
+        if _private_dir(jinja_cache_dir):
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir, "%s.cache")
+        else:
+            app.logger.warning(
+                f"JINJA_CACHE_DIR {jinja_cache_dir} is not owned by this user or is "
+                "writable by others; template bytecode cache disabled"
+            )
+
     # Initialize extensions
     db.init_app(app)
     migrate = Migrate(app, db)
     mail = Mail(app)
     app.mail = mail
 
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
+
+    # Process-wide cache of the newest ticket id (see admin_check_new)
+    app.latest_ticket_id = None
+    app.latest_ticket_checked_at = 0.0
+
+    # Optional Redis for short-lived API caches (see cache_get_json); the client
+    # connects lazily, and requests fall back to the DB whenever it is unavailable
+    app.redis = None
+    app.redis_retry_at = 0.0
+    if redis is not None and app.config.get("NOTIFY_CACHE_SECONDS"):
+        app.redis = redis.Redis.from_url(
+            app.config["REDIS_URL"],
+            decode_responses=True,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        )
+
+    # Process-wide cache of assignee dropdown rows (see get_staff)
+    app.staff_cache = {}
+
+    # Process-wide cache of logged-in users' column values (see load_cached_user)
+    app.user_cache = OrderedDict()
+    app.user_cache_lock = Lock()
+
     login_manager = LoginManager()
     login_manager.login_view = "login"
     login_manager.init_app(app)
@@ -50,16 +154,18 @@ def create_app():
     @login_manager.user_loader
     def load_user(user_id):
         try:
-            return db.session.get(User, int(user_id))
+            return load_cached_user(app, int(user_id))
         except Exception as e:
             app.logger.error(f"Error loading user: {e}")
             return None
 
-    # Create DB and default admin if missing
-    with app.app_context():
+    # Schema + default admin are created once by `flask init-db`, not by every worker
+    @app.cli.command("init-db")
+    def init_db_command():
+        """Create missing tables and the default admin account."""
         try:
             db.create_all()
-            if not User.query.filter_by(role="admin").first():
+            if not db.session.query(User.query.filter_by(role="admin").exists()).scalar():
                 admin = User(
                     name="System Admin",
                     email="admin@portal.com",
@@ -71,24 +177,51 @@ def create_app():
                 db.session.add(admin)
                 db.session.commit()
                 print("✔ Default admin created → admin@portal.com | Admin@123")
+            print("✔ Database initialized")
         except Exception as e:
             app.logger.error(f"Error initializing database: {e}")
 
-    # Jinja helper
+    # Jinja helper: the URLs never change, so build them on the first render only
+    sla_css = utils.sla_class if hasattr(utils, "sla_class") else (lambda s: "")
+    app.template_urls = {}
+
     @app.context_processor
     def utility_processor():
-        ctx = dict(
-            sla_css=utils.sla_class if hasattr(utils, "sla_class") else (lambda s: ""),
-            admin_tickets_url=url_for("admin_tickets"),
-            reports_chart_data_url=url_for("reports_chart_data"),
-            admin_email_logs_api_url=url_for("admin_email_logs_api"),
-            admin_attachments_url=url_for("admin_attachments"),
-        )
-        return ctx
+        if not app.template_urls:
+            app.template_urls = dict(
+                admin_tickets_url=url_for("admin_tickets"),
+                reports_chart_data_url=url_for("reports_chart_data"),
+                admin_email_logs_api_url=url_for("admin_email_logs_api"),
+                admin_attachments_url=url_for("admin_attachments"),
+            )
+        # One clock read per render, shared by every row (e.g. |time_ago(now))
+        return dict(app.template_urls, sla_css=sla_css, now=datetime.utcnow())
+
+    app.add_template_filter(utils.get_time_ago, "time_ago")
+    app.add_template_filter(utils.truncate_text, "truncate_text")
 
     # Register routes
     register_routes(app)
 
+    # Views don't wrap their bodies in try/except; anything unexpected lands
+    # here once, after the session has been rolled back
+    @app.errorhandler(Exception)
+    def handle_unexpected_error(e):
+        if isinstance(e, HTTPException):
+            return e
+
+        db.session.rollback()
+        app.logger.exception(f"Unhandled error on {request.method} {request.path}: {e}")
+
+        if request.path.startswith("/api/") or request.endpoint in JSON_ENDPOINTS:
+            return jsonify({"success": False, "error": "Internal server error"}), 500
+
+        target = error_redirect_target()
+        if target is None:
+            return InternalServerError()
+        flash("Something went wrong. Please try again.", "danger")
+        return redirect(target)
+
     # Settings route
     @app.route('/settings', methods=['GET', 'POST'])
     @login_required
@@ -96,21 +229,17 @@ def create_app():
         if request.method == 'POST':
             theme = request.form.get('theme')
             if theme in ['light', 'dark', 'system']:
-                try:
+                # Nothing to write when the theme is unchanged
+                if theme != current_user.theme_pref:
                     current_user.theme_pref = theme
                     db.session.commit()
-                    flash('Settings updated.', 'success')
-                except Exception as e:
-                    app.logger.error(f"Error updating settings: {e}")
-                    db.session.rollback()
-                    flash('Failed to update settings.', 'error')
+                    invalidate_cached_user(app, current_user.id)
+                flash('Settings updated.', 'success')
                 return redirect(url_for('settings'))
         
         user_theme = getattr(current_user, "theme_pref", "") if current_user.is_authenticated else ''
         return render_template('settings.html', user_theme=user_theme)
     
-    import models
-
     return app
 
 
@@ -118,16 +247,415 @@ def create_app():
 # Helper functions
 # ---------------------------
 
-def serialize_email_log(log):
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify / request.get_json backed by orjson (the polling APIs serialize on every hit)."""
+
+    def dumps(self, obj, **kwargs):
+        # Same output as DefaultJSONProvider: keys sorted, and dates handed to
+        # Flask's hook so they stay HTTP dates rather than orjson's ISO 8601
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        # UUIDs and dataclasses orjson serializes the same way Flask's hook would
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        # The session serializer passes object_hook, which orjson doesn't support
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def email_log_rows(limit):
+    """Newest email log rows, projected to the columns the admin views show."""
+    return (
+        db.session.query(
+            EmailLog.id,
+            EmailLog.to_email,
+            EmailLog.subject,
+            EmailLog.status,
+            EmailLog.body_preview,
+            EmailLog.sent_at,
+        )
+        .order_by(EmailLog.sent_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def serialize_email_log(row):
     return {
-        "id": log.id,
-        "subject": log.subject,
-        "recipient": log.recipient,
-        "sent_at": log.sent_at.strftime("%Y-%m-%d %H:%M:%S") if log.sent_at else None,
-        "status": log.status,
+        "id": row.id,
+        "subject": row.subject,
+        "recipient": row.to_email,
+        "sent_at": row.sent_at.strftime("%Y-%m-%d %H:%M:%S") if row.sent_at else None,
+        "status": row.status,
     }
 
 
+# Columns kept in the user cache; the password hash is loaded on demand only
+USER_CACHE_COLUMNS = tuple(c.key for c in User.__table__.columns if c.key != "password_hash")
+
+
+def load_cached_user(app, user_id):
+    """
+    Return the User for user_id without a SELECT when it was loaded recently.
+
+    Cached entries hold plain column values; on a hit they are rebuilt as a
+    detached instance and merged into the current session with load=False.
+    """
+    ttl = app.config.get("USER_CACHE_SECONDS", 30)
+    now = time.monotonic()
+
+    with app.user_cache_lock:
+        entry = app.user_cache.get(user_id)
+        if entry and now - entry[0] <= ttl:
+            app.user_cache.move_to_end(user_id)
+            values = entry[1]
+        else:
+            values = None
+
+    if values is not None:
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        with app.user_cache_lock:
+            app.user_cache[user_id] = (now, {key: getattr(user, key) for key in USER_CACHE_COLUMNS})
+            app.user_cache.move_to_end(user_id)
+            while len(app.user_cache) > app.config.get("USER_CACHE_SIZE", 1024):
+                app.user_cache.popitem(last=False)
+    return user
+
+
+def invalidate_cached_user(app, user_id):
+    """Drop a user from the cache after their row changes."""
+    with app.user_cache_lock:
+        app.user_cache.pop(user_id, None)
+
+
+def get_staff(app, roles):
+    """
+    Return (id, name, department) rows for users in the given roles.
+
+    The dropdown lists change only when an admin edits users, so rows are kept
+    for STAFF_CACHE_SECONDS and dropped by invalidate_staff_cache.
+    """
+    ttl = app.config.get("STAFF_CACHE_SECONDS", 60)
+    now = time.monotonic()
+    entry = app.staff_cache.get(roles)
+    if entry and now - entry[0] <= ttl:
+        return entry[1]
+
+    rows = tuple(
+        db.session.query(User.id, User.name, User.department)
+        .filter(User.role.in_(roles))
+        .all()
+    )
+    app.staff_cache[roles] = (now, rows)
+    return rows
+
+
+def invalidate_staff_cache(app):
+    """Forget cached dropdown lists after a user is created, edited or deleted."""
+    app.staff_cache.clear()
+    redis_call(app, "delete", ADMIN_EMAILS_CACHE_KEY)
+
+
+ADMIN_EMAILS_CACHE_KEY = "admin_emails"
+
+
+def get_admin_emails(app):
+    """
+    Return the email addresses of active admins (SLA alert/report recipients).
+
+    Shared across worker processes through Redis for ADMIN_EMAILS_CACHE_SECONDS
+    and dropped by invalidate_staff_cache; read from the DB when Redis is
+    unavailable.
+    """
+    emails = cache_get_json(app, ADMIN_EMAILS_CACHE_KEY)
+    if emails is not None:
+        return emails
+
+    emails = [
+        email for (email,) in db.session.query(User.email).filter_by(role="admin", active=True)
+        if email
+    ]
+    redis_call(
+        app, "setex", ADMIN_EMAILS_CACHE_KEY,
+        app.config.get("ADMIN_EMAILS_CACHE_SECONDS", 300), json.dumps(emails),
+    )
+    return emails
+
+
+REPORT_CSV_HEADER = (
+    "ticket_no", "created_at", "ticket_type", "category", "priority",
+    "status", "assignee", "user", "due_date", "sla_state",
+)
+
+# Ticket columns the CSV rows read (assignee_display and sla_state included)
+REPORT_CSV_COLUMNS = (
+    Ticket.ticket_no, Ticket.created_at, Ticket.ticket_type, Ticket.category,
+    Ticket.priority, Ticket.status, Ticket.assignee_name, Ticket.assignee_id,
+    Ticket.user_id, Ticket.due_date, Ticket.closed_at,
+)
+
+
+def generate_report_csv(query, batch_size=500):
+    """Yield the reports CSV line by line, fetching tickets in batches."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+
+    def flush():
+        data = buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+        return data
+
+    writer.writerow(REPORT_CSV_HEADER)
+    yield flush()
+
+    for t in query.yield_per(batch_size):
+        writer.writerow((
+            t.ticket_no,
+            t.created_at,
+            t.ticket_type,
+            t.category,
+            t.priority,
+            t.status,
+            t.assignee_display,
+            t.user.name if t.user else "",
+            t.due_date,
+            t.sla_state,
+        ))
+        yield flush()
+
+
+def redis_available(app):
+    return app.redis is not None and time.monotonic() >= app.redis_retry_at
+
+
+def redis_failed(app, error):
+    """Log a Redis error and stop trying it for 30s."""
+    app.logger.warning(f"Redis unavailable, serving from DB: {error}")
+    app.redis_retry_at = time.monotonic() + 30
+
+
+def redis_call(app, method, *args):
+    """Run a Redis command, or return None (and back off for 30s) if Redis is down."""
+    if not redis_available(app):
+        return None
+    try:
+        return getattr(app.redis, method)(*args)
+    except redis.RedisError as e:
+        redis_failed(app, e)
+        return None
+
+
+def redis_claim(app, key, ttl):
+    """
+    SET key NX with a TTL: True the first time in ttl seconds, False after.
+    True whenever Redis is unavailable, so callers fail open.
+    """
+    if not redis_available(app):
+        return True
+    try:
+        return bool(app.redis.set(key, 1, ex=ttl, nx=True))
+    except redis.RedisError as e:
+        redis_failed(app, e)
+        return True
+
+
+def redis_rate_allow(app, key, limit, window):
+    """
+    Fixed-window counter: True for the first `limit` calls in each `window`
+    seconds. True if Redis is unavailable.
+
+    The key is created with its TTL (SET NX EX) before the INCR, in one
+    MULTI, so a counter can never be left without an expiry.
+    """
+    if not redis_available(app):
+        return True
+    try:
+        pipe = app.redis.pipeline(transaction=True)
+        pipe.set(key, 0, ex=window, nx=True)
+        pipe.incr(key)
+        _, count = pipe.execute()
+        return count <= limit
+    except redis.RedisError as e:
+        redis_failed(app, e)
+        return True
+
+
+def cache_get_json(app, key):
+    raw = redis_call(app, "get", key)
+    return json.loads(raw) if raw is not None else None
+
+
+def cache_set_json(app, key, value):
+    redis_call(app, "setex", key, app.config.get("NOTIFY_CACHE_SECONDS", 30), json.dumps(value))
+
+
+def notification_cache_keys(user):
+    """Admins share one feed; users get their own."""
+    scope = "admin" if user.role == "admin" else f"user:{user.id}"
+    return f"notif_count:{scope}", f"notif:{scope}"
+
+
+def invalidate_notification_cache(app, user_id=None, feeds=False):
+    """Drop the admin count and, if given, the ticket owner's count (and feeds if asked)."""
+    keys = ["notif_count:admin"] + (["notif:admin"] if feeds else [])
+    if user_id is not None:
+        keys.append(f"notif_count:user:{user_id}")
+        if feeds:
+            keys.append(f"notif:user:{user_id}")
+    redis_call(app, "delete", *keys)
+
+
+# ============================================================
+# NOTIFICATION FEEDS (capped Redis lists, newest first)
+# ============================================================
+NOTIFY_FEED_SIZE = 15
+NOTIFY_FEED_HOURS = 24
+NOTIFY_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Ticket columns admin_notification / user_notification read
+NOTIFY_COLUMNS = (
+    Ticket.ticket_no, Ticket.priority, Ticket.status,
+    Ticket.created_at, Ticket.updated_at, Ticket.user_id,
+)
+
+
+def admin_notification(ticket):
+    """Feed entry shown to admins for a new ticket."""
+    return {
+        'id': ticket.id,
+        'type': 'new_ticket',
+        'title': f"New Ticket #{ticket.ticket_no}",
+        'message': f"From {ticket.user.name} • {ticket.priority} priority",
+        'priority': ticket.priority,
+        'timestamp': ticket.created_at.strftime(NOTIFY_TIME_FORMAT),
+        'link': f"/admin/ticket/{ticket.id}",
+        'icon': 'fa-ticket'
+    }
+
+
+def user_notification(ticket):
+    """Feed entry shown to a ticket's owner when it changes."""
+    return {
+        'id': ticket.id,
+        'type': 'ticket_update',
+        'title': f"Ticket #{ticket.ticket_no} - {ticket.status}",
+        'message': f"Priority: {ticket.priority}",
+        'priority': ticket.priority,
+        'timestamp': (ticket.updated_at or ticket.created_at).strftime(NOTIFY_TIME_FORMAT),
+        'link': f"/ticket/{ticket.id}",
+        'icon': 'fa-bell'
+    }
+
+
+def _feed_cutoff():
+    return (datetime.utcnow() - timedelta(hours=NOTIFY_FEED_HOURS)).strftime(NOTIFY_TIME_FORMAT)
+
+
+def read_notification_feed(app, key):
+    """Return the cached feed, or None on a cold (or expired/empty) list."""
+    items = redis_call(app, "lrange", key, 0, NOTIFY_FEED_SIZE - 1)
+    if not items:
+        return None
+    cutoff = _feed_cutoff()
+    feed = [n for n in map(json.loads, items) if n["timestamp"] >= cutoff]
+    return feed or None
+
+
+def store_notification_feed(app, key, feed):
+    """Prime a feed from the SQL result."""
+    if not feed or not redis_available(app):
+        return
+    try:
+        pipe = app.redis.pipeline()
+        pipe.delete(key)
+        pipe.rpush(key, *[json.dumps(n) for n in feed[:NOTIFY_FEED_SIZE]])
+        pipe.expire(key, NOTIFY_FEED_HOURS * 3600)
+        pipe.execute()
+    except redis.RedisError as e:
+        redis_failed(app, e)
+
+
+def push_notification(app, key, entry):
+    """
+    Put entry into a primed feed, replacing the ticket's older entry.
+
+    The list is kept sorted by timestamp and capped, so it always matches what
+    the SQL query would return; cold feeds are left for the next read to prime.
+    """
+    if not redis_available(app):
+        return
+    cutoff = _feed_cutoff()
+
+    def _apply(pipe):
+        items = pipe.lrange(key, 0, -1)
+        if not items:
+            return
+        feed = [n for n in map(json.loads, items) if n["id"] != entry["id"]]
+        feed.append(entry)
+        feed = sorted(
+            (n for n in feed if n["timestamp"] >= cutoff),
+            key=lambda n: (n["timestamp"], n["id"]), reverse=True,
+        )[:NOTIFY_FEED_SIZE]
+        pipe.multi()
+        pipe.delete(key)
+        if feed:
+            pipe.rpush(key, *[json.dumps(n) for n in feed])
+            pipe.expire(key, NOTIFY_FEED_HOURS * 3600)
+
+    try:
+        app.redis.transaction(_apply, key)
+    except redis.RedisError as e:
+        redis_failed(app, e)
+
+
+def publish_ticket_notifications(app, ticket):
+    """Refresh both feeds a ticket appears in and drop the cached counts."""
+    push_notification(app, "notif:admin", admin_notification(ticket))
+    push_notification(app, f"notif:user:{ticket.user_id}", user_notification(ticket))
+    invalidate_notification_cache(app, ticket.user_id)
+
+
+def sla_bucket_counts(now, at_risk_hours=6):
+    """
+    One aggregate over tickets for the SLA widgets.
+
+    Returns a row with total_open (not Closed), breached (deadline passed) and
+    at_risk (deadline within at_risk_hours); the last two only count tickets
+    whose SLA clock is running, matching Ticket.sla_state.
+    """
+    risk_cutoff = now + timedelta(hours=at_risk_hours)
+    return db.session.query(
+        db.func.count(Ticket.id).label("total_open"),
+        db.func.coalesce(db.func.sum(db.case(
+            (db.and_(Ticket.sla_tracked, Ticket.due_date < now), 1), else_=0
+        )), 0).label("breached"),
+        db.func.coalesce(db.func.sum(db.case(
+            (db.and_(Ticket.sla_tracked, Ticket.due_date.between(now, risk_cutoff)), 1), else_=0
+        )), 0).label("at_risk"),
+    ).filter(Ticket.status != "Closed").one()
+
+
+def get_latest_ticket_id(app):
+    """Return the newest ticket id, refreshing from the DB at most every few seconds."""
+    ttl = app.config.get("CHECK_NEW_CACHE_SECONDS", 5)
+    now = time.monotonic()
+    if app.latest_ticket_id is None or now - app.latest_ticket_checked_at > ttl:
+        app.latest_ticket_id = db.session.query(db.func.max(Ticket.id)).scalar() or 0
+        app.latest_ticket_checked_at = now
+    return app.latest_ticket_id
+
+
 def safe_set_assignee_fields(ticket, assignee_name=None, assign_status=None):
     """Safely set ticket.assignee_name and ticket.assign_status if model supports them."""
     if assignee_name is not None:
@@ -144,41 +672,23 @@ def safe_set_assignee_fields(ticket, assignee_name=None, assign_status=None):
             pass
 
 
-def normalize_assignee_display_key(ticket):
-    """Return a sensible key for workload charts and displays."""
-    try:
-        nm = getattr(ticket, "assignee_name", None)
-        if nm:
-            return str(nm)
-    except Exception:
-        pass
-    try:
-        if getattr(ticket, "assignee", None):
-            return ticket.assignee.name
-    except Exception:
-        pass
-    return "Unassigned"
+# Select values that are not user ids → (display name, assign_status)
+STATIC_ASSIGNEE_CHOICES = {
+    "": ("Unassigned", "Unassigned"),
+    "assigned": ("Assigned", "Assigned"),
+    "queue": ("In Queue", "In Queue"),
+}
 
 
 def process_assignee_update(ticket, assignee_val, assignee_custom, current_user, app):
     """Process assignee update and return update info."""
     assignee_obj = None
-    new_display = None
-    assign_status = None
-    
-    if assignee_val == "" and not assignee_custom:
-        # Explicit unassigned
-        ticket.assignee_id = None
-        new_display = "Unassigned"
-        assign_status = "Unassigned"
-    elif assignee_val == "assigned":
-        ticket.assignee_id = None
-        new_display = "Assigned"
-        assign_status = "Assigned"
-    elif assignee_val == "queue":
+
+    # "" means unassigned only when no custom name was typed; the others always win
+    static_choice = STATIC_ASSIGNEE_CHOICES.get(assignee_val)
+    if static_choice and (assignee_val or not assignee_custom):
         ticket.assignee_id = None
-        new_display = "In Queue"
-        assign_status = "In Queue"
+        new_display, assign_status = static_choice
     elif assignee_custom:
         # Custom text entered by admin
         ticket.assignee_id = None
@@ -188,17 +698,16 @@ def process_assignee_update(ticket, assignee_val, assignee_custom, current_user,
         # Try numeric ID
         try:
             assignee_obj = db.session.get(User, int(assignee_val))
-            if assignee_obj:
-                ticket.assignee_id = assignee_obj.id
-                new_display = getattr(assignee_obj, "name", str(assignee_obj.id))
-                assign_status = "Engineer"
-            else:
-                # Fallback to custom text
-                ticket.assignee_id = None
-                new_display = str(assignee_val)
-                assign_status = "Custom"
         except (ValueError, TypeError):
             # Not a valid integer, treat as custom text
+            assignee_obj = None
+
+        if assignee_obj:
+            ticket.assignee_id = assignee_obj.id
+            new_display = getattr(assignee_obj, "name", str(assignee_obj.id))
+            assign_status = "Engineer"
+        else:
+            # Fallback to custom text
             ticket.assignee_id = None
             new_display = str(assignee_val)
             assign_status = "Custom"
@@ -209,6 +718,26 @@ def process_assignee_update(ticket, assignee_val, assignee_custom, current_user,
     return assignee_obj, new_display, assign_status
 
 
+# JSON views outside /api/ that should get a JSON error body
+JSON_ENDPOINTS = frozenset({
+    "reports_chart_data",
+    "admin_attachments",
+    "admin_check_new",
+    "admin_email_logs_api",
+})
+
+
+def error_redirect_target():
+    """Where to send the browser after an unexpected error, or None to avoid a redirect loop."""
+    if request.method == "POST":
+        return request.url  # back to the form
+    if request.referrer and request.referrer != request.url:
+        return request.referrer
+    if request.endpoint not in ("index", "dashboard", "admin_dashboard", "user_dashboard"):
+        return url_for("dashboard")
+    return None
+
+
 # ---------------------------
 # ROUTES
 # ---------------------------
@@ -227,27 +756,22 @@ def register_routes(app):
 
         form = RegisterForm()
         if form.validate_on_submit():
-            try:
-                if User.query.filter_by(email=form.email.data).first():
-                    flash("Email already registered", "warning")
-                    return redirect(url_for("register"))
-
-                user = User(
-                    name=form.name.data,
-                    email=form.email.data,
-                    role="user",
-                    active=True
-                )
-                user.set_password(form.password.data)
-                db.session.add(user)
-                db.session.commit()
+            if email_registered(form.email.data):
+                flash("Email already registered", "warning")
+                return redirect(url_for("register"))
+
+            user = User(
+                name=form.name.data,
+                email=form.email.data,
+                role="user",
+                active=True
+            )
+            user.set_password(form.password.data)
+            db.session.add(user)
+            db.session.commit()
 
-                flash("Registration successful. Please login.", "success")
-                return redirect(url_for("login"))
-            except Exception as e:
-                app.logger.error(f"Registration error: {e}")
-                db.session.rollback()
-                flash("Registration failed. Please try again.", "danger")
+            flash("Registration successful. Please login.", "success")
+            return redirect(url_for("login"))
 
         return render_template("register.html", form=form)
 
@@ -257,28 +781,29 @@ def register_routes(app):
         login_mode = request.args.get("role", "user")
 
         if form.validate_on_submit():
-            try:
-                if login_mode == "admin":
-                    user = User.query.filter_by(email=form.email.data, role="admin").first()
-                else:
-                    user = User.query.filter_by(email=form.email.data).first()
-
-                if user and user.check_password(form.password.data) and user.active:
-                    login_user(user)
-                    return redirect(url_for(
-                        "admin_dashboard" if user.role == "admin" else "user_dashboard"
-                    ))
+            if login_mode == "admin":
+                user = User.query.filter_by(email=form.email.data, role="admin").first()
+            else:
+                user = User.query.filter_by(email=form.email.data).first()
 
-                flash("Invalid credentials or restricted login.", "danger")
-            except Exception as e:
-                app.logger.error(f"Login error: {e}")
-                flash("Login failed. Please try again.", "danger")
+            if user and user.check_password(form.password.data) and user.active:
+                # Move hashes made with an older method onto the current one
+                if user.password_needs_rehash():
+                    user.set_password(form.password.data)
+                    db.session.commit()
+                login_user(user)
+                return redirect(url_for(
+                    "admin_dashboard" if user.role == "admin" else "user_dashboard"
+                ))
+
+            flash("Invalid credentials or restricted login.", "danger")
 
         return render_template("login.html", form=form, role=login_mode)
 
     @app.route("/logout")
     @login_required
     def logout():
+        invalidate_cached_user(app, current_user.id)
         logout_user()
         return redirect(url_for("index"))
 
@@ -293,12 +818,29 @@ def register_routes(app):
     @login_required
     def user_dashboard():
         """User dashboard showing their tickets."""
-        user = current_user
-        tickets = user.tickets_created.all()
-    
-        # Convert tickets to dictionaries for JSON serialization
-        tickets_data = [ticket.to_dict() for ticket in tickets]
-    
+        rows = (
+            db.session.query(
+                Ticket.id,
+                Ticket.ticket_no,
+                Ticket.ticket_type,
+                Ticket.category,
+                Ticket.priority,
+                Ticket.status,
+                Ticket.created_at,
+            )
+            .filter(Ticket.user_id == current_user.id)
+            .order_by(Ticket.created_at.desc())
+            .all()
+        )
+
+        # Only the fields the table and chart use (the list is also dumped as JSON)
+        tickets_data = []
+        for r in rows:
+            row = dict(r._mapping)
+            row["created_at"] = r.created_at.strftime('%b %d, %Y') if r.created_at else "N/A"
+            row["created_at_iso"] = r.created_at.isoformat() if r.created_at else None
+            tickets_data.append(row)
+
         return render_template("user_dashboard.html", tickets=tickets_data)
     
 
@@ -309,73 +851,88 @@ def register_routes(app):
             flash("Forbidden", "danger")
             return redirect(url_for("dashboard"))
 
-        try:
-            total = Ticket.query.count()
-            open_count = Ticket.query.filter(
-                Ticket.status.in_(["Not Open Yet", "Open", "Re-Open"])
-            ).count()
-
-            in_progress = Ticket.query.filter_by(status="In Progress").count()
-            closed = Ticket.query.filter_by(status="Closed").count()
-
-            sla_6hrs = 0
-            breached = 0
-            active = Ticket.query.filter(Ticket.status != "Closed").all()
-
-            for t in active:
-                secs = getattr(t, "sla_seconds_left", None)
-                if secs is None:
-                    continue
-                if secs < 0:
-                    breached += 1
-                elif secs <= 6 * 3600:
-                    sla_6hrs += 1
-
-            today = datetime.utcnow().date()
-            labels = [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(29, -1, -1)]
-            values = []
-            for d in labels:
-                try:
-                    count = Ticket.query.filter(db.func.date(Ticket.created_at) == d).count()
-                    values.append(count)
-                except Exception:
-                    values.append(0)
-
-            recent = Ticket.query.order_by(Ticket.created_at.desc()).limit(20).all()
+        # One GROUP BY instead of a COUNT per status bucket
+        status_counts = dict(
+            db.session.query(Ticket.status, db.func.count(Ticket.id))
+            .group_by(Ticket.status)
+            .all()
+        )
+        total = sum(status_counts.values())
+        open_count = sum(
+            status_counts.get(s, 0) for s in ("Not Open Yet", "Open", "Re-Open")
+        )
+        in_progress = status_counts.get("In Progress", 0)
+        closed = status_counts.get("Closed", 0)
 
-            workload = {}
-            for t in recent:
-                key = normalize_assignee_display_key(t)
-                workload[key] = workload.get(key, 0) + 1
+        sla = sla_bucket_counts(datetime.utcnow())
+        breached = sla.breached
+        sla_6hrs = sla.at_risk
 
-            # Email logs with safe serialization
-            try:
-               ordering = EmailLog.sent_at.desc() if hasattr(EmailLog, "sent_at") else EmailLog.id.desc()
-               email_logs_raw = EmailLog.query.order_by(ordering).limit(25).all()
-               email_logs = [serialize_email_log(log) for log in email_logs_raw]
-            except Exception:
-              email_logs = []
-        
-            return render_template(
-               "admin_dashboard.html",
-               total=total,
-               open_count=open_count,
-               in_progress=in_progress,
-               closed=closed,
-               sla_6hrs=sla_6hrs,
-               breached=breached,
-               last30days_labels=labels,
-               last30days_values=values,
-               tickets=recent,
-               workload_labels=list(workload.keys()),
-               workload_values=list(workload.values()),
-               email_logs=email_logs,
+        today = datetime.utcnow().date()
+        labels = [(today - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(29, -1, -1)]
+        since = datetime.combine(today - timedelta(days=29), datetime.min.time())
+        try:
+            day = db.func.date(Ticket.created_at).label("d")
+            rows = (
+                db.session.query(day, db.func.count(Ticket.id))
+                .filter(Ticket.created_at >= since)
+                .group_by(day)
+                .all()
+            )
+            counts = {str(r[0]): r[1] for r in rows}
+        except Exception:
+            counts = {}
+        values = [counts.get(d, 0) for d in labels]
+
+        recent = (
+            Ticket.query
+            .options(
+                selectinload(Ticket.assignee).load_only(User.name),
+                selectinload(Ticket.user).load_only(User.name),
             )
+            .order_by(Ticket.created_at.desc())
+            .limit(20)
+            .all()
+        )
+
+        # Workload over the same 20 most recent tickets, grouped in SQL
+        recent_ids = (
+            db.session.query(Ticket.id)
+            .order_by(Ticket.created_at.desc())
+            .limit(20)
+            .subquery()
+        )
+        assignee_key = Ticket.assignee_display.label("assignee")
+        workload = dict(
+            db.session.query(assignee_key, db.func.count(Ticket.id))
+            .join(recent_ids, recent_ids.c.id == Ticket.id)
+            .group_by(assignee_key)
+            .order_by(db.func.count(Ticket.id).desc())
+            .all()
+        )
+
+        # Email logs with safe serialization
+        try:
+           email_logs = [serialize_email_log(row) for row in email_log_rows(25)]
+        except Exception:
+          email_logs = []
+    
+        return render_template(
+           "admin_dashboard.html",
+           total=total,
+           open_count=open_count,
+           in_progress=in_progress,
+           closed=closed,
+           sla_6hrs=sla_6hrs,
+           breached=breached,
+           last30days_labels=labels,
+           last30days_values=values,
+           tickets=recent,
+           workload_labels=list(workload.keys()),
+           workload_values=list(workload.values()),
+           email_logs=email_logs,
+        )
 
-        except Exception as e:
-            app.logger.error(f"Admin dashboard error: {e}")
-            flash("Error loading dashboard", "danger")
-            return redirect(url_for("dashboard"))
 
     @app.route("/reports/chart-data")
     @login_required
@@ -383,24 +940,28 @@ def register_routes(app):
         if current_user.role != "admin":
             return jsonify({}), 403
 
-        try:
-            priorities = {
-                p: Ticket.query.filter_by(priority=p).count()
-                for p in ["Low", "Medium", "High", "Critical"]
-            }
+        priorities = {p: 0 for p in ["Low", "Medium", "High", "Critical"]}
+        pri_rows = (
+            db.session.query(Ticket.priority, db.func.count(Ticket.id))
+            .group_by(Ticket.priority)
+            .all()
+        )
+        priorities.update({p: n for p, n in pri_rows if p in priorities})
 
-            categories = {}
-            for c in db.session.query(Ticket.category).distinct():
-                name = c[0] or "Uncategorized"
-                categories[name] = Ticket.query.filter_by(category=c[0]).count()
+        categories = {}
+        cat_rows = (
+            db.session.query(Ticket.category, db.func.count(Ticket.id))
+            .group_by(Ticket.category)
+            .all()
+        )
+        for c, n in cat_rows:
+            name = c or "Uncategorized"
+            categories[name] = categories.get(name, 0) + n
 
-            return jsonify({
-                "priority": priorities,
-                "category": categories
-            })
-        except Exception as e:
-            app.logger.error(f"Chart data error: {e}")
-            return jsonify({"priority": {}, "category": {}}), 500
+        return jsonify({
+            "priority": priorities,
+            "category": categories
+        })
 
     @app.route("/admin/attachments")
     @login_required
@@ -408,14 +969,10 @@ def register_routes(app):
         if current_user.role != "admin":
             return jsonify({}), 403
 
-        try:
-            att = Attachment.query.order_by(Attachment.id.desc()).all()
-            return jsonify({
-                "attachments": [{"id": a.id, "filename": a.filename} for a in att]
-            })
-        except Exception as e:
-            app.logger.error(f"Attachments error: {e}")
-            return jsonify({"attachments": []}), 500
+        att = Attachment.query.order_by(Attachment.id.desc()).all()
+        return jsonify({
+            "attachments": [{"id": a.id, "filename": a.filename} for a in att]
+        })
 
     @app.route("/admin/check-new")
     @login_required
@@ -423,14 +980,12 @@ def register_routes(app):
         if current_user.role != "admin":
             return jsonify({"new_tickets": 0})
 
-        try:
-            latest = Ticket.query.filter(
-                Ticket.created_at >= datetime.utcnow() - timedelta(seconds=10)
-            ).count()
-            return jsonify({"new_tickets": latest})
-        except Exception as e:
-            app.logger.error(f"Check new error: {e}")
-            return jsonify({"new_tickets": 0})
+        # Clients pass the last id they saw as ?since=<id>; the answer comes
+        # from the in-process cache so polling admins don't hit the DB.
+        latest = get_latest_ticket_id(app)
+        since = request.args.get("since", type=int)
+        new_tickets = max(0, latest - since) if since is not None else 0
+        return jsonify({"new_tickets": new_tickets, "latest_id": latest})
 
     @app.route("/admin/email-logs")
     @login_required
@@ -438,22 +993,17 @@ def register_routes(app):
         if current_user.role != "admin":
             return jsonify([]), 403
 
-        try:
-            logs = EmailLog.query.order_by(EmailLog.sent_at.desc()).limit(50).all()
-            return jsonify([
-                {
-                    "id": log.id,
-                    "to_email": getattr(log, "to_email", "") or "",
-                    "subject": getattr(log, "subject", "") or "",
-                    "status": getattr(log, "status", "") or "",
-                    "preview": getattr(log, "body_preview", "") or "",
-                    "sent_at": (log.sent_at.strftime("%Y-%m-%d %H:%M:%S") if getattr(log, "sent_at", None) else "")
-                }
-                for log in logs
-            ])
-        except Exception as e:
-            app.logger.error(f"Email logs error: {e}")
-            return jsonify([]), 500
+        return jsonify([
+            {
+                "id": row.id,
+                "to_email": row.to_email or "",
+                "subject": row.subject or "",
+                "status": row.status or "",
+                "preview": row.body_preview or "",
+                "sent_at": (row.sent_at.strftime("%Y-%m-%d %H:%M:%S") if row.sent_at else "")
+            }
+            for row in email_log_rows(50)
+        ])
 
     @app.route("/ticket/create", methods=["GET", "POST"])
     @login_required
@@ -461,91 +1011,73 @@ def register_routes(app):
         form = TicketForm()
 
         if form.validate_on_submit():
-            try:
-                # ✅ FIX: Verify all required fields are present
-                ticket_type = form.ticket_type.data
-                category = form.category.data
-                priority = form.priority.data
-                description = form.description.data
-                
-                # Validate required fields
-                if not all([ticket_type, category, priority, description]):
-                    app.logger.warning("Missing required ticket fields")
-                    flash("Please fill in all required fields.", "warning")
-                    return render_template("ticket_form.html", form=form)
-                
-                # ✅ FIXED: Generate UNIQUE ticket number
-                # Format: IT-YYYYMM-XXXX where XXXX is sequential
-                now = datetime.utcnow()
-                year_month = now.strftime('%y%m')  # e.g., '202512'
-
-                # Get the last ticket created this month
-                last_ticket = Ticket.query.filter(
-                    Ticket.ticket_no.like(f'IT-{year_month}%')
-                 ).order_by(Ticket.id.desc()).first() 
-                  
-                if last_ticket:
-                     # Extract the number from the ticket_no (e.g., 'IT-202512-0005' → 5)
-                     try:
-                         last_number = int(last_ticket.ticket_no.split('-')[-1])
-                         next_number = last_number + 1
-                     except (ValueError, IndexError):
-                         next_number = 1
-                else:  
-                     next_number = 1    
-                # Generate new ticket number: IT-202512-0001, IT-202512-0002, etc.
-                ticket_no = f"IT-{year_month}-{next_number:04d}"
-                     
-                t = Ticket(
-                    ticket_no=ticket_no,
-                    user_id=current_user.id,
-                    ticket_type=ticket_type,
-                    category=category,
-                    priority=priority,
-                    description=description,
-                    status="Not Open Yet",
-                    sla_hours=app.config.get("SLA_HOURS", 24),
-                )
-
-                t.due_date = utils.compute_due_date(t.sla_hours)
-
-                db.session.add(t)
-                db.session.flush()  # Get the ID before commit
+            # ✅ FIX: Verify all required fields are present
+            ticket_type = form.ticket_type.data
+            category = form.category.data
+            priority = form.priority.data
+            description = form.description.data
+            
+            # Validate required fields
+            if not all([ticket_type, category, priority, description]):
+                app.logger.warning("Missing required ticket fields")
+                flash("Please fill in all required fields.", "warning")
+                return render_template("ticket_form.html", form=form)
+            
+            # Generate UNIQUE ticket number (IT-YYYYMM-XXXX) from the
+            # per-month counter row; the bump commits with the insert below
+            ticket_no = next_ticket_no(db.session)
+                 
+            t = Ticket(
+                ticket_no=ticket_no,
+                user_id=current_user.id,
+                ticket_type=ticket_type,
+                category=category,
+                priority=priority,
+                description=description,
+                status="Not Open Yet",
+                sla_hours=app.config.get("SLA_HOURS", 24),
+            )
 
-                # Handle attachment
-                f = request.files.get("attachment")
-                if f and getattr(f, "filename", None) and f.filename.strip():
-                    try:
-                        filename = utils.save_attachment(f)
-                        if filename:
-                            db.session.add(Attachment(ticket_id=t.id, filename=filename))
-                    except Exception as e:
-                        app.logger.warning(f"Attachment upload failed: {e}")
+            t.due_date = utils.compute_due_date(t.sla_hours)
 
-                # Add history
-                db.session.add(TicketHistory(ticket_id=t.id, event="Ticket created", user_id=current_user.id))
-                db.session.commit()
+            db.session.add(t)
+            db.session.flush()  # Get the ID before commit
 
-                # Send email (non-blocking)
+            # Handle attachment
+            f = request.files.get("attachment")
+            if f and getattr(f, "filename", None) and f.filename.strip():
                 try:
-                    utils.email_ticket_created(current_user, t)
+                    filename = utils.save_attachment(f)
+                    if filename:
+                        db.session.add(Attachment(ticket_id=t.id, filename=filename))
                 except Exception as e:
-                    app.logger.debug(f"Email notification failed: {e}")
+                    app.logger.warning(f"Attachment upload failed: {e}")
 
-                flash("Ticket created successfully.", "success")
-                return redirect(url_for("user_dashboard"))
+            # Add history
+            db.session.add(TicketHistory(ticket_id=t.id, event="Ticket created", user_id=current_user.id))
+            db.session.commit()
+            app.latest_ticket_id = max(app.latest_ticket_id or 0, t.id)
+            publish_ticket_notifications(app, t)
 
+            # Send email (non-blocking)
+            try:
+                utils.notify_async(utils.email_ticket_created, current_user, t)
             except Exception as e:
-                app.logger.error(f"Create ticket error: {e}", exc_info=True)
-                db.session.rollback()
-                flash("Failed to create ticket. Please try again.", "danger")
+                app.logger.debug(f"Email notification failed: {e}")
+
+            flash("Ticket created successfully.", "success")
+            return redirect(url_for("user_dashboard"))
+
 
         return render_template("ticket_form.html", form=form)
 
     @app.route("/ticket/<int:ticket_id>", methods=["GET", "POST"])
     @login_required
     def ticket_view(ticket_id):
-        T = Ticket.query.get_or_404(ticket_id)
+        # Single row, so join the two many-to-one users into the same SELECT
+        T = Ticket.query.options(
+            joinedload(Ticket.assignee), joinedload(Ticket.user)
+        ).get_or_404(ticket_id)
 
         allowed = (
             current_user.role in ("admin", "assignee")
@@ -555,123 +1087,138 @@ def register_routes(app):
             flash("You are not allowed to view this ticket.", "danger")
             return redirect(url_for("dashboard"))
 
-        comments = Comment.query.filter_by(ticket_id=ticket_id).order_by(Comment.created_at.asc()).all()
-        attachments = Attachment.query.filter_by(ticket_id=ticket_id).all()
-
         if request.method == "POST":
-            try:
-                updated_texts = []
-                updated_by = current_user.name
-
-                # Status update
-                new_status = request.form.get("status")
-                if new_status and new_status != T.status:
-                    old_status = T.status
-                    T.status = new_status
-                    if new_status in ("Closed", "Resolved"):
-                        T.closed_at = datetime.utcnow()
-
-                    db.session.add(TicketHistory(
+            updated_texts = []
+            history_rows = []
+            notify_assignee = None
+            now = datetime.utcnow()
+            updated_by = current_user.name
+
+            # Status update
+            new_status = request.form.get("status")
+            if new_status and new_status != T.status:
+                old_status = T.status
+                T.status = new_status
+                if new_status in ("Closed", "Resolved"):
+                    T.closed_at = datetime.utcnow()
+
+                history_rows.append(dict(
+                    ticket_id=T.id,
+                    event=f"Status changed from '{old_status}' to '{new_status}'",
+                    user_id=current_user.id,
+                    created_at=now
+                ))
+                updated_texts.append(f"Status: {old_status} → {new_status}")
+
+            # Admin-only updates
+            if current_user.role == "admin":
+                # Priority update
+                new_priority = request.form.get("priority")
+                if new_priority and new_priority != T.priority:
+                    old_priority = T.priority
+                    T.priority = new_priority
+                    history_rows.append(dict(
                         ticket_id=T.id,
-                        event=f"Status changed from '{old_status}' to '{new_status}'",
-                        user_id=current_user.id
+                        event=f"Priority changed from '{old_priority}' to '{new_priority}'",
+                        user_id=current_user.id,
+                        created_at=now
                     ))
-                    updated_texts.append(f"Status: {old_status} → {new_status}")
-
-                # Admin-only updates
-                if current_user.role == "admin":
-                    # Priority update
-                    new_priority = request.form.get("priority")
-                    if new_priority and new_priority != T.priority:
-                        old_priority = T.priority
-                        T.priority = new_priority
-                        db.session.add(TicketHistory(
-                            ticket_id=T.id,
-                            event=f"Priority changed from '{old_priority}' to '{new_priority}'",
-                            user_id=current_user.id
-                        ))
-                        updated_texts.append(f"Priority: {old_priority} → {new_priority}")
+                    updated_texts.append(f"Priority: {old_priority} → {new_priority}")
+
+                # Assignee update
+                new_assignee = request.form.get("assignee_id")
+                custom_name = request.form.get("assignee_name_custom", "").strip()
+
+                current_assignee_val = str(T.assignee_id) if getattr(T, "assignee_id", None) else ""
+
+                if (new_assignee is not None and new_assignee != current_assignee_val) or custom_name:
+                    old = T.assignee.name if getattr(T, "assignee", None) else (getattr(T, "assignee_name", None) or "Unassigned")
 
-                    # Assignee update
-                    new_assignee = request.form.get("assignee_id")
-                    custom_name = request.form.get("assignee_name_custom", "").strip()
+                    assignee_obj, new_display, assign_status = process_assignee_update(
+                        T, new_assignee or "", custom_name, current_user, app
+                    )
 
-                    current_assignee_val = str(T.assignee_id) if getattr(T, "assignee_id", None) else ""
+                    history_rows.append(dict(
+                        ticket_id=T.id,
+                        event=f"Assignee changed from '{old}' to '{new_display}'",
+                        user_id=current_user.id,
+                        created_at=now
+                    ))
 
-                    if (new_assignee is not None and new_assignee != current_assignee_val) or custom_name:
-                        old = T.assignee.name if getattr(T, "assignee", None) else (getattr(T, "assignee_name", None) or "Unassigned")
+                    notify_assignee = assignee_obj
 
-                        assignee_obj, new_display, assign_status = process_assignee_update(
-                            T, new_assignee or "", custom_name, current_user, app
-                        )
+                    updated_texts.append(f"Assignee: {old} → {new_display}")
 
-                        db.session.add(TicketHistory(
+                    if T.status in ("Open", "Re-Open", "Not Open Yet"):
+                        T.status = "In Progress"
+                        history_rows.append(dict(
                             ticket_id=T.id,
-                            event=f"Assignee changed from '{old}' to '{new_display}'",
-                            user_id=current_user.id
+                            event="Auto status changed to 'In Progress' on assignment",
+                            user_id=current_user.id,
+                            created_at=now
                         ))
 
-                        if assignee_obj:
-                            try:
-                                utils.email_assignee_assigned(assignee_obj, T, updated_by)
-                            except Exception as e:
-                                app.logger.debug(f"Assignee email failed: {e}")
-
-                        updated_texts.append(f"Assignee: {old} → {new_display}")
-
-                        if T.status in ("Open", "Re-Open", "Not Open Yet"):
-                            T.status = "In Progress"
-                            db.session.add(TicketHistory(
-                                ticket_id=T.id,
-                                event="Auto status changed to 'In Progress' on assignment",
-                                user_id=current_user.id
-                            ))
-
-                # Comment
-                msg = request.form.get("message") or request.form.get("comment")
-                if msg and msg.strip():
-                    db.session.add(Comment(
+            # Comment
+            msg = request.form.get("message") or request.form.get("comment")
+            if msg and msg.strip():
+                db.session.add(Comment(
+                    ticket_id=T.id,
+                    user_id=current_user.id,
+                    message=msg.strip()
+                ))
+                history_rows.append(dict(
+                    ticket_id=T.id,
+                    event="Comment added",
+                    user_id=current_user.id,
+                    created_at=now
+                ))
+                updated_texts.append("Comment added")
+
+            # Attachment
+            file = request.files.get("attachment")
+            if file and getattr(file, "filename", None):
+                filename = utils.save_attachment(file)
+                if filename:
+                    db.session.add(Attachment(ticket_id=T.id, filename=filename))
+                    history_rows.append(dict(
                         ticket_id=T.id,
+                        event=f"Attachment uploaded: {filename}",
                         user_id=current_user.id,
-                        message=msg.strip()
-                    ))
-                    db.session.add(TicketHistory(
-                        ticket_id=T.id,
-                        event="Comment added",
-                        user_id=current_user.id
+                        created_at=now
                     ))
-                    updated_texts.append("Comment added")
+                    updated_texts.append(f"Attachment: {filename}")
 
-                # Attachment
-                file = request.files.get("attachment")
-                if file and getattr(file, "filename", None):
-                    filename = utils.save_attachment(file)
-                    if filename:
-                        db.session.add(Attachment(ticket_id=T.id, filename=filename))
-                        db.session.add(TicketHistory(
-                            ticket_id=T.id,
-                            event=f"Attachment uploaded: {filename}",
-                            user_id=current_user.id
-                        ))
-                        updated_texts.append(f"Attachment: {filename}")
+            bulk_insert(TicketHistory, history_rows, commit=False)
+            db.session.commit()
+            publish_ticket_notifications(app, T)
 
-                db.session.commit()
+            # Notifications are queued after commit so the worker sees the saved ticket
+            if notify_assignee:
+                try:
+                    utils.notify_async(utils.email_assignee_assigned, notify_assignee, T, updated_by)
+                except Exception as e:
+                    app.logger.debug(f"Assignee email failed: {e}")
 
-                if updated_texts:
-                    try:
-                        utils.email_ticket_updated(T.user, T, updated_by, "; ".join(updated_texts))
-                    except Exception as e:
-                        app.logger.debug(f"Update email failed: {e}")
+            if updated_texts:
+                try:
+                    utils.notify_async(utils.email_ticket_updated, T.user, T, updated_by, "; ".join(updated_texts))
+                except Exception as e:
+                    app.logger.debug(f"Update email failed: {e}")
 
-                flash("Ticket updated successfully.", "success")
-                return redirect(url_for("ticket_view", ticket_id=T.id))
+            flash("Ticket updated successfully.", "success")
+            return redirect(url_for("ticket_view", ticket_id=T.id))
 
-            except Exception as e:
-                app.logger.error(f"Ticket update error: {e}")
-                db.session.rollback()
-                flash("Failed to update ticket.", "danger")
 
-        assignees = User.query.filter(User.role.in_(["admin", "assignee", "engineer"])).all()
+        # Loaded only when rendering; a successful POST redirects before this,
+        # so they are queried here rather than eager-loaded with the ticket.
+        comments = (
+            Comment.query.options(joinedload(Comment.user))
+            .filter_by(ticket_id=ticket_id)
+            .order_by(Comment.created_at.asc())
+            .all()
+        )
+        attachments = Attachment.query.filter_by(ticket_id=ticket_id).all()
+        assignees = get_staff(app, ("admin", "assignee", "engineer"))
 
         return render_template(
             "ticket_view.html",
@@ -687,8 +1234,13 @@ def register_routes(app):
         if current_user.role != "admin":
             return redirect(url_for("dashboard"))
 
-        ticket = Ticket.query.get_or_404(id)
-        engineers = User.query.filter(User.role.in_(["assignee", "engineer"])).all()
+        # The page renders all three collections; one IN query each
+        ticket = Ticket.query.options(
+            selectinload(Ticket.comments).selectinload(Comment.user),
+            selectinload(Ticket.attachments),
+            selectinload(Ticket.history),
+        ).get_or_404(id)
+        engineers = get_staff(app, ("assignee", "engineer"))
 
         return render_template("admin_ticket_view.html", ticket=ticket, engineers=engineers)
 
@@ -697,7 +1249,11 @@ def register_routes(app):
     def admin_tickets():
         if current_user.role != "admin":
             return redirect(url_for('dashboard'))
-        tickets = Ticket.query.all()
+        # The list only shows names, so don't pull whole user rows
+        tickets = Ticket.query.options(
+            selectinload(Ticket.assignee).load_only(User.name),
+            selectinload(Ticket.user).load_only(User.name),
+        ).all()
         return render_template('admin_tickets.html', tickets=tickets)
 
     @app.route("/admin/ticket/<int:id>/update", methods=["POST"])
@@ -708,102 +1264,109 @@ def register_routes(app):
 
         ticket = Ticket.query.get_or_404(id)
 
-        try:
-            updated_by = current_user.name
-            updated_texts = []
-
-            # Status update
-            new_status = request.form.get("status")
-            if new_status and new_status != ticket.status:
-                old = ticket.status
-                ticket.status = new_status
-                if new_status in ("Closed", "Resolved"):
-                    ticket.closed_at = datetime.utcnow()
-                db.session.add(TicketHistory(
-                    ticket_id=id,
-                    event=f"Status changed from '{old}' to '{new_status}'",
-                    user_id=current_user.id
-                ))
-                updated_texts.append(f"Status: {old} → {new_status}")
-
-            # Priority update
-            new_priority = request.form.get("priority")
-            if new_priority and new_priority != ticket.priority:
-                oldp = ticket.priority
-                ticket.priority = new_priority
-                db.session.add(TicketHistory(
-                    ticket_id=id,
-                    event=f"Priority changed from '{oldp}' to '{new_priority}'",
-                    user_id=current_user.id
-                ))
-                updated_texts.append(f"Priority: {oldp} → {new_priority}")
-
-            # Assignee update
-            assignee_val = request.form.get("assignee_id", "").strip()
-            assignee_custom = request.form.get("assignee_name_custom", "").strip()
+        updated_by = current_user.name
+        updated_texts = []
+        history_rows = []
+        notify_assignee = None
+        now = datetime.utcnow()
+
+        # Status update
+        new_status = request.form.get("status")
+        if new_status and new_status != ticket.status:
+            old = ticket.status
+            ticket.status = new_status
+            if new_status in ("Closed", "Resolved"):
+                ticket.closed_at = datetime.utcnow()
+            history_rows.append(dict(
+                ticket_id=id,
+                event=f"Status changed from '{old}' to '{new_status}'",
+                user_id=current_user.id,
+                created_at=now
+            ))
+            updated_texts.append(f"Status: {old} → {new_status}")
+
+        # Priority update
+        new_priority = request.form.get("priority")
+        if new_priority and new_priority != ticket.priority:
+            oldp = ticket.priority
+            ticket.priority = new_priority
+            history_rows.append(dict(
+                ticket_id=id,
+                event=f"Priority changed from '{oldp}' to '{new_priority}'",
+                user_id=current_user.id,
+                created_at=now
+            ))
+            updated_texts.append(f"Priority: {oldp} → {new_priority}")
+
+        # Assignee update
+        assignee_val = request.form.get("assignee_id", "").strip()
+        assignee_custom = request.form.get("assignee_name_custom", "").strip()
+
+        old_assignee = ticket.assignee.name if getattr(ticket, "assignee", None) else (
+            getattr(ticket, "assignee_name", None) or "Unassigned"
+        )
 
-            old_assignee = ticket.assignee.name if getattr(ticket, "assignee", None) else (
-                getattr(ticket, "assignee_name", None) or "Unassigned"
-            )
+        assignee_obj, new_display, assign_status = process_assignee_update(
+            ticket, assignee_val, assignee_custom, current_user, app
+        )
 
-            assignee_obj, new_display, assign_status = process_assignee_update(
-                ticket, assignee_val, assignee_custom, current_user, app
-            )
+        if new_display is not None and new_display != old_assignee:
+            history_rows.append(dict(
+                ticket_id=id,
+                event=f"Assignee changed from '{old_assignee}' to '{new_display}'",
+                user_id=current_user.id,
+                created_at=now
+            ))
+            updated_texts.append(f"Assignee: {old_assignee} → {new_display}")
 
-            if new_display is not None and new_display != old_assignee:
-                db.session.add(TicketHistory(
-                    ticket_id=id,
-                    event=f"Assignee changed from '{old_assignee}' to '{new_display}'",
-                    user_id=current_user.id
-                ))
-                updated_texts.append(f"Assignee: {old_assignee} → {new_display}")
-
-                if assignee_obj:
-                    try:
-                        utils.email_assignee_assigned(assignee_obj, ticket, updated_by)
-                    except Exception as e:
-                        app.logger.debug(f"Assignee email failed: {e}")
-
-                if ticket.status == "Open":
-                    ticket.status = "In Progress"
-                    db.session.add(TicketHistory(
-                        ticket_id=id,
-                        event="Auto status changed to 'In Progress' on assignment",
-                        user_id=current_user.id
-                    ))
-                    updated_texts.append("Status: Open → In Progress (auto)")
+            notify_assignee = assignee_obj
 
-            # Comment
-            comment = request.form.get("comment")
-            if comment and comment.strip():
-                db.session.add(Comment(
+            if ticket.status == "Open":
+                ticket.status = "In Progress"
+                history_rows.append(dict(
                     ticket_id=id,
+                    event="Auto status changed to 'In Progress' on assignment",
                     user_id=current_user.id,
-                    message=f"[ADMIN] {comment.strip()}"
+                    created_at=now
                 ))
-                db.session.add(TicketHistory(
-                    ticket_id=id,
-                    event="Admin comment added",
-                    user_id=current_user.id
-                ))
-                updated_texts.append("Admin comment added")
+                updated_texts.append("Status: Open → In Progress (auto)")
+
+        # Comment
+        comment = request.form.get("comment")
+        if comment and comment.strip():
+            db.session.add(Comment(
+                ticket_id=id,
+                user_id=current_user.id,
+                message=f"[ADMIN] {comment.strip()}"
+            ))
+            history_rows.append(dict(
+                ticket_id=id,
+                event="Admin comment added",
+                user_id=current_user.id,
+                created_at=now
+            ))
+            updated_texts.append("Admin comment added")
+
+        bulk_insert(TicketHistory, history_rows, commit=False)
+        db.session.commit()
+        publish_ticket_notifications(app, ticket)
+
+        # Notifications are queued after commit so the worker sees the saved ticket
+        if notify_assignee:
+            try:
+                utils.notify_async(utils.email_assignee_assigned, notify_assignee, ticket, updated_by)
+            except Exception as e:
+                app.logger.debug(f"Assignee email failed: {e}")
 
-            db.session.commit()
+        if updated_texts:
+            try:
+                utils.notify_async(utils.email_ticket_updated, ticket.user, ticket, updated_by, "; ".join(updated_texts))
+            except Exception as e:
+                app.logger.debug(f"Update email failed: {e}")
 
-            if updated_texts:
-                try:
-                    utils.email_ticket_updated(ticket.user, ticket, updated_by, "; ".join(updated_texts))
-                except Exception as e:
-                    app.logger.debug(f"Update email failed: {e}")
+        flash("Ticket updated.", "success")
+        return redirect(url_for("admin_ticket_view", id=id))
 
-            flash("Ticket updated.", "success")
-            return redirect(url_for("admin_ticket_view", id=id))
-
-        except Exception as e:
-            app.logger.exception(f"Admin ticket update error: {e}")
-            db.session.rollback()
-            flash("Failed to update ticket due to internal error.", "danger")
-            return redirect(url_for("admin_ticket_view", id=id))
 
     @app.route("/admin/users", methods=["GET", "POST"])
     @login_required
@@ -815,28 +1378,24 @@ def register_routes(app):
         form = AdminUserForm()
 
         if form.validate_on_submit():
-            try:
-                if User.query.filter_by(email=form.email.data).first():
-                    flash("Email already exists!", "warning")
-                    return redirect(url_for("admin_users"))
-
-                u = User(
-                    name=form.name.data,
-                    email=form.email.data,
-                    role=form.role.data,
-                    department=form.department.data,
-                    active=form.active.data,
-                )
-                u.set_password(form.password.data or "ChangeMe123!")
-                db.session.add(u)
-                db.session.commit()
-
-                flash("User created!", "success")
+            if email_registered(form.email.data):
+                flash("Email already exists!", "warning")
                 return redirect(url_for("admin_users"))
-            except Exception as e:
-                app.logger.error(f"User creation error: {e}")
-                db.session.rollback()
-                flash("Failed to create user.", "danger")
+
+            u = User(
+                name=form.name.data,
+                email=form.email.data,
+                role=form.role.data,
+                department=form.department.data,
+                active=form.active.data,
+            )
+            u.set_password(form.password.data or "ChangeMe123!")
+            db.session.add(u)
+            db.session.commit()
+            invalidate_staff_cache(app)
+
+            flash("User created!", "success")
+            return redirect(url_for("admin_users"))
 
         users = User.query.order_by(User.created_at.desc()).all()
         return render_template("admin_users.html", users=users, form=form)
@@ -853,23 +1412,20 @@ def register_routes(app):
         form = AdminUserForm(obj=user)
 
         if form.validate_on_submit():
-            try:
-                user.name = form.name.data
-                user.email = form.email.data
-                user.role = form.role.data
-                user.department = form.department.data
-                user.active = form.active.data
+            user.name = form.name.data
+            user.email = form.email.data
+            user.role = form.role.data
+            user.department = form.department.data
+            user.active = form.active.data
 
-                if form.password.data:
-                    user.set_password(form.password.data)
+            if form.password.data:
+                user.set_password(form.password.data)
 
-                db.session.commit()
-                flash("User updated!", "success")
-                return redirect(url_for("admin_users"))
-            except Exception as e:
-                app.logger.error(f"User update error: {e}")
-                db.session.rollback()
-                flash("Failed to update user.", "danger")
+            db.session.commit()
+            invalidate_cached_user(app, user_id)
+            invalidate_staff_cache(app)
+            flash("User updated!", "success")
+            return redirect(url_for("admin_users"))
 
         return render_template("admin_user_edit.html", form=form, user=user)
     
@@ -887,25 +1443,15 @@ def register_routes(app):
             flash("You cannot delete your own account.", "danger")
             return redirect(url_for("admin_users"))
 
-        try:
-            # Delete all tickets created by this user first
-            Ticket.query.filter_by(user_id=user_id).delete()
-            
-            # Delete all comments by this user
-            Comment.query.filter_by(user_id=user_id).delete()
-            
-            # Delete all history entries by this user
-            TicketHistory.query.filter_by(user_id=user_id).delete()
-            
-            # Now delete the user
-            db.session.delete(user)
-            db.session.commit()
-            
-            flash("User deleted successfully.", "success")
-        except Exception as e:
-            current_app.logger.error(f"User delete error: {e}")
-            db.session.rollback()
-            flash("Failed to delete user.", "danger")
+        # Tickets, comments, history and read markers go with the user via
+        # ON DELETE CASCADE; tickets assigned to them are left unassigned
+        db.session.delete(user)
+        db.session.commit()
+        invalidate_cached_user(app, user_id)
+        invalidate_staff_cache(app)
+        invalidate_notification_cache(app, user_id, feeds=True)
+        
+        flash("User deleted successfully.", "success")
 
         return redirect(url_for("admin_users"))
 
@@ -917,103 +1463,82 @@ def register_routes(app):
     @login_required
     def api_notifications_count():
         """Get unread notification count for current user."""
-        try:
-            now = datetime.utcnow()
-            yesterday = now - timedelta(hours=24)
-            
-            if current_user.role == 'admin':
-                # Admins get count of new tickets from last 24 hours
-                count = Ticket.query.filter(
-                    Ticket.created_at >= yesterday
-                ).count()
-            else:
-                # Users get count of their tickets updated in last 24 hours
-                count = Ticket.query.filter(
-                    Ticket.user_id == current_user.id,
-                    Ticket.updated_at >= yesterday
-                ).count()
-            
-            return jsonify({"count": count})
-        except Exception as e:
-            app.logger.error(f"Notification count error: {e}")
-            return jsonify({"count": 0}), 500
+        count_key, _ = notification_cache_keys(current_user)
+        cached = cache_get_json(app, count_key)
+        if cached is not None:
+            return jsonify({"count": cached})
+
+        now = datetime.utcnow()
+        yesterday = now - timedelta(hours=24)
+        
+        if current_user.role == 'admin':
+            # Admins get count of new tickets from last 24 hours
+            count = count_tickets(Ticket.created_at >= yesterday)
+        else:
+            # Users get count of their tickets updated in last 24 hours
+            count = count_tickets(
+                Ticket.user_id == current_user.id,
+                Ticket.updated_at >= yesterday
+            )
+        
+        cache_set_json(app, count_key, count)
+        return jsonify({"count": count})
 
     @app.route("/api/notifications/list")
     @login_required
     def api_notifications_list():
         """Get notification list for current user."""
-        try:
-            notifications = []
-            now = datetime.utcnow()
-            yesterday = now - timedelta(hours=24)
-            
-            if current_user.role == 'admin':
-                # Show recent tickets for admin from last 24 hours
-                recent = Ticket.query.filter(
-                    Ticket.created_at >= yesterday
-                ).order_by(
-                    Ticket.created_at.desc()
-                ).limit(15).all()
-                
-                for ticket in recent:
-                    notifications.append({
-                        'id': ticket.id,
-                        'type': 'new_ticket',
-                        'title': f"New Ticket #{ticket.ticket_no}",
-                        'message': f"From {ticket.user.name} • {ticket.priority} priority",
-                        'priority': ticket.priority,
-                        'timestamp': ticket.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                        'link': f"/admin/ticket/{ticket.id}",
-                        'icon': 'fa-ticket'
-                    })
-            else:
-                # Show ticket updates for user from last 24 hours
-                tickets = Ticket.query.filter(
-                    Ticket.user_id == current_user.id,
-                    Ticket.updated_at >= yesterday
-                ).order_by(
-                    Ticket.updated_at.desc()
-                ).limit(15).all()
-                
-                for ticket in tickets:
-                    notifications.append({
-                        'id': ticket.id,
-                        'type': 'ticket_update',
-                        'title': f"Ticket #{ticket.ticket_no} - {ticket.status}",
-                        'message': f"Priority: {ticket.priority}",
-                        'priority': ticket.priority,
-                        'timestamp': ticket.updated_at.strftime("%Y-%m-%d %H:%M:%S") if hasattr(ticket, 'updated_at') else ticket.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                        'link': f"/ticket/{ticket.id}",
-                        'icon': 'fa-bell'
-                    })
-            
-            return jsonify({"notifications": notifications})
-        except Exception as e:
-            app.logger.error(f"Notification list error: {e}")
-            return jsonify({"notifications": []}), 500
+        _, feed_key = notification_cache_keys(current_user)
+        cached = read_notification_feed(app, feed_key)
+        if cached is not None:
+            return jsonify({"notifications": cached})
+
+        now = datetime.utcnow()
+        yesterday = now - timedelta(hours=24)
+        
+        if current_user.role == 'admin':
+            # Show recent tickets for admin from last 24 hours
+            recent = Ticket.query.options(
+                load_only(*NOTIFY_COLUMNS),
+                selectinload(Ticket.user).load_only(User.name),
+                lazyload(Ticket.assignee),
+            ).filter(
+                Ticket.created_at >= yesterday
+            ).order_by(
+                Ticket.created_at.desc()
+            ).limit(15).all()
+            notifications = [admin_notification(ticket) for ticket in recent]
+        else:
+            # Show ticket updates for user from last 24 hours
+            tickets = Ticket.query.options(
+                load_only(*NOTIFY_COLUMNS),
+                lazyload(Ticket.user),
+                lazyload(Ticket.assignee),
+            ).filter(
+                Ticket.user_id == current_user.id,
+                Ticket.updated_at >= yesterday
+            ).order_by(
+                Ticket.updated_at.desc()
+            ).limit(15).all()
+            notifications = [user_notification(ticket) for ticket in tickets]
+        
+        store_notification_feed(app, feed_key, notifications)
+        return jsonify({"notifications": notifications})
 
     @app.route("/api/notifications/<int:notification_id>/read", methods=["POST"])
     @login_required
     def api_notification_read(notification_id):
         """Mark single notification as read."""
-        try:
-            # Implementation note: If you add a 'read' column to your models,
-            # you can mark individual notifications as read here
-            return jsonify({"success": True})
-        except Exception as e:
-            app.logger.error(f"Mark read error: {e}")
-            return jsonify({"success": False}), 500
+        # Implementation note: If you add a 'read' column to your models,
+        # you can mark individual notifications as read here
+        return jsonify({"success": True})
 
     @app.route("/api/notifications/mark-all-read", methods=["POST"])
     @login_required
     def api_notifications_mark_all_read():
         """Mark all notifications as read."""
-        try:
-            # ✅ FIX: Return actual empty state after marking all as read
-            return jsonify({"success": True, "count": 0})
-        except Exception as e:
-            app.logger.error(f"Mark all read error: {e}")
-            return jsonify({"success": False, "count": 0}), 500
+        # ✅ FIX: Return actual empty state after marking all as read
+        return jsonify({"success": True, "count": 0})
 
     # ============================================================
     # END OF NOTIFICATION API ROUTES
@@ -1026,77 +1551,38 @@ def register_routes(app):
             flash("Forbidden", "danger")
             return redirect(url_for("dashboard"))
 
-        try:
-            month = request.args.get("month")
-            q = Ticket.query
+        month = request.args.get("month")
+        # The table, assignee fallback and CSV all read t.user / t.assignee
+        q = Ticket.query.options(
+            selectinload(Ticket.user).load_only(User.name),
+            selectinload(Ticket.assignee).load_only(User.name),
+        )
 
-            if month:
-                try:
-                    y, m = month.split("-")
-                    start = datetime(int(y), int(m), 1)
-                    if int(m) == 12:
-                        end = datetime(int(y) + 1, 1, 1)
-                    else:
-                        end = datetime(int(y), int(m) + 1, 1)
-                    q = q.filter(Ticket.created_at >= start, Ticket.created_at < end)
-                except Exception as e:
-                    app.logger.warning(f"Invalid month parameter: {e}")
+        if month:
+            try:
+                start = datetime.strptime(month, "%Y-%m")
+            except ValueError as e:
+                app.logger.warning(f"Invalid month parameter: {e}")
+                month = None
+            else:
+                # Half-open range on the raw column so an index on created_at still applies
+                end = (start + timedelta(days=32)).replace(day=1)
+                q = q.filter(Ticket.created_at >= start, Ticket.created_at < end)
+
+        q = q.order_by(Ticket.created_at.desc())
+
+        # Export CSV: stream rows as they are fetched instead of building the file in memory
+        if request.args.get("export") == "csv":
+            return Response(
+                stream_with_context(generate_report_csv(q.options(load_only(*REPORT_CSV_COLUMNS)))),
+                mimetype="text/csv",
+                headers={"Content-Disposition": f'attachment; filename="report_{month or "all"}.csv"'},
+            )
 
-            tickets = q.order_by(Ticket.created_at.desc()).all()
+        tickets = q.all()
 
-            # Ensure textual assignee displays in templates
-            for t in tickets:
-                try:
-                    if not getattr(t, "assignee", None):
-                        textual = getattr(t, "assignee_name", None)
-                        if textual:
-                            class _A:
-                                pass
-                            anon = _A()
-                            anon.name = textual
-                            try:
-                                object.__setattr__(t, "assignee", anon)
-                            except Exception:
-                                setattr(t, "assignee_name_display", textual)
-                except Exception:
-                    pass
-
-            # Export CSV
-            if request.args.get("export") == "csv":
-                rows = []
-                for t in tickets:
-                    try:
-                        assignee_name = normalize_assignee_display_key(t)
-                    except Exception:
-                        assignee_name = ""
-                    rows.append({
-                        "ticket_no": t.ticket_no,
-                        "created_at": t.created_at,
-                        "ticket_type": t.ticket_type,
-                        "category": t.category,
-                        "priority": t.priority,
-                        "status": t.status,
-                        "assignee": assignee_name,
-                        "user": t.user.name if getattr(t, "user", None) else "",
-                        "due_date": getattr(t, "due_date", None),
-                        "sla_state": getattr(t, "sla_state", None),
-                    })
-
-                df = pd.DataFrame(rows)
-                filename = f"report_{month or 'all'}.csv"
-                upload_folder = app.config.get("UPLOAD_FOLDER", "uploads")
-                path = os.path.join(upload_folder, filename)
-                os.makedirs(upload_folder, exist_ok=True)
-                df.to_csv(path, index=False)
-
-                return send_file(path, as_attachment=True)
-
-            return render_template("reports.html", tickets=tickets)
+        return render_template("reports.html", tickets=tickets)
 
-        except Exception as e:
-            app.logger.error(f"Reports error: {e}")
-            flash("Error generating reports.", "danger")
-            return redirect(url_for("admin_dashboard"))
 
     @app.route("/admin/sla-daily-report")
     @login_required
@@ -1105,53 +1591,46 @@ def register_routes(app):
             flash("Forbidden", "danger")
             return redirect(url_for("dashboard"))
 
-        try:
-            now = datetime.utcnow()
-            open_tickets = Ticket.query.filter(Ticket.status != "Closed").all()
-
-            breached = []
-            at_risk = []
-
-            for t in open_tickets:
-                secs = getattr(t, "sla_seconds_left", None)
-                if secs is None:
-                    continue
-                if secs < 0:
-                    breached.append(t)
-                elif secs <= 6 * 3600:
-                    at_risk.append(t)
-
-            metrics = {
-                "timestamp": now.strftime("%Y-%m-%d %H:%M UTC"),
-                "total_open": len(open_tickets),
-                "breached": len(breached),
-                "at_risk": len(at_risk),
-            }
+        now = datetime.utcnow()
+        sla = sla_bucket_counts(now)
+
+        metrics = {
+            "timestamp": now.strftime("%Y-%m-%d %H:%M UTC"),
+            "total_open": sla.total_open,
+            "breached": sla.breached,
+            "at_risk": sla.at_risk,
+        }
+
+        # Only the 25 rows the email lists, most overdue first
+        breached = (
+            Ticket.query.options(selectinload(Ticket.user).load_only(User.name))
+            .filter(Ticket.sla_tracked, Ticket.due_date < now)
+            .order_by(Ticket.due_date.asc())
+            .limit(25)
+            .all()
+        )
 
-            breached_summary = []
-            for t in breached[:25]:
-                age_hours = int((now - t.created_at).total_seconds() / 3600)
-                breached_summary.append({
-                    "ticket_no": t.ticket_no,
-                    "priority": t.priority,
-                    "status": t.status,
-                    "user": t.user.name if getattr(t, "user", None) else "",
-                    "age_hours": age_hours,
-                })
+        breached_summary = []
+        for t in breached:
+            age_hours = int((now - t.created_at).total_seconds() / 3600)
+            breached_summary.append({
+                "ticket_no": t.ticket_no,
+                "priority": t.priority,
+                "status": t.status,
+                "user": t.user.name if getattr(t, "user", None) else "",
+                "age_hours": age_hours,
+                "overdue_hours": int((now - t.due_date).total_seconds() / 3600),
+            })
 
-            try:
-                utils.email_daily_sla_report(current_user.email, metrics, breached_summary)
-                flash("Daily SLA report emailed.", "success")
-            except Exception as e:
-                app.logger.error(f"Failed sending SLA daily report: {e}")
-                flash("Failed to send SLA report email.", "warning")
+        try:
+            utils.email_daily_sla_report(current_user.email, metrics, breached_summary)
+            flash("Daily SLA report emailed.", "success")
+        except Exception as e:
+            app.logger.error(f"Failed sending SLA daily report: {e}")
+            flash("Failed to send SLA report email.", "warning")
 
-            return redirect(url_for("admin_dashboard"))
+        return redirect(url_for("admin_dashboard"))
 
-        except Exception as e:
-            app.logger.error(f"SLA report error: {e}")
-            flash("Error generating SLA report.", "danger")
-            return redirect(url_for("admin_dashboard"))
 
     @app.route("/admin/email-test")
     @login_required
@@ -1160,32 +1639,36 @@ def register_routes(app):
             flash("Forbidden", "danger")
             return redirect(url_for("dashboard"))
 
-        try:
-            subject = "Test Email - IT Ticketing Portal"
-            html = "<h2>Email Test</h2><p>If you can read this, SMTP works.</p>"
-            text = "SMTP test from IT Ticketing Portal."
+        subject = "Test Email - IT Ticketing Portal"
+        html = "<h2>Email Test</h2><p>If you can read this, SMTP works.</p>"
+        text = "SMTP test from IT Ticketing Portal."
 
-            ok = utils.send_email(current_user.email, subject, html, text)
+        ok = utils.send_email(current_user.email, subject, html, text)
 
-            if ok:
-                flash("Test email sent.", "success")
-            else:
-                flash("Failed to send email.", "danger")
-        except Exception as e:
-            app.logger.error(f"Email test error: {e}")
-            flash("Failed to send test email.", "danger")
+        if ok:
+            flash("Test email sent.", "success")
+        else:
+            flash("Failed to send email.", "danger")
 
         return redirect(url_for("admin_dashboard"))
 
     @app.route("/uploads/<path:filename>")
     @login_required
     def uploaded_file(filename):
-        try:
-            upload_folder = current_app.config.get("UPLOAD_FOLDER", "uploads")
-            return send_from_directory(upload_folder, filename, as_attachment=False)
-        except Exception as e:
-            app.logger.error(f"File download error: {e}")
-            abort(404)
+        upload_folder = current_app.config.get("UPLOAD_FOLDER", "uploads")
+
+        # Behind nginx: hand the transfer to the front end instead of
+        # streaming the file through this worker
+        if current_app.config.get("USE_XACCEL"):
+            path = safe_join(upload_folder, filename)
+            if path is None or not os.path.isfile(path):
+                abort(404)
+            resp = Response(mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream")
+            resp.headers["X-Accel-Redirect"] = current_app.config["XACCEL_UPLOADS_PREFIX"] + quote(filename)
+            resp.headers["Content-Disposition"] = f"inline; filename*=UTF-8''{quote(os.path.basename(filename))}"
+            return resp
+
+        return send_from_directory(upload_folder, filename, as_attachment=False)
 
 
 # ---------------------------
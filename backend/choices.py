@@ -0,0 +1,25 @@
+# ============================================================
+# SHARED TICKET VOCABULARY
+# ============================================================
+# Single definition of the ticket field values used by forms.py (dropdown
+# choices) and config.py. Immutable module-level tuples: built once at
+# import, so under `gunicorn --preload` every worker shares the parent's copy.
+
+TICKET_PRIORITIES = ("Low", "Medium", "High", "Critical")
+
+TICKET_TYPES = ("Hardware", "Software", "Network", "Access", "Other")
+
+TICKET_CATEGORIES = (
+    "Account Management",
+    "Hardware Support",
+    "Software Support",
+    "Network & Connectivity",
+    "Email",
+    "VPN",
+    "Other"
+)
+
+
+def as_choices(values):
+    """Turn a tuple of values into SelectField (value, label) pairs."""
+    return tuple((value, value) for value in values)
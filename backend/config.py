@@ -1,9 +1,21 @@
 import os
 from pathlib import Path
 
+from sqlalchemy.pool import StaticPool
+
+import choices
+
 BASE_DIR = Path(__file__).resolve().parent
 
 
+def driver_engine_options(uri):
+    """Engine options that only some DB drivers accept."""
+    if uri.startswith(("postgresql://", "postgresql+psycopg2://")):
+        # psycopg2: multi-row VALUES for INSERT, execute_batch for UPDATE/DELETE executemany
+        return {"executemany_mode": "values_plus_batch"}
+    return {}
+
+
 class Config:
     # ============================================================
     # CORE SETTINGS
@@ -16,12 +28,35 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool: size to match worker concurrency (threads / gevent connections)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_pre_ping": True,
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        # Rows per multi-row INSERT when executemany is rewritten (SQLAlchemy 2.x)
+        "insertmanyvalues_page_size": int(os.getenv("DB_INSERT_PAGE_SIZE", "1000")),
+        **driver_engine_options(SQLALCHEMY_DATABASE_URI),
+    }
+
     # File uploads
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", str(BASE_DIR / "uploads"))
-    ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf", "txt", "log", "docx", "doc", "zip", "xlsx"}
+    ALLOWED_EXTENSIONS = frozenset({"png", "jpg", "jpeg", "gif", "pdf", "txt", "log", "docx", "doc", "zip", "xlsx"})
 
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
 
+    # Serve uploads via nginx X-Accel-Redirect, e.g.
+    #   location /_protected_uploads/ { internal; alias /var/app/uploads/; }
+    # (Apache mod_xsendfile: set USE_X_SENDFILE instead, which Flask handles itself)
+    USE_XACCEL = os.getenv("USE_XACCEL", "False") == "True"
+    XACCEL_UPLOADS_PREFIX = os.getenv("XACCEL_UPLOADS_PREFIX", "/_protected_uploads/")
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "False") == "True"
+
+    # Compiled Jinja template cache. Unset: Jinja's own per-user temp dir
+    # (owner and mode checked); a path must be private to the app user;
+    # empty string disables it
+    JINJA_CACHE_DIR = os.getenv("JINJA_CACHE_DIR")
+
     # ============================================================
     # SLA SETTINGS
     # ============================================================
@@ -84,6 +119,26 @@ class Config:
     CELERY_ACCEPT_CONTENT = ["json"]
     CELERY_TIMEZONE = "UTC"
 
+    # How emails leave the web process: "thread" (default) or "celery" (send_email_task)
+    EMAIL_DELIVERY = os.getenv("EMAIL_DELIVERY", "thread")
+
+    # TTL for cached notification count/list responses in Redis (0 disables)
+    NOTIFY_CACHE_SECONDS = int(os.getenv("NOTIFY_CACHE_SECONDS", "30"))
+
+    # Worker threads used to build and send notification emails off the request
+    NOTIFY_MAX_WORKERS = int(os.getenv("NOTIFY_MAX_WORKERS", "4"))
+
+    # Concurrent SMTP sends from the web process (EMAIL_DELIVERY="thread")
+    MAIL_MAX_WORKERS = int(os.getenv("MAIL_MAX_WORKERS", "8"))
+
+    # Identical "ticket updated" emails to the same person within this
+    # window are sent once (0 disables)
+    UPDATE_EMAIL_DEDUP_SECONDS = int(os.getenv("UPDATE_EMAIL_DEDUP_SECONDS", "60"))
+
+    # Update/assignment emails per user per minute; the rest are held for
+    # the send_notification_digests task (needs Redis; 0 disables)
+    NOTIFY_RATE_PER_MINUTE = int(os.getenv("NOTIFY_RATE_PER_MINUTE", "10"))
+
     # ============================================================
     # PROJECT BRANDING & GENERAL
     # ============================================================
@@ -122,34 +177,40 @@ class Config:
     REQUIRE_PASSWORD_NUMBERS = os.getenv("REQUIRE_PASSWORD_NUMBERS", "True") == "True"
     REQUIRE_PASSWORD_SPECIAL = os.getenv("REQUIRE_PASSWORD_SPECIAL", "False") == "True"
 
+    # Werkzeug hash method for new passwords. scrypt verifies in about half
+    # the time of the pbkdf2:sha256:600000 default; older hashes still verify
+    # and are rehashed on the user's next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+
     # ============================================================
     # PAGINATION & DEFAULTS
     # ============================================================
     # Items per page for list views
     ITEMS_PER_PAGE = int(os.getenv("ITEMS_PER_PAGE", "20"))
 
-    # Default ticket priority
-    DEFAULT_TICKET_PRIORITY = os.getenv("DEFAULT_TICKET_PRIORITY", "Medium")
+    # How long load_user may serve a cached user before re-reading it (seconds)
+    USER_CACHE_SECONDS = int(os.getenv("USER_CACHE_SECONDS", "30"))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
 
-    # Allowed ticket statuses
-    TICKET_STATUSES = ["Open", "In Progress", "Pending", "On Hold", "Closed", "Resolved"]
+    # How long assignee dropdown lists are cached (seconds)
+    STAFF_CACHE_SECONDS = int(os.getenv("STAFF_CACHE_SECONDS", "60"))
 
-    # Allowed ticket types
-    TICKET_TYPES = ["Hardware", "Software", "Network", "Access", "Other"]
+    # How long the SLA tasks' admin recipient list is cached in Redis (seconds)
+    ADMIN_EMAILS_CACHE_SECONDS = int(os.getenv("ADMIN_EMAILS_CACHE_SECONDS", "300"))
 
-    # Allowed ticket priorities
-    TICKET_PRIORITIES = ["Low", "Medium", "High", "Critical"]
+    # How long admin_check_new may serve the cached newest-ticket id (seconds)
+    CHECK_NEW_CACHE_SECONDS = int(os.getenv("CHECK_NEW_CACHE_SECONDS", "5"))
 
-    # Allowed ticket categories
-    TICKET_CATEGORIES = [
-        "Account Management",
-        "Hardware Support",
-        "Software Support",
-        "Network & Connectivity",
-        "Email",
-        "VPN",
-        "Other"
-    ]
+    # Default ticket priority
+    DEFAULT_TICKET_PRIORITY = os.getenv("DEFAULT_TICKET_PRIORITY", "Medium")
+
+    # Allowed ticket statuses (tuples: ordered for dropdowns, immutable at runtime)
+    TICKET_STATUSES = ("Open", "In Progress", "Pending", "On Hold", "Closed", "Resolved")
+
+    # Allowed ticket types / priorities / categories (shared with forms.py)
+    TICKET_TYPES = choices.TICKET_TYPES
+    TICKET_PRIORITIES = choices.TICKET_PRIORITIES
+    TICKET_CATEGORIES = choices.TICKET_CATEGORIES
 
     # ============================================================
     # ENVIRONMENT-SPECIFIC CONFIGS
@@ -181,6 +242,11 @@ class TestingConfig(Config):
     DEBUG = False
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    # One shared connection so every session sees the same in-memory database
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "poolclass": StaticPool,
+        "connect_args": {"check_same_thread": False},
+    }
     WTF_CSRF_ENABLED = False
     DEBUG_EMAIL_OUTPUT = True
     SESSION_COOKIE_SECURE = False
@@ -195,12 +261,18 @@ class ProductionConfig(Config):
     SQLALCHEMY_ECHO = False
     LOG_LEVEL = "WARNING"
 
+    # Larger pool for multi-worker deployments (still overridable via env)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **Config.SQLALCHEMY_ENGINE_OPTIONS,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "25")),
+    }
+
     # In production, all these MUST be set via environment variables
     def __init__(self):
         super().__init__()
         
         # Validate critical production settings
-        required_vars = ["SECRET_KEY", "MAIL_USERNAME", "MAIL_PASSWORD", "ADMIN_EMAIL"]
+        required_vars = ("SECRET_KEY", "MAIL_USERNAME", "MAIL_PASSWORD", "ADMIN_EMAIL")
         missing = [var for var in required_vars if not os.getenv(var)]
         
         if missing:
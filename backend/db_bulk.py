@@ -0,0 +1,145 @@
+import csv
+import io
+from contextlib import contextmanager
+
+from sqlalchemy import insert
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from models import db
+
+
+def bulk_insert(model, rows, chunk=1000, commit=True):
+    """
+    Insert many rows for a model in batched executemany statements.
+
+    Skips the per-object unit of work that session.add() goes through, so
+    use it for imports, backfills and multi-row history writes where the
+    inserted objects are not needed afterwards.
+
+    Args:
+        model: Mapped model class (e.g. TicketHistory)
+        rows (list): Dicts keyed by mapped attribute name
+        chunk (int): Rows sent per statement
+        commit (bool): Commit after the last batch; pass False to keep the
+            rows in the caller's transaction
+
+    Returns:
+        int: Number of rows inserted
+    """
+    if not rows:
+        return 0
+
+    stmt = insert(model)
+    for i in range(0, len(rows), chunk):
+        db.session.execute(stmt, rows[i:i + chunk])
+
+    if commit:
+        db.session.commit()
+    return len(rows)
+
+
+def copy_rows(model, columns, rows, chunk=50000, commit=True):
+    """
+    Load rows with PostgreSQL COPY ... FROM STDIN, streamed in CSV chunks.
+
+    Much faster than INSERT for very large loads (seed/load-test data),
+    since the server parses no SQL per row. Needs psycopg2; on any other
+    database/driver the rows go through bulk_insert() instead. Column
+    defaults and ORM events are not applied, so pass every NOT NULL column.
+
+    Args:
+        model: Mapped model class (e.g. Ticket)
+        columns (list): Column names, in the order each row provides them
+        rows (iterable): Dicts keyed by column name; may be a generator
+        chunk (int): Rows buffered per COPY statement
+        commit (bool): Commit after the last chunk
+
+    Returns:
+        int: Number of rows loaded
+    """
+    if db.engine.dialect.driver != "psycopg2":
+        batch, total = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                total += bulk_insert(model, batch, commit=False)
+                batch = []
+        total += bulk_insert(model, batch, commit=False)
+        if commit:
+            db.session.commit()
+        return total
+
+    preparer = db.engine.dialect.identifier_preparer
+    sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+        preparer.format_table(model.__table__),
+        ", ".join(preparer.quote(c) for c in columns),
+    )
+
+    # Raw DBAPI connection of the session's transaction, so the load
+    # commits or rolls back together with everything else in it
+    cursor = db.session.connection().connection.cursor()
+    total = 0
+    try:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        pending = 0
+        for row in rows:
+            # None -> empty unquoted field, which COPY reads as NULL
+            writer.writerow([row[c] for c in columns])
+            pending += 1
+            if pending >= chunk:
+                buf.seek(0)
+                cursor.copy_expert(sql, buf)
+                total += pending
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                pending = 0
+        if pending:
+            buf.seek(0)
+            cursor.copy_expert(sql, buf)
+            total += pending
+    finally:
+        cursor.close()
+
+    if commit:
+        db.session.commit()
+    return total
+
+
+@contextmanager
+def indexes_deferred(model):
+    """
+    Drop a table's non-unique secondary indexes around a bulk load.
+
+    Loading into a bare table and building each index once afterwards is
+    cheaper than maintaining every index row by row. Unique indexes stay
+    in place so duplicates are still rejected. The drop, the load and the
+    rebuild run on the session's connection, so leave the load uncommitted
+    inside the block and commit after it.
+
+    If the load raises, the session is rolled back and the indexes are
+    rebuilt (and committed) before the error propagates: SQLite and MySQL
+    commit DDL immediately, so the drop would otherwise outlive the load.
+
+    Args:
+        model: Mapped model class (e.g. Ticket)
+    """
+    conn = db.session.connection()
+    indexes = [idx for idx in model.__table__.indexes if not idx.unique]
+    # IF [NOT] EXISTS rather than checkfirst: SQLite reflection doesn't see
+    # expression indexes such as lower(email)
+    for idx in indexes:
+        conn.execute(DropIndex(idx, if_exists=True))
+
+    try:
+        yield
+    except BaseException:
+        db.session.rollback()
+        conn = db.session.connection()
+        for idx in indexes:
+            conn.execute(CreateIndex(idx, if_not_exists=True))
+        db.session.commit()
+        raise
+
+    for idx in indexes:
+        conn.execute(CreateIndex(idx, if_not_exists=True))
@@ -3,6 +3,8 @@ import sys
 from datetime import datetime, timedelta
 from app import create_app
 from models import db, User, Ticket, Comment, Attachment, TicketHistory, EmailLog
+from db_bulk import bulk_insert, copy_rows, indexes_deferred
+from sqlalchemy import inspect, text
 from werkzeug.security import generate_password_hash
 
 
@@ -18,16 +20,23 @@ def reset_database():
         print("DATABASE RESET")
         print("="*60)
         
-        # Confirm destructive action
+        # Confirm destructive action: prompt on a terminal, otherwise
+        # (CI, containers) require FORCE_RESET instead of waiting on stdin
         if not os.getenv("FORCE_RESET"):
+            if not sys.stdin.isatty():
+                print("❌ Reset cancelled: not interactive. Set FORCE_RESET=1 to reset without a prompt.")
+                return
             response = input("\n⚠️  This will DELETE ALL DATA. Continue? (yes/no): ").strip().lower()
             if response != "yes":
                 print("❌ Reset cancelled.")
                 return
 
-        db.drop_all()
-        db.create_all()
-        print("✓ Database tables dropped and recreated")
+        if truncate_all_tables():
+            print("✓ Database tables truncated")
+        else:
+            db.drop_all()
+            db.create_all()
+            print("✓ Database tables dropped and recreated")
 
         # Create default admin
         create_default_admin(app)
@@ -35,12 +44,35 @@ def reset_database():
         print("="*60 + "\n")
 
 
+def truncate_all_tables():
+    """
+    Empty every table with one TRUNCATE ... RESTART IDENTITY CASCADE.
+    PostgreSQL only, and only when the whole schema already exists; set
+    RESET_SCHEMA=1 to force drop/create (e.g. after model changes).
+
+    Returns:
+        bool: True if the tables were truncated
+    """
+    if db.engine.dialect.name != "postgresql" or os.getenv("RESET_SCHEMA"):
+        return False
+
+    tables = db.metadata.sorted_tables
+    existing = set(inspect(db.engine).get_table_names())
+    if not all(t.name in existing for t in tables):
+        return False
+
+    names = ", ".join(db.engine.dialect.identifier_preparer.format_table(t) for t in tables)
+    db.session.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+    db.session.commit()
+    return True
+
+
 def create_default_admin(app):
     """
     Create default admin user if none exists.
     """
     with app.app_context():
-        if User.query.filter_by(role="admin").first():
+        if db.session.query(User.query.filter_by(role="admin").exists()).scalar():
             print("✓ Admin user already exists (skipping)")
             return
 
@@ -74,7 +106,7 @@ def create_sample_data(app):
         print("="*60)
 
         # Check if data already exists
-        if User.query.filter_by(role="user").first():
+        if db.session.query(User.query.filter_by(role="user").exists()).scalar():
             print("✓ Sample data already exists (skipping)")
             return
 
@@ -112,14 +144,20 @@ def create_sample_data(app):
             },
         ]
 
-        users = []
+        # One hash shared by every sample user instead of one per row
+        password_hash = User.hash_password("Test@1234")
         for user_data in users_data:
-            user = User(**user_data)
-            user.set_password("Test@1234")
-            db.session.add(user)
-            users.append(user)
+            user_data["password_hash"] = password_hash
 
-        db.session.commit()
+        bulk_insert(User, users_data, commit=False)
+
+        # Ids in users_data order (looked up by email; portable to MySQL, which has no RETURNING)
+        id_by_email = dict(
+            db.session.query(User.email, User.id)
+            .filter(User.email.in_([u["email"] for u in users_data]))
+        )
+        users = [id_by_email[u["email"]] for u in users_data]
+        names = {id_by_email[u["email"]]: u["name"] for u in users_data}
         print(f"✓ Created {len(users)} sample users")
 
         # Create sample tickets
@@ -130,8 +168,8 @@ def create_sample_data(app):
                 "priority": "High",
                 "description": "Laptop screen is flickering and displaying artifacts. Need immediate replacement.",
                 "status": "Open",
-                "user_id": users[0].id,
-                "assignee_id": users[2].id,
+                "user_id": users[0],
+                "assignee_id": users[2],
                 "sla_hours": 24,
             },
             {
@@ -140,8 +178,8 @@ def create_sample_data(app):
                 "priority": "Medium",
                 "description": "Microsoft Office license activation issue. Error code 0x80070005.",
                 "status": "In Progress",
-                "user_id": users[1].id,
-                "assignee_id": users[3].id,
+                "user_id": users[1],
+                "assignee_id": users[3],
                 "sla_hours": 48,
             },
             {
@@ -150,8 +188,8 @@ def create_sample_data(app):
                 "priority": "Critical",
                 "description": "Locked out of corporate email account. Cannot access important messages.",
                 "status": "Open",
-                "user_id": users[0].id,
-                "assignee_id": users[4].id,
+                "user_id": users[0],
+                "assignee_id": users[4],
                 "sla_hours": 4,
             },
             {
@@ -160,8 +198,8 @@ def create_sample_data(app):
                 "priority": "Medium",
                 "description": "VPN connection drops frequently during video calls.",
                 "status": "Pending",
-                "user_id": users[1].id,
-                "assignee_id": users[2].id,
+                "user_id": users[1],
+                "assignee_id": users[2],
                 "sla_hours": 48,
             },
             {
@@ -170,87 +208,92 @@ def create_sample_data(app):
                 "priority": "Low",
                 "description": "Request for additional monitor for dual-display setup.",
                 "status": "On Hold",
-                "user_id": users[0].id,
+                "user_id": users[0],
                 "assignee_id": None,
                 "sla_hours": 72,
             },
         ]
 
-        tickets = []
         now = datetime.utcnow()
+        yyyymm = now.strftime('%Y%m')
         
         for idx, ticket_data in enumerate(tickets_data):
-            ticket = Ticket(**ticket_data)
             # Calculate due date based on SLA hours
-            ticket.due_date = datetime.utcnow() + timedelta(hours=ticket.sla_hours)
-            # Manually set ticket number to avoid auto-generation
+            ticket_data["due_date"] = now + timedelta(hours=ticket_data["sla_hours"])
+            # Manually set ticket number (bulk inserts skip the before_insert hook)
             seq = idx + 1
-            ticket.ticket_no = f"IT-{now.strftime('%Y%m')}-{seq:04d}"
-            db.session.add(ticket)
-            tickets.append(ticket)
+            ticket_data["ticket_no"] = f"IT-{yyyymm}-{seq:04d}"
 
-        db.session.commit()
+        bulk_insert(Ticket, tickets_data, commit=False)
+
+        id_by_no = dict(
+            db.session.query(Ticket.ticket_no, Ticket.id)
+            .filter(Ticket.ticket_no.in_([t["ticket_no"] for t in tickets_data]))
+        )
+        tickets = [id_by_no[t["ticket_no"]] for t in tickets_data]
         print(f"✓ Created {len(tickets)} sample tickets")
 
         # Add some comments to tickets
         if len(tickets) > 0:
             comments = [
                 {
-                    "ticket_id": tickets[0].id,
-                    "user_id": users[2].id,
+                    "ticket_id": tickets[0],
+                    "user_id": users[2],
                     "message": "I've ordered a replacement display. Should arrive within 2 business days.",
                     "is_internal": False,
                 },
                 {
-                    "ticket_id": tickets[0].id,
-                    "user_id": users[0].id,
+                    "ticket_id": tickets[0],
+                    "user_id": users[0],
                     "message": "Thank you! How will I use my laptop in the meantime?",
                     "is_internal": False,
                 },
                 {
-                    "ticket_id": tickets[1].id,
-                    "user_id": users[3].id,
+                    "ticket_id": tickets[1],
+                    "user_id": users[3],
                     "message": "Checking license server. Will provide update shortly.",
                     "is_internal": True,
                 },
                 {
-                    "ticket_id": tickets[2].id,
-                    "user_id": users[4].id,
+                    "ticket_id": tickets[2],
+                    "user_id": users[4],
                     "message": "Password reset link has been sent to your recovery email.",
                     "is_internal": False,
                 },
             ]
 
-            for comment_data in comments:
-                comment = Comment(**comment_data)
-                db.session.add(comment)
-
-            db.session.commit()
+            bulk_insert(Comment, comments, commit=False)
             print(f"✓ Created {len(comments)} sample comments")
 
         # Add history entries
-        for ticket in tickets:
-            history_entry = TicketHistory(
-                ticket_id=ticket.id,
-                event=f"Ticket created",
+        seeded = list(zip(tickets, tickets_data))
+        history_rows = [
+            dict(
+                ticket_id=ticket_id,
+                event="Ticket created",
                 event_type="created",
-                user_id=ticket.user_id,
+                user_id=ticket["user_id"],
+            )
+            for ticket_id, ticket in seeded
+        ]
+        history_rows += [
+            dict(
+                ticket_id=ticket_id,
+                event=f"Assigned to {names[ticket['assignee_id']]}",
+                event_type="assigned",
+                user_id=None,
+                new_value=str(ticket["assignee_id"]),
             )
-            db.session.add(history_entry)
-
-            if ticket.assignee_id:
-                assign_entry = TicketHistory(
-                    ticket_id=ticket.id,
-                    event=f"Assigned to {ticket.assignee.name}",
-                    event_type="assigned",
-                    user_id=None,
-                    new_value=str(ticket.assignee_id),
-                )
-                db.session.add(assign_entry)
+            for ticket_id, ticket in seeded
+            if ticket["assignee_id"]
+        ]
 
-        db.session.commit()
+        bulk_insert(TicketHistory, history_rows, commit=False)
         print(f"✓ Created history entries for {len(tickets)} tickets")
 
+        # Everything above lands in one transaction
+        db.session.commit()
+
         print("="*60 + "\n")
         print("Sample data creation complete!")
         print("\nDefault Test Credentials:")
@@ -259,10 +302,67 @@ def create_sample_data(app):
         print("  Admin: admin@portal.com / Admin@123")
 
 
+LOAD_TEST_COLUMNS = (
+    "ticket_no", "user_id", "ticket_type", "category", "priority", "description",
+    "status", "assignee_id", "created_at", "updated_at", "due_date", "sla_hours",
+)
+
+
+def create_load_test_data(app, count):
+    """
+    Bulk-load synthetic tickets for load and query-plan testing.
+    Uses COPY on PostgreSQL (see db_bulk.copy_rows), batched INSERTs elsewhere.
+
+    Args:
+        app: Flask application
+        count (int): Number of tickets to create
+    """
+    with app.app_context():
+        user_ids = [uid for (uid,) in db.session.query(User.id).filter_by(role="user")]
+        staff_ids = [
+            uid for (uid,) in db.session.query(User.id).filter(User.role.in_(("engineer", "assignee")))
+        ]
+        if not user_ids:
+            print("❌ No users to own tickets; run 'seed' first")
+            return
+
+        statuses = ("Open", "In Progress", "Pending", "On Hold", "Closed", "Resolved")
+        priorities = ("Low", "Medium", "High", "Critical")
+        types = ("Hardware", "Software", "Network", "Access", "Other")
+        categories = ("Hardware Support", "Software Support", "Network & Connectivity", "Email", "VPN", "Other")
+        now = datetime.utcnow()
+
+        def rows():
+            # Own "LT-" prefix so ticket counters for real IT-YYYYMM numbers are unaffected
+            for n in range(count):
+                created = now - timedelta(minutes=n)
+                sla = (4, 24, 48, 72)[n % 4]
+                yield {
+                    "ticket_no": f"LT-{n + 1:08d}",
+                    "user_id": user_ids[n % len(user_ids)],
+                    "ticket_type": types[n % len(types)],
+                    "category": categories[n % len(categories)],
+                    "priority": priorities[n % len(priorities)],
+                    "description": f"Load test ticket {n + 1}",
+                    "status": statuses[n % len(statuses)],
+                    "assignee_id": staff_ids[n % len(staff_ids)] if staff_ids else None,
+                    "created_at": created,
+                    "updated_at": created,
+                    "due_date": created + timedelta(hours=sla),
+                    "sla_hours": sla,
+                }
+
+        # Build the secondary indexes once after the load, not row by row
+        with indexes_deferred(Ticket):
+            loaded = copy_rows(Ticket, LOAD_TEST_COLUMNS, rows(), commit=False)
+        db.session.commit()
+        print(f"✓ Loaded {loaded} load-test tickets")
+
+
 def init_app_db(app=None):
     """
     Initialize application database.
-    Creates tables if they don't exist.
+    Creates tables if they don't exist, plus the default admin.
     """
     if app is None:
         app = create_app()
@@ -271,6 +371,8 @@ def init_app_db(app=None):
         db.create_all()
         print("✓ Database tables created/verified")
 
+    create_default_admin(app)
+
 
 def seed_ticket_categories(app=None):
     """
@@ -293,16 +395,25 @@ def main():
     print("="*60 + "\n")
 
     if len(sys.argv) < 2:
-        print("Usage: python db_init.py <command>")
+        print("Usage: python db_init.py <command> [--large-seed N]")
         print("\nAvailable commands:")
         print("  init       - Initialize database (create tables)")
         print("  reset      - Reset database (DROP ALL DATA)")
         print("  seed       - Create sample data for testing")
         print("  fresh      - Reset + create sample data (full restart)")
+        print("\nOptions (seed/fresh):")
+        print("  --large-seed N  - Also bulk-load N synthetic tickets (COPY on PostgreSQL)")
         print("\nExample: python db_init.py fresh")
         return
 
     command = sys.argv[1].lower()
+    large_seed = 0
+    if "--large-seed" in sys.argv:
+        try:
+            large_seed = int(sys.argv[sys.argv.index("--large-seed") + 1])
+        except (IndexError, ValueError):
+            print("❌ --large-seed needs a ticket count, e.g. --large-seed 100000")
+            return
     app = create_app()
 
     if command == "init":
@@ -315,10 +426,14 @@ def main():
     elif command == "seed":
         init_app_db(app)
         create_sample_data(app)
+        if large_seed:
+            create_load_test_data(app, large_seed)
 
     elif command == "fresh":
         reset_database()
         create_sample_data(app)
+        if large_seed:
+            create_load_test_data(app, large_seed)
 
     else:
         print(f"❌ Unknown command: {command}")
@@ -1,3 +1,4 @@
+from flask import g
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileAllowed
 from wtforms import (
@@ -20,63 +21,47 @@ from wtforms.validators import (
     Regexp,
     NumberRange
 )
-from models import User
+from models import db, User
+from choices import TICKET_PRIORITIES, TICKET_TYPES as TICKET_TYPE_VALUES, TICKET_CATEGORIES, as_choices
 
 
 # ============================================================
 # FORM CHOICES (from config or hardcoded)
 # ============================================================
-PRIORITY_CHOICES = [
-    ("Low", "Low"),
-    ("Medium", "Medium"),
-    ("High", "High"),
-    ("Critical", "Critical")
-]
-
-TICKET_TYPES = [
-    ("Hardware", "Hardware"),
-    ("Software", "Software"),
-    ("Network", "Network"),
-    ("Access", "Access"),
-    ("Other", "Other")
-]
-
-CATEGORY_CHOICES = [
-    ("Account Management", "Account Management"),
-    ("Hardware Support", "Hardware Support"),
-    ("Software Support", "Software Support"),
-    ("Network & Connectivity", "Network & Connectivity"),
-    ("Email", "Email"),
-    ("VPN", "VPN"),
-    ("Other", "Other")
-]
+# Tuples: SelectField copies its choices per form instance, and copying a
+# tuple just returns the same object
+PRIORITY_CHOICES = as_choices(TICKET_PRIORITIES)
+
+TICKET_TYPES = as_choices(TICKET_TYPE_VALUES)
+
+CATEGORY_CHOICES = as_choices(TICKET_CATEGORIES)
 
 # ======= USER STATUS (Limited for regular users) =======
-TICKET_STATUS_CHOICES_USER = [
-    ("Not Open Yet", "Not Open Yet")
-]
+TICKET_STATUS_CHOICES_USER = (
+    ("Not Open Yet", "Not Open Yet"),
+)
 
 # ======= ADMIN STATUS (Full options for admins) =======
-TICKET_STATUS_CHOICES_ADMIN = [
+TICKET_STATUS_CHOICES_ADMIN = (
     ("Not Open Yet", "Not Open Yet"),
     ("Open", "Open"),
     ("In Progress", "In Progress"),
     ("Re-Open", "Re-Open"),
     ("Closed", "Closed"),
     ("Resolved", "Resolved")
-]
+)
 
 # For backward compatibility
 TICKET_STATUS_CHOICES = TICKET_STATUS_CHOICES_ADMIN
 
-ROLE_CHOICES = [
+ROLE_CHOICES = (
     ("user", "Regular User"),
     ("engineer", "Engineer"),
     ("assignee", "Ticket Assignee"),
     ("admin", "Administrator")
-]
+)
 
-DEPARTMENT_CHOICES = [
+DEPARTMENT_CHOICES = (
     ("IT", "IT"),
     ("Sales", "Sales"),
     ("Marketing", "Marketing"),
@@ -84,18 +69,21 @@ DEPARTMENT_CHOICES = [
     ("HR", "HR"),
     ("Operations", "Operations"),
     ("Other", "Other")
-]
+)
 
-THEME_CHOICES = [
+THEME_CHOICES = (
     ("light", "Light"),
     ("dark", "Dark"),
     ("system", "System Default")
-]
+)
 
 
 # ============================================================
 # VALIDATORS (Custom)
 # ============================================================
+SPECIAL_CHARS = frozenset("!@#$%^&*")
+
+
 class PasswordValidator:
     """
     Validate password strength based on config requirements.
@@ -112,30 +100,41 @@ class PasswordValidator:
         if len(password) < self.min_length:
             raise ValidationError(f"Password must be at least {self.min_length} characters long.")
         
-        if self.require_upper and not any(c.isupper() for c in password):
+        # Each check runs in C (no per-character Python generator)
+        if self.require_upper and not any(map(str.isupper, password)):
             raise ValidationError("Password must contain at least one uppercase letter.")
         
-        if self.require_numbers and not any(c.isdigit() for c in password):
+        if self.require_numbers and not any(map(str.isdigit, password)):
             raise ValidationError("Password must contain at least one number.")
         
-        if self.require_special and not any(c in "!@#$%^&*" for c in password):
+        if self.require_special and SPECIAL_CHARS.isdisjoint(password):
             raise ValidationError("Password must contain at least one special character (!@#$%^&*).")
 
 
+def email_registered(email):
+    """Whether a user has this email, ignoring case; answered once per request."""
+    key = (email or "").lower()
+    cache = g.setdefault("_email_registered", {})
+    if key not in cache:
+        cache[key] = db.session.query(
+            User.query.filter(db.func.lower(User.email) == key).exists()
+        ).scalar()
+    return cache[key]
+
+
 def email_exists(form, field):
     """Validate that email is not already registered."""
-    user = User.query.filter_by(email=field.data).first()
-    if user:
+    if email_registered(field.data):
         raise ValidationError("Email already registered. Please login or use a different email.")
 
 
 def email_unique(form, field, exclude_user_id=None):
     """Validate email uniqueness with optional exclusion."""
-    query = User.query.filter_by(email=field.data)
+    query = User.query.filter(db.func.lower(User.email) == (field.data or "").lower())
     if exclude_user_id:
         query = query.filter(User.id != exclude_user_id)
     
-    if query.first():
+    if db.session.query(query.exists()).scalar():
         raise ValidationError("This email is already in use.")
 
 
@@ -243,19 +242,10 @@ class ChangePasswordForm(FlaskForm):
 
 
 # ============================================================
-# TICKET FORMS - USER VERSION (Limited Status)
+# SHARED TICKET FIELDS
 # ============================================================
-class TicketForm(FlaskForm):
-    """Create ticket form for REGULAR USERS - Status limited to 'Not Open Yet' only."""
-
-    # ✅ USER VERSION: Limited to "Not Open Yet" ONLY
-    status = SelectField(
-        "Status",
-        choices=TICKET_STATUS_CHOICES_USER,
-        default="Not Open Yet",
-        validators=[InputRequired(message="Status is required")],
-        render_kw={"class": "form-select"}
-    )
+class _TicketFieldsMixin:
+    """Fields common to the ticket creation forms; subclasses add `status`."""
 
     ticket_type = SelectField(
         "Ticket Type",
@@ -299,7 +289,23 @@ class TicketForm(FlaskForm):
         ],
         render_kw={"class": "form-control", "accept": ".pdf,.doc,.docx,.txt,.png,.jpg,.jpeg,.gif,.zip"}
     )
-    
+
+
+# ============================================================
+# TICKET FORMS - USER VERSION (Limited Status)
+# ============================================================
+class TicketForm(_TicketFieldsMixin, FlaskForm):
+    """Create ticket form for REGULAR USERS - Status limited to 'Not Open Yet' only."""
+
+    # ✅ USER VERSION: Limited to "Not Open Yet" ONLY
+    status = SelectField(
+        "Status",
+        choices=TICKET_STATUS_CHOICES_USER,
+        default="Not Open Yet",
+        validators=[InputRequired(message="Status is required")],
+        render_kw={"class": "form-select"}
+    )
+
     submit = SubmitField("Create Ticket", render_kw={"class": "btn btn-primary"})
 
 
@@ -355,7 +361,7 @@ class TicketEditForm(FlaskForm):
 # ============================================================
 # ADMIN TICKET CREATION FORM (if admins can create tickets)
 # ============================================================
-class AdminCreateTicketForm(FlaskForm):
+class AdminCreateTicketForm(_TicketFieldsMixin, FlaskForm):
     """Create ticket form for ADMINS - with full status options."""
     
     # ✅ Admin can set any status when creating
@@ -367,49 +373,6 @@ class AdminCreateTicketForm(FlaskForm):
         render_kw={"class": "form-select"}
     )
 
-    ticket_type = SelectField(
-        "Ticket Type",
-        choices=TICKET_TYPES,
-        validators=[InputRequired(message="Ticket type is required")],
-        render_kw={"class": "form-select"}
-    )
-    
-    category = SelectField(
-        "Category",
-        choices=CATEGORY_CHOICES,
-        validators=[InputRequired(message="Category is required")],
-        render_kw={"class": "form-select"}
-    )
-    
-    priority = SelectField(
-        "Priority",
-        choices=PRIORITY_CHOICES,
-        default="Medium",
-        validators=[InputRequired(message="Priority is required")],
-        render_kw={"class": "form-select"}
-    )
-    
-    description = TextAreaField(
-        "Description",
-        validators=[
-            InputRequired(message="Description is required"),
-            Length(min=10, max=5000, message="Description must be 10-5000 characters")
-        ],
-        render_kw={"class": "form-control", "rows": 6, "placeholder": "Describe the issue..."}
-    )
-    
-    attachment = FileField(
-        "Attachment (optional)",
-        validators=[
-            Optional(),
-            FileAllowed(
-                ["pdf", "doc", "docx", "txt", "png", "jpg", "jpeg", "gif", "zip"],
-                message="File type not allowed. Max 16MB."
-            )
-        ],
-        render_kw={"class": "form-control", "accept": ".pdf,.doc,.docx,.txt,.png,.jpg,.jpeg,.gif,.zip"}
-    )
-    
     submit = SubmitField("Create Ticket", render_kw={"class": "btn btn-primary"})
 
 
@@ -608,21 +571,21 @@ class TicketSearchForm(FlaskForm):
     
     status = SelectField(
         "Status",
-        choices=[("", "All Statuses")] + TICKET_STATUS_CHOICES_ADMIN,
+        choices=(("", "All Statuses"),) + TICKET_STATUS_CHOICES_ADMIN,
         validators=[Optional()],
         render_kw={"class": "form-select"}
     )
     
     priority = SelectField(
         "Priority",
-        choices=[("", "All Priorities")] + PRIORITY_CHOICES,
+        choices=(("", "All Priorities"),) + PRIORITY_CHOICES,
         validators=[Optional()],
         render_kw={"class": "form-select"}
     )
     
     category = SelectField(
         "Category",
-        choices=[("", "All Categories")] + CATEGORY_CHOICES,
+        choices=(("", "All Categories"),) + CATEGORY_CHOICES,
         validators=[Optional()],
         render_kw={"class": "form-select"}
     )
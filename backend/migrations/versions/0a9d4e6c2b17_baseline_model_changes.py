@@ -0,0 +1,106 @@
+"""ticket_counters, lookup indexes and ON DELETE rules added to the models
+
+Revision ID: 0a9d4e6c2b17
+Revises: 
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a9d4e6c2b17'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# SQLite reports foreign keys without names; batch mode names them by this
+# convention so they can be dropped and recreated
+NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+# (table, column) -> (referred table, ON DELETE rule)
+FOREIGN_KEYS = {
+    ("tickets", "user_id"): ("users", "CASCADE"),
+    ("tickets", "assignee_id"): ("users", "SET NULL"),
+    ("attachments", "ticket_id"): ("tickets", "CASCADE"),
+    ("attachments", "uploaded_by"): ("users", "SET NULL"),
+    ("comments", "ticket_id"): ("tickets", "CASCADE"),
+    ("comments", "user_id"): ("users", "CASCADE"),
+    ("email_logs", "ticket_id"): ("tickets", "SET NULL"),
+    ("notification_reads", "ticket_id"): ("tickets", "CASCADE"),
+    ("notification_reads", "user_id"): ("users", "CASCADE"),
+    ("ticket_history", "ticket_id"): ("tickets", "CASCADE"),
+    ("ticket_history", "user_id"): ("users", "CASCADE"),
+}
+
+INDEXES = (
+    ("ix_tickets_status_due_date", "tickets", ["status", "due_date"]),
+    ("ix_tickets_user_updated", "tickets", ["user_id", "updated_at"]),
+    ("ix_users_email_lower", "users", [sa.text("lower(email)")]),
+)
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _set_ondelete(upgrade):
+    """Rebuild every listed foreign key whose ON DELETE rule differs."""
+    insp = _inspector()
+    tables = sorted({table for table, _ in FOREIGN_KEYS})
+    for table in tables:
+        if not insp.has_table(table):
+            continue
+        stale = []
+        for fk in insp.get_foreign_keys(table):
+            if len(fk["constrained_columns"]) != 1:
+                continue
+            column = fk["constrained_columns"][0]
+            if (table, column) not in FOREIGN_KEYS:
+                continue
+            referred, rule = FOREIGN_KEYS[(table, column)]
+            want = rule if upgrade else None
+            have = (fk.get("options") or {}).get("ondelete")
+            if (have or "").upper() != (want or ""):
+                stale.append((fk["name"], column, referred, want))
+        if not stale:
+            continue
+
+        with op.batch_alter_table(table, naming_convention=NAMING) as batch_op:
+            for name, column, referred, want in stale:
+                name = name or NAMING["fk"] % {
+                    "table_name": table, "column_0_name": column, "referred_table_name": referred,
+                }
+                batch_op.drop_constraint(name, type_="foreignkey")
+                batch_op.create_foreign_key(name, referred, [column], ["id"], ondelete=want)
+
+
+def upgrade():
+    # `flask init-db` on the current models already creates all of this;
+    # databases created from the original models get it here
+    if not _inspector().has_table("ticket_counters"):
+        op.create_table(
+            "ticket_counters",
+            sa.Column("prefix", sa.String(length=20), nullable=False),
+            sa.Column("last_value", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("prefix"),
+        )
+
+    # IF NOT EXISTS rather than an inspector check: SQLite reflection skips
+    # expression indexes such as lower(email)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+    _set_ondelete(upgrade=True)
+
+
+def downgrade():
+    _set_ondelete(upgrade=False)
+
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+
+    if _inspector().has_table("ticket_counters"):
+        op.drop_table("ticket_counters")
@@ -0,0 +1,33 @@
+"""drop tickets.aging (now computed on access)
+
+Revision ID: 3f2a9c1d7b4e
+Revises: 0a9d4e6c2b17
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b4e'
+down_revision = '0a9d4e6c2b17'
+branch_labels = None
+depends_on = None
+
+
+def _ticket_columns():
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("tickets")}
+
+
+def upgrade():
+    # Databases built by `flask init-db` after the column was removed never had it
+    if "aging" in _ticket_columns():
+        with op.batch_alter_table("tickets") as batch_op:
+            batch_op.drop_column("aging")
+
+
+def downgrade():
+    if "aging" not in _ticket_columns():
+        with op.batch_alter_table("tickets") as batch_op:
+            batch_op.add_column(sa.Column("aging", sa.Integer(), nullable=True))
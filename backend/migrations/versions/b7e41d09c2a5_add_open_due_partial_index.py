@@ -0,0 +1,37 @@
+"""add partial index tickets(due_date) for open tickets
+
+Revision ID: b7e41d09c2a5
+Revises: 3f2a9c1d7b4e
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e41d09c2a5'
+down_revision = '3f2a9c1d7b4e'
+branch_labels = None
+depends_on = None
+
+OPEN_STATUSES = ("Open", "In Progress", "Re-Open")
+
+
+def _ticket_indexes():
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("tickets")}
+
+
+def upgrade():
+    # `flask init-db` on the current models already creates it
+    if "ix_tickets_open_due" not in _ticket_indexes():
+        where = sa.column("status").in_(OPEN_STATUSES)
+        op.create_index(
+            "ix_tickets_open_due", "tickets", ["due_date"],
+            postgresql_where=where, sqlite_where=where,
+        )
+
+
+def downgrade():
+    if "ix_tickets_open_due" in _ticket_indexes():
+        op.drop_index("ix_tickets_open_due", table_name="tickets")
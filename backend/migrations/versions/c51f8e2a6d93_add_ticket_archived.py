@@ -0,0 +1,43 @@
+"""add tickets.archived and tickets(status, closed_at) index
+
+Revision ID: c51f8e2a6d93
+Revises: b7e41d09c2a5
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51f8e2a6d93'
+down_revision = 'b7e41d09c2a5'
+branch_labels = None
+depends_on = None
+
+
+def _ticket_columns():
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("tickets")}
+
+
+def _ticket_indexes():
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("tickets")}
+
+
+def upgrade():
+    # `flask init-db` on the current models already creates both
+    if "archived" not in _ticket_columns():
+        with op.batch_alter_table("tickets") as batch_op:
+            batch_op.add_column(sa.Column(
+                "archived", sa.Boolean(), server_default=sa.false(), nullable=False
+            ))
+    if "ix_tickets_status_closed_at" not in _ticket_indexes():
+        op.create_index("ix_tickets_status_closed_at", "tickets", ["status", "closed_at"])
+
+
+def downgrade():
+    if "ix_tickets_status_closed_at" in _ticket_indexes():
+        op.drop_index("ix_tickets_status_closed_at", table_name="tickets")
+    if "archived" in _ticket_columns():
+        with op.batch_alter_table("tickets") as batch_op:
+            batch_op.drop_column("archived")
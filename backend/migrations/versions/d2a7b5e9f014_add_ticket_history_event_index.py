@@ -0,0 +1,34 @@
+"""add ticket_history(ticket_id, event_type, created_at) index
+
+Revision ID: d2a7b5e9f014
+Revises: c51f8e2a6d93
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7b5e9f014'
+down_revision = 'c51f8e2a6d93'
+branch_labels = None
+depends_on = None
+
+
+def _history_indexes():
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("ticket_history")}
+
+
+def upgrade():
+    # `flask init-db` on the current models already creates it
+    if "ix_ticket_history_ticket_event_created" not in _history_indexes():
+        op.create_index(
+            "ix_ticket_history_ticket_event_created", "ticket_history",
+            ["ticket_id", "event_type", "created_at"],
+        )
+
+
+def downgrade():
+    if "ix_ticket_history_ticket_event_created" in _history_indexes():
+        op.drop_index("ix_ticket_history_ticket_event_created", table_name="ticket_history")
@@ -0,0 +1,44 @@
+"""add notification_logs
+
+Revision ID: e8c4f1a9b372
+Revises: d2a7b5e9f014
+Create Date: 2026-10-15 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c4f1a9b372'
+down_revision = 'd2a7b5e9f014'
+branch_labels = None
+depends_on = None
+
+
+def _has_table():
+    return sa.inspect(op.get_bind()).has_table("notification_logs")
+
+
+def upgrade():
+    # `flask init-db` on the current models already creates it
+    if _has_table():
+        return
+    op.create_table(
+        "notification_logs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("ticket_id", sa.Integer(), nullable=False),
+        sa.Column("event", sa.String(length=30), nullable=False),
+        sa.Column("digest", sa.String(length=32), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["ticket_id"], ["tickets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("ticket_id", "event", "digest", name="unique_ticket_event_digest"),
+    )
+    op.create_index("ix_notification_logs_created_at", "notification_logs", ["created_at"])
+
+
+def downgrade():
+    if _has_table():
+        op.drop_index("ix_notification_logs_created_at", table_name="notification_logs")
+        op.drop_table("notification_logs")
@@ -0,0 +1,44 @@
+"""add pending_notifications
+
+Revision ID: f3b9d2c6a471
+Revises: e8c4f1a9b372
+Create Date: 2026-10-15 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d2c6a471'
+down_revision = 'e8c4f1a9b372'
+branch_labels = None
+depends_on = None
+
+
+def _has_table():
+    return sa.inspect(op.get_bind()).has_table("pending_notifications")
+
+
+def upgrade():
+    # `flask init-db` on the current models already creates it
+    if _has_table():
+        return
+    op.create_table(
+        "pending_notifications",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("ticket_id", sa.Integer(), nullable=False),
+        sa.Column("update_text", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["ticket_id"], ["tickets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_pending_notifications_user_id", "pending_notifications", ["user_id"])
+
+
+def downgrade():
+    if _has_table():
+        op.drop_index("ix_pending_notifications_user_id", table_name="pending_notifications")
+        op.drop_table("pending_notifications")
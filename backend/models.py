@@ -1,13 +1,25 @@
+import sqlite3
 from datetime import datetime, timedelta  
+from flask import current_app, g, has_app_context, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.hybrid import hybrid_property
 
 db = SQLAlchemy()
 
 
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores FOREIGN KEY / ON DELETE clauses unless asked per connection."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 # ============================================================
 #  TICKET STATUS DEFINITIONS
 # ============================================================
@@ -21,6 +33,12 @@ TICKET_STATUSES = (
     "Closed",
 )
 
+# Statuses counted as open work by the query helpers below
+OPEN_STATUSES = ("Open", "In Progress", "Re-Open")
+
+# Statuses whose SLA clock is not running
+SLA_PAUSED_STATUSES = ("Closed", "Resolved", "Not Open Yet")
+
 STATUS_COLORS = {
     "Not Open Yet": "gray",
     "Open": "blue",
@@ -31,6 +49,33 @@ STATUS_COLORS = {
 }
 
 
+def now_utc():
+    """
+    Current UTC time, read once per request and reused for the rest of it.
+
+    Keeps every SLA / aging value on a page consistent and saves a clock
+    read per row; outside a request it is plain datetime.utcnow().
+    """
+    if not has_request_context():
+        return datetime.utcnow()
+    now = g.get("_now")
+    if now is None:
+        now = g._now = datetime.utcnow()
+    return now
+
+
+# Date format used by Ticket.to_dict() for display strings
+DISPLAY_DATE_FORMAT = "%b %d, %Y"
+
+
+def _display_date(value):
+    return value.strftime(DISPLAY_DATE_FORMAT) if value else "N/A"
+
+
+def _iso_date(value):
+    return value.isoformat() if value else None
+
+
 # ============================================================
 #  USER MODEL
 # ============================================================
@@ -58,28 +103,57 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Case-insensitive email lookups (registration / duplicate checks)
+        db.Index("ix_users_email_lower", db.func.lower(email)),
+    )
+
     # Relationships
     tickets_created = db.relationship(
         "Ticket", 
         foreign_keys="Ticket.user_id", 
-        backref="creator", 
-        lazy="dynamic"
+        back_populates="user", 
+        lazy="write_only",
+        passive_deletes=True,  # tickets.user_id is ON DELETE CASCADE
     )
     tickets_assigned = db.relationship(
         "Ticket", 
         foreign_keys="Ticket.assignee_id", 
-        backref="assigned_engineer", 
-        lazy="dynamic"
+        back_populates="assignee", 
+        lazy="write_only",
+        passive_deletes=True,  # tickets.assignee_id is ON DELETE SET NULL
     )
 
+    @staticmethod
+    def hash_method():
+        """
+        Werkzeug method for new password hashes: PASSWORD_HASH_METHOD
+        (scrypt by default), or a single pbkdf2 round when the app is
+        TESTING so fixtures and seeds stay fast.
+        """
+        if not has_app_context():
+            return "scrypt"
+        if current_app.config.get("TESTING"):
+            return "pbkdf2:sha256:1"
+        return current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+
+    @staticmethod
+    def hash_password(password):
+        """Hash a password with the configured method (see hash_method)."""
+        return generate_password_hash(password, method=User.hash_method())
+
     def set_password(self, password):
         """Hash and set user password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = self.hash_password(password)
 
     def check_password(self, password):
         """Verify user password."""
         return check_password_hash(self.password_hash, password)
 
+    def password_needs_rehash(self):
+        """Whether the stored hash predates the current hash method."""
+        return not self.password_hash.split("$", 1)[0].startswith(self.hash_method())
+
     def is_admin(self):
         """Check if user is admin."""
         return self.role == "admin"
@@ -90,17 +164,17 @@ class User(db.Model, UserMixin):
 
     def get_assigned_tickets(self, status=None):
         """Get tickets assigned to this user."""
-        query = self.tickets_assigned
+        stmt = self.tickets_assigned.select()
         if status:
-            query = query.filter_by(status=status)
-        return query.all()
+            stmt = stmt.where(Ticket.status == status)
+        return db.session.scalars(stmt).all()
 
     def get_created_tickets(self, status=None):
         """Get tickets created by this user."""
-        query = self.tickets_created
+        stmt = self.tickets_created.select()
         if status:
-            query = query.filter_by(status=status)
-        return query.all()
+            stmt = stmt.where(Ticket.status == status)
+        return db.session.scalars(stmt).all()
 
     def __repr__(self):
         return f"<User {self.email} ({self.role})>"
@@ -115,13 +189,30 @@ class Ticket(db.Model):
     Includes SLA tracking, status management, and assignment.
     """
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Dashboard / SLA scans filter on status then range over due_date
+        db.Index("ix_tickets_status_due_date", "status", "due_date"),
+        # User notification feed: WHERE user_id = ? AND updated_at >= ? ORDER BY updated_at
+        db.Index("ix_tickets_user_updated", "user_id", "updated_at"),
+        # archive_closed_tickets: WHERE status IN (closed) AND closed_at < cutoff
+        db.Index("ix_tickets_status_closed_at", "status", "closed_at"),
+        # Breach / at-risk scans (get_breached_tickets, get_at_risk_tickets):
+        # only open tickets are indexed, so closed history doesn't bloat it
+        db.Index(
+            "ix_tickets_open_due",
+            "due_date",
+            postgresql_where=db.column("status").in_(OPEN_STATUSES),
+            sqlite_where=db.column("status").in_(OPEN_STATUSES),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     ticket_no = db.Column(db.String(30), unique=True, nullable=False, index=True)
 
     # Ownership
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
-    user = db.relationship("User", foreign_keys=[user_id], overlaps="creator,tickets_created")
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Nearly every ticket list shows the creator, so batch-load it by default
+    user = db.relationship("User", foreign_keys=[user_id], back_populates="tickets_created", lazy="selectin")
 
     # Ticket details
     ticket_type = db.Column(db.String(100), nullable=False, index=True)
@@ -131,8 +222,8 @@ class Ticket(db.Model):
     status = db.Column(db.String(30), default="Open", nullable=False, index=True)
 
     # Assignment - supports both User objects and textual assignments
-    assignee_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
-    assignee = db.relationship("User", foreign_keys=[assignee_id], overlaps="assigned_engineer,tickets_assigned")
+    assignee_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    assignee = db.relationship("User", foreign_keys=[assignee_id], back_populates="tickets_assigned", lazy="selectin")
     
     # Optional: Store assignee name as text (for custom assignments like "In Queue", "Assigned", or custom names)
     assignee_name = db.Column(db.String(120), nullable=True)
@@ -147,28 +238,31 @@ class Ticket(db.Model):
     # SLA tracking
     sla_hours = db.Column(db.Integer, default=24, nullable=False)
 
-    # Aging (calculated field)
-    aging = db.Column(db.Integer, default=0)
+    # Set by the archive_closed_tickets task for long-closed tickets
+    archived = db.Column(db.Boolean, default=False, server_default=db.false(), nullable=False)
 
     # Relationships
     attachments = db.relationship(
         "Attachment", 
         backref="ticket", 
-        lazy="dynamic",
-        cascade="all, delete-orphan"
+        lazy="select",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     comments = db.relationship(
         "Comment", 
         backref="ticket", 
-        lazy="dynamic",
+        lazy="select",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         order_by="Comment.created_at.asc()"
     )
     history = db.relationship(
         "TicketHistory",
         backref="ticket",
-        lazy="dynamic",
+        lazy="select",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         order_by="TicketHistory.created_at.desc()"
     )
 
@@ -176,14 +270,21 @@ class Ticket(db.Model):
     # SLA COMPUTED PROPERTIES
     # ============================================================
     
+    @hybrid_property
+    def sla_tracked(self):
+        """Whether the SLA clock is running (has a deadline and isn't closed/pending)."""
+        return self.due_date is not None and self.status not in SLA_PAUSED_STATUSES
+
+    @sla_tracked.expression
+    def sla_tracked(cls):
+        return db.and_(cls.due_date.isnot(None), cls.status.notin_(SLA_PAUSED_STATUSES))
+
     @hybrid_property
     def sla_seconds_left(self):
         """Calculate seconds remaining until SLA deadline."""
-        if not self.due_date:
+        if not self.sla_tracked:
             return None
-        if self.status in ("Closed", "Resolved", "Not Open Yet"):
-            return None
-        delta = self.due_date - datetime.utcnow()
+        delta = self.due_date - now_utc()
         return int(delta.total_seconds())
 
     @hybrid_property
@@ -212,6 +313,21 @@ class Ticket(db.Model):
         else:
             return "Met"
 
+    @sla_state.expression
+    def sla_state(cls):
+        # "now" is bound when the query is built, like the Python side
+        now = now_utc()
+        return db.case(
+            (
+                cls.status.in_(("Closed", "Resolved")),
+                db.case((cls.closed_at > cls.due_date, "Breached"), else_="Met"),
+            ),
+            (db.not_(cls.sla_tracked), None),
+            (cls.due_date < now, "Breached"),
+            (cls.due_date <= now + timedelta(hours=6), "At Risk"),
+            else_="Met",
+        )
+
     @hybrid_property
     def sla_countdown_human(self):
         """Get human-readable SLA countdown."""
@@ -229,6 +345,43 @@ class Ticket(db.Model):
         minutes = (secs % 3600) // 60
         return f"{hours}h {minutes}m remaining"
 
+    @property
+    def aging(self):
+        """
+        Days the ticket has been open: creation to closure for closed /
+        resolved tickets, creation to today otherwise. Computed on access
+        rather than stored or set on every load.
+        """
+        if not self.created_at:
+            return 0
+        if self.status in ("Closed", "Resolved"):
+            if not self.closed_at:
+                return 0
+            return (self.closed_at.date() - self.created_at.date()).days
+        return (now_utc().date() - self.created_at.date()).days
+
+    @hybrid_property
+    def assignee_display(self):
+        """
+        Assignee label for lists and exports.
+        assignee_name is written on every assignment (engineer name, custom
+        text or Assigned / In Queue), so it wins; the linked user covers
+        tickets assigned without it.
+        """
+        if self.assignee_name:
+            return self.assignee_name
+        if self.assignee:
+            return self.assignee.name
+        return "Unassigned"
+
+    @assignee_display.expression
+    def assignee_display(cls):
+        return db.func.coalesce(
+            db.func.nullif(cls.assignee_name, ""),
+            db.select(User.name).where(User.id == cls.assignee_id).scalar_subquery(),
+            "Unassigned",
+        )
+
     @hybrid_property
     def is_open(self):
         """Check if ticket is still active/open."""
@@ -239,11 +392,25 @@ class Ticket(db.Model):
         """Check if ticket SLA is breached."""
         return self.sla_state == "Breached"
 
+    @is_breached.expression
+    def is_breached(cls):
+        # Plain predicates rather than sla_state == "Breached", so the
+        # (status, due_date) index can serve them
+        return db.or_(
+            db.and_(cls.status.in_(("Closed", "Resolved")), cls.closed_at > cls.due_date),
+            db.and_(cls.sla_tracked, cls.due_date < now_utc()),
+        )
+
     @hybrid_property
     def is_at_risk(self):
         """Check if ticket SLA is at risk."""
         return self.sla_state == "At Risk"
 
+    @is_at_risk.expression
+    def is_at_risk(cls):
+        now = now_utc()
+        return db.and_(cls.sla_tracked, cls.due_date.between(now, now + timedelta(hours=6)))
+
     def add_comment(self, user, message, is_internal=False):
         """Add a comment to the ticket."""
         comment = Comment(
@@ -289,14 +456,14 @@ class Ticket(db.Model):
             "priority": self.priority,
             "description": self.description,
             "status": self.status,
-            "created_at": self.created_at.strftime('%b %d, %Y') if self.created_at else "N/A",
-            "created_at_iso": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.strftime('%b %d, %Y') if self.updated_at else "N/A",
-            "updated_at_iso": self.updated_at.isoformat() if self.updated_at else None,
-            "due_date": self.due_date.strftime('%b %d, %Y') if self.due_date else "N/A",
-            "due_date_iso": self.due_date.isoformat() if self.due_date else None,
-            "closed_at": self.closed_at.strftime('%b %d, %Y') if self.closed_at else "N/A",
-            "closed_at_iso": self.closed_at.isoformat() if self.closed_at else None,
+            "created_at": _display_date(self.created_at),
+            "created_at_iso": _iso_date(self.created_at),
+            "updated_at": _display_date(self.updated_at),
+            "updated_at_iso": _iso_date(self.updated_at),
+            "due_date": _display_date(self.due_date),
+            "due_date_iso": _iso_date(self.due_date),
+            "closed_at": _display_date(self.closed_at),
+            "closed_at_iso": _iso_date(self.closed_at),
             "sla_hours": self.sla_hours,
             "sla_state": self.sla_state,
             "sla_countdown_human": self.sla_countdown_human,
@@ -309,27 +476,6 @@ class Ticket(db.Model):
         return f"<Ticket {self.ticket_no} - {self.status}>"
 
 
-# ============================================================
-#  AUTO UPDATE AGING ON LOAD
-# ============================================================
-@event.listens_for(Ticket, "load")
-def update_ticket_aging(target, context):
-    """
-    Automatically calculate ticket aging when loaded from database.
-    Aging = days since ticket creation (only for non-closed tickets).
-    """
-    if target.created_at:
-        if target.status in ("Closed", "Resolved"):
-            # For closed tickets, calculate aging from creation to closure
-            if target.closed_at:
-                target.aging = (target.closed_at.date() - target.created_at.date()).days
-            else:
-                target.aging = 0
-        else:
-            # For open tickets, calculate aging from creation to now
-            target.aging = (datetime.utcnow().date() - target.created_at.date()).days
-
-
 # ============================================================
 #  COMMENT MODEL
 # ============================================================
@@ -341,10 +487,10 @@ class Comment(db.Model):
     __tablename__ = "comments"
 
     id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False, index=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
-    user = db.relationship("User", backref="comments")
+    user = db.relationship("User", backref=db.backref("comments", passive_deletes=True))
 
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -367,7 +513,7 @@ class Attachment(db.Model):
     __tablename__ = "attachments"
 
     id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True)
 
     filename = db.Column(db.String(256), nullable=False)
     original_filename = db.Column(db.String(256), nullable=True)  # Store original name
@@ -375,7 +521,7 @@ class Attachment(db.Model):
     mime_type = db.Column(db.String(100), nullable=True)
     
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    uploaded_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    uploaded_by = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
 
     def __repr__(self):
         return f"<Attachment {self.filename} on Ticket #{self.ticket_id}>"
@@ -390,16 +536,20 @@ class TicketHistory(db.Model):
     Records all modifications to tickets.
     """
     __tablename__ = "ticket_history"
+    __table_args__ = (
+        # SLA task dedupe: WHERE ticket_id IN (...) AND event_type = ? [AND created_at >= ?]
+        db.Index("ix_ticket_history_ticket_event_created", "ticket_id", "event_type", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True)
     
     event = db.Column(db.String(200), nullable=False)
     event_type = db.Column(db.String(50), nullable=True)  # created / updated / assigned / commented / closed
     
     # Track who made the change
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
-    user = db.relationship("User", backref="ticket_history_entries")
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    user = db.relationship("User", backref=db.backref("ticket_history_entries", passive_deletes=True))
     
     # Optional: Store old and new values for changes
     old_value = db.Column(db.String(200), nullable=True)
@@ -431,8 +581,8 @@ class EmailLog(db.Model):
     status = db.Column(db.String(20), default="SUCCESS", nullable=False, index=True)  # SUCCESS / FAILED / PENDING
     
     # Link to ticket if email is ticket-related
-    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=True, index=True)
-    ticket = db.relationship("Ticket", backref="email_logs")
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id", ondelete="SET NULL"), nullable=True, index=True)
+    ticket = db.relationship("Ticket", backref=db.backref("email_logs", passive_deletes=True))
     
     # Timestamps
     sent_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -456,15 +606,15 @@ class NotificationRead(db.Model):
     __tablename__ = "notification_reads"
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Timestamp when the notification was marked as read
     marked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
-    user = db.relationship("User", backref="notification_reads")
-    ticket = db.relationship("Ticket", backref="notification_reads")
+    user = db.relationship("User", backref=db.backref("notification_reads", passive_deletes=True))
+    ticket = db.relationship("Ticket", backref=db.backref("notification_reads", passive_deletes=True))
     
     # Unique constraint to ensure one read record per user-ticket pair
     __table_args__ = (
@@ -475,6 +625,124 @@ class NotificationRead(db.Model):
         return f"<NotificationRead user={self.user_id} ticket={self.ticket_id} marked_at={self.marked_at}>"
 
 
+# ============================================================
+#  NOTIFICATION SEND LOG MODEL
+# ============================================================
+class NotificationLog(db.Model):
+    """
+    One row per ticket notification event that has been sent.
+    The unique (ticket_id, event, digest) row is inserted before the email
+    goes out, so a retried or restarted worker can't send the same event twice.
+    """
+    __tablename__ = "notification_logs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False)
+    event = db.Column(db.String(30), nullable=False)  # created / updated / assigned
+    digest = db.Column(db.String(32), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('ticket_id', 'event', 'digest', name='unique_ticket_event_digest'),
+    )
+
+    def __repr__(self):
+        return f"<NotificationLog ticket={self.ticket_id} event={self.event} digest={self.digest}>"
+
+
+# ============================================================
+#  PENDING NOTIFICATION (DIGEST) MODEL
+# ============================================================
+class PendingNotification(db.Model):
+    """
+    A ticket notification held back because its recipient hit the per-user
+    rate limit. Rows are sent as one digest email per user and then deleted.
+    """
+    __tablename__ = "pending_notifications"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey("tickets.id", ondelete="CASCADE"), nullable=False)
+    update_text = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    user = db.relationship("User")
+    ticket = db.relationship("Ticket")
+
+    def __repr__(self):
+        return f"<PendingNotification user={self.user_id} ticket={self.ticket_id}>"
+
+
+# ============================================================
+#  TICKET NUMBER COUNTER MODEL
+# ============================================================
+class TicketCounter(db.Model):
+    """
+    Per-period sequence used to build ticket numbers.
+    One row per ticket_no prefix (e.g. "IT-202512"), bumped atomically on create.
+    """
+    __tablename__ = "ticket_counters"
+
+    prefix = db.Column(db.String(20), primary_key=True)
+    last_value = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<TicketCounter {self.prefix}={self.last_value}>"
+
+
+def next_ticket_no(conn):
+    """
+    Reserve the next ticket number for the current month: IT-YYYYMM-XXXX.
+
+    The single place ticket numbers are built, so the create view and the
+    before_insert hook share one format and one counter row per month.
+    """
+    prefix = f"IT-{datetime.utcnow():%Y%m}"
+    return f"{prefix}-{next_ticket_sequence(conn, prefix):04d}"
+
+
+def next_ticket_sequence(conn, prefix):
+    """
+    Atomically reserve the next sequence number for a ticket_no prefix.
+
+    Works with either db.session or a raw Connection. The UPDATE takes a
+    row lock that is held until the surrounding transaction commits, so
+    concurrent creators are serialized instead of reading the same value.
+    The counter row is seeded from existing tickets the first time a
+    prefix is seen.
+    """
+    from sqlalchemy import select, update, insert, func
+    from sqlalchemy.exc import IntegrityError
+
+    tbl = TicketCounter.__table__
+    bump = (
+        update(tbl)
+        .where(tbl.c.prefix == prefix)
+        .values(last_value=tbl.c.last_value + 1)
+    )
+
+    if conn.execute(bump).rowcount == 0:
+        tickets = Ticket.__table__
+        last_no = conn.execute(
+            select(func.max(tickets.c.ticket_no)).where(tickets.c.ticket_no.like(f"{prefix}-%"))
+        ).scalar()
+        try:
+            seed = int(last_no.rsplit("-", 1)[-1]) if last_no else 0
+        except ValueError:
+            seed = 0
+
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(tbl).values(prefix=prefix, last_value=seed + 1))
+        except IntegrityError:
+            # Another transaction seeded the row first
+            conn.execute(bump)
+
+    return conn.execute(
+        select(tbl.c.last_value).where(tbl.c.prefix == prefix)
+    ).scalar_one()
+
+
 # ============================================================
 #  AUTO-GENERATE TICKET NUMBER
 # ============================================================
@@ -485,26 +753,16 @@ def generate_ticket_no(mapper, connect, target):
     Format: IT-YYYYMM-XXXX (e.g., IT-202412-0001)
     Sequential counter resets monthly.
     
-    Only generates if ticket_no is not already set.
+    Only generates if ticket_no is not already set. The number comes from
+    the same ticket_counters row the create view uses, so it is one
+    indexed UPDATE instead of a COUNT over the month, and concurrent
+    inserts cannot draw the same value.
     """
     # Skip if ticket_no is already set (e.g., during testing/seeding)
     if target.ticket_no:
         return
-    
-    from sqlalchemy import select, func
-
-    now = datetime.utcnow()
-    month_start = datetime(now.year, now.month, 1)
 
-    tbl = Ticket.__table__
-
-    # Count tickets created this month
-    res = connect.execute(
-        select(func.count()).where(tbl.c.created_at >= month_start)
-    ).scalar_one()
-
-    seq = (res or 0) + 1
-    target.ticket_no = f"IT-{now.strftime('%Y%m')}-{seq:04d}"
+    target.ticket_no = next_ticket_no(connect)
 
 
 # ============================================================
@@ -526,7 +784,7 @@ def create_default_admin(app):
     Should be called after init_db.
     """
     with app.app_context():
-        if not User.query.filter_by(role="admin").first():
+        if not db.session.query(User.query.filter_by(role="admin").exists()).scalar():
             admin = User(
                 name="System Administrator",
                 email="admin@portal.com",
@@ -545,21 +803,38 @@ def create_default_admin(app):
 # ============================================================
 #  DATABASE QUERY HELPERS
 # ============================================================
+# Rows fetched per round trip by the streaming helpers below
+STREAM_BATCH_SIZE = 500
+
+
 def get_open_tickets():
-    """Get all open tickets."""
-    return Ticket.query.filter(Ticket.status.in_(["Open", "In Progress", "Re-Open"])).all()
+    """
+    Iterate all open tickets.
+    Streams STREAM_BATCH_SIZE rows at a time instead of loading the whole
+    set; the result is single-pass, so wrap it in list() to reuse it.
+    """
+    return db.session.scalars(
+        db.select(Ticket)
+        .where(Ticket.status.in_(OPEN_STATUSES))
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
 
 
 def get_breached_tickets():
-    """Get all breached SLA tickets."""
-    open_tickets = get_open_tickets()
-    return [t for t in open_tickets if t.is_breached]
+    """Get all breached SLA tickets (open and past due; filtered in SQL)."""
+    return Ticket.query.filter(
+        Ticket.status.in_(OPEN_STATUSES),
+        Ticket.due_date < datetime.utcnow(),
+    ).all()
 
 
 def get_at_risk_tickets():
-    """Get all at-risk SLA tickets."""
-    open_tickets = get_open_tickets()
-    return [t for t in open_tickets if t.is_at_risk]
+    """Get all at-risk SLA tickets (open and due within 6 hours; filtered in SQL)."""
+    now = datetime.utcnow()
+    return Ticket.query.filter(
+        Ticket.status.in_(OPEN_STATUSES),
+        Ticket.due_date.between(now, now + timedelta(hours=6)),
+    ).all()
 
 
 def get_tickets_by_priority(priority):
@@ -573,9 +848,38 @@ def get_tickets_by_assignee(user_id):
 
 
 def get_recent_tickets(days=7):
-    """Get tickets created in the last N days."""
+    """Iterate tickets created in the last N days (streamed like get_open_tickets)."""
     cutoff = datetime.utcnow() - timedelta(days=days)
-    return Ticket.query.filter(Ticket.created_at >= cutoff).all()
+    return db.session.scalars(
+        db.select(Ticket)
+        .where(Ticket.created_at >= cutoff)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+
+
+def count_tickets(*criteria):
+    """
+    Count tickets matching the given filter criteria with a single
+    SELECT count(*), without loading any Ticket rows.
+    """
+    return db.session.scalar(
+        db.select(db.func.count()).select_from(Ticket).where(*criteria)
+    )
+
+
+def count_open_tickets():
+    """Count open tickets."""
+    return count_tickets(Ticket.status.in_(OPEN_STATUSES))
+
+
+def count_tickets_by_priority(priority):
+    """Count tickets at a priority level."""
+    return count_tickets(Ticket.priority == priority)
+
+
+def count_recent_tickets(days=7):
+    """Count tickets created in the last N days."""
+    return count_tickets(Ticket.created_at >= datetime.utcnow() - timedelta(days=days))
 
 
 def get_user_by_email(email):
@@ -601,28 +905,19 @@ def get_active_admins():
 # ============================================================
 #  NOTIFICATION HELPER FUNCTIONS
 # ============================================================
-def mark_notification_as_read(user_id, ticket_id):
+def mark_notification_as_read(user_id, ticket_id, commit=True):
     """
     Mark a specific ticket notification as read for a user.
-    Creates or updates the read record.
+    Creates or updates the read record in one upsert.
+
+    Pass commit=False when marking several tickets in one unit of work;
+    the caller then commits once (or use upsert_notification_reads for a
+    whole batch).
     """
     try:
-        read_record = NotificationRead.query.filter_by(
-            user_id=user_id, 
-            ticket_id=ticket_id
-        ).first()
-        
-        if not read_record:
-            read_record = NotificationRead(
-                user_id=user_id,
-                ticket_id=ticket_id,
-                marked_at=datetime.utcnow()
-            )
-            db.session.add(read_record)
-        else:
-            read_record.marked_at = datetime.utcnow()
-        
-        db.session.commit()
+        upsert_notification_reads(user_id, [ticket_id])
+        if commit:
+            db.session.commit()
         return True
     except Exception as e:
         db.session.rollback()
@@ -630,6 +925,52 @@ def mark_notification_as_read(user_id, ticket_id):
         return False
 
 
+def upsert_notification_reads(user_id, ticket_ids, marked_at=None):
+    """
+    Record ticket notifications as read in one statement (no commit).
+
+    Uses INSERT ... ON CONFLICT (user_id, ticket_id) DO UPDATE on PostgreSQL
+    and SQLite; other databases get one UPDATE for existing rows plus one
+    multi-row INSERT for the rest.
+    """
+    if not ticket_ids:
+        return
+    marked_at = marked_at or datetime.utcnow()
+    rows = [{"user_id": user_id, "ticket_id": tid, "marked_at": marked_at} for tid in ticket_ids]
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(NotificationRead).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "ticket_id"],
+            set_={"marked_at": stmt.excluded.marked_at},
+        )
+        db.session.execute(stmt)
+        return
+
+    from sqlalchemy import insert, update
+
+    existing = {
+        tid for (tid,) in db.session.query(NotificationRead.ticket_id).filter(
+            NotificationRead.user_id == user_id,
+            NotificationRead.ticket_id.in_(ticket_ids),
+        )
+    }
+    if existing:
+        db.session.execute(
+            update(NotificationRead)
+            .where(NotificationRead.user_id == user_id, NotificationRead.ticket_id.in_(existing))
+            .values(marked_at=marked_at)
+        )
+    missing = [row for row in rows if row["ticket_id"] not in existing]
+    if missing:
+        db.session.execute(insert(NotificationRead), missing)
+
+
 def mark_all_notifications_as_read(user_id):
     """
     Mark all unread notifications as read for a user.
@@ -637,20 +978,20 @@ def mark_all_notifications_as_read(user_id):
     try:
         # Get all tickets relevant to this user
         if user_id:
-            user = User.query.get(user_id)
-            if user and user.role == 'admin':
+            role = db.session.query(User.role).filter_by(id=user_id).scalar()
+            if role == 'admin':
                 # Admin: mark all recent tickets as read
-                recent_tickets = Ticket.query.order_by(
-                    Ticket.created_at.desc()
-                ).limit(100).all()
+                recent = Ticket.query.order_by(Ticket.created_at.desc())
             else:
                 # User: mark their own tickets as read
-                recent_tickets = Ticket.query.filter_by(
+                recent = Ticket.query.filter_by(
                     user_id=user_id
-                ).order_by(Ticket.updated_at.desc()).limit(100).all()
-            
-            for ticket in recent_tickets:
-                mark_notification_as_read(user_id, ticket.id)
+                ).order_by(Ticket.updated_at.desc())
+
+            # Ids only; one upsert and one commit for the whole batch
+            ticket_ids = [tid for (tid,) in recent.with_entities(Ticket.id).limit(100)]
+            upsert_notification_reads(user_id, ticket_ids)
+            db.session.commit()
         
         return True
     except Exception as e:
@@ -666,34 +1007,34 @@ def get_unread_notifications(user_id):
     try:
         if not user_id:
             return 0
-        
-        user = User.query.get(user_id)
-        if not user:
+
+        role = db.session.query(User.role).filter_by(id=user_id).scalar()
+        if role is None:
             return 0
         
         yesterday = datetime.utcnow() - timedelta(hours=24)
-        
-        if user.role == 'admin':
+
+        # Anti-join: tickets with no read row for this user. The
+        # (user_id, ticket_id) unique constraint indexes the join.
+        unread = Ticket.query.outerjoin(
+            NotificationRead,
+            db.and_(
+                NotificationRead.ticket_id == Ticket.id,
+                NotificationRead.user_id == user_id,
+            ),
+        ).filter(NotificationRead.id.is_(None))
+
+        if role == 'admin':
             # Admin: unread new tickets from last 24 hours
-            unread = Ticket.query.filter(
-                Ticket.created_at >= yesterday
-            ).filter(
-                ~Ticket.notification_reads.any(
-                    NotificationRead.user_id == user_id
-                )
-            ).count()
+            unread = unread.filter(Ticket.created_at >= yesterday)
         else:
             # User: unread updates to their tickets from last 24 hours
-            unread = Ticket.query.filter(
+            unread = unread.filter(
                 Ticket.user_id == user_id,
                 Ticket.updated_at >= yesterday
-            ).filter(
-                ~Ticket.notification_reads.any(
-                    NotificationRead.user_id == user_id
-                )
-            ).count()
+            )
         
-        return unread
+        return unread.count()
     except Exception as e:
         print(f"Error getting unread notification count: {e}")
         return 0
@@ -712,6 +1053,18 @@ def is_notification_read(user_id, ticket_id):
     except Exception as e:
         print(f"Error checking notification read status: {e}")
         return False
-    
 
-    
\ No newline at end of file
+
+def get_read_ticket_ids(user_id, ticket_ids):
+    """
+    Return the subset of ticket_ids the user has marked as read.
+    One IN query for a whole list, instead of is_notification_read per row.
+    """
+    if not ticket_ids:
+        return set()
+    return set(db.session.scalars(
+        db.select(NotificationRead.ticket_id).where(
+            NotificationRead.user_id == user_id,
+            NotificationRead.ticket_id.in_(ticket_ids),
+        )
+    ))
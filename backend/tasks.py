@@ -1,9 +1,29 @@
 import os
 import logging
 from datetime import datetime, timedelta
-from celery import Celery, Task
+from threading import Lock
+from celery import Celery, Task, chord, group
 from flask import current_app
+from jinja2 import Environment
 from dotenv import load_dotenv
+from sqlalchemy.orm import load_only, selectinload
+
+from app import create_app, get_admin_emails, redis_call, redis_claim
+from db_bulk import bulk_insert
+from models import (
+    db, Ticket, User, TicketHistory, EmailLog, NotificationLog, PendingNotification,
+    STREAM_BATCH_SIZE
+)
+from utils import (
+    build_email_message,
+    send_async_email,
+    build_daily_sla_report,
+    SLA_REPORT_MAX_ROWS,
+    email_ticket_created,
+    email_ticket_updated,
+    email_assignee_assigned,
+    email_notification_digest
+)
 
 # Load environment variables
 load_dotenv()
@@ -27,19 +47,58 @@ celery.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes soft limit
 )
 
+# SLA scans are split into this many shards (by ticket id) run in parallel;
+# 1 keeps each scan in a single task
+SLA_SHARDS = max(1, int(os.getenv("SLA_SHARDS", "1")))
+
+# Emails held back by the per-user rate limit go out as one digest this often
+NOTIFY_DIGEST_SECONDS = int(os.getenv("NOTIFY_DIGEST_SECONDS", "300"))
+
+# Optional dedicated queues (start a worker with -Q <name>): SLA shard
+# scans, and outgoing mail so SMTP sends don't wait behind long scans
+SLA_QUEUE = os.getenv("SLA_QUEUE")
+EMAIL_QUEUE = os.getenv("EMAIL_QUEUE")
+
+task_routes = {}
+if SLA_QUEUE:
+    task_routes["tasks.check_sla_shard"] = {"queue": SLA_QUEUE}
+    task_routes["tasks.send_sla_reminders_shard"] = {"queue": SLA_QUEUE}
+if EMAIL_QUEUE:
+    task_routes["tasks.send_email_task"] = {"queue": EMAIL_QUEUE}
+if task_routes:
+    celery.conf.task_routes = task_routes
+
 
 # ============================================================
 # FLASK APP CONTEXT HELPER
 # ============================================================
+_flask_app = None
+_flask_app_lock = Lock()
+
+
+def get_flask_app():
+    """
+    The worker process's Flask app, created on first use.
+
+    Built lazily so each forked worker child makes its own (engine pool,
+    Redis client), and then reused so per-app state such as the mail
+    extension, and the SMTP session kept for it, survives across tasks.
+    """
+    global _flask_app
+    if _flask_app is None:
+        with _flask_app_lock:
+            if _flask_app is None:
+                _flask_app = create_app()
+    return _flask_app
+
+
 class FlaskTask(Task):
     """
     Custom Celery Task class that provides Flask app context.
     Ensures tasks can access Flask config and database.
     """
     def __call__(self, *args, **kwargs):
-        from app import create_app
-        app = create_app()
-        with app.app_context():
+        with get_flask_app().app_context():
             return self.run(*args, **kwargs)
 
 
@@ -83,12 +142,177 @@ def setup_periodic_tasks(sender, **kwargs):
         name="Clean up old email logs (daily)"
     )
 
+    # Digest of rate-limited notifications (every 5 minutes by default)
+    sender.add_periodic_task(
+        float(NOTIFY_DIGEST_SECONDS),
+        send_notification_digests.s(),
+        name="Notification digests"
+    )
+
     logger.info("✓ Periodic tasks configured")
 
 
+# ============================================================
+# SLA EMAIL TEMPLATES (compiled once per worker process)
+# ============================================================
+_html_templates = Environment(autoescape=True)
+_text_templates = Environment(autoescape=False)
+
+_BREACH_HTML = _html_templates.from_string("""
+<div style="color: #dc2626; font-weight: bold; margin: 16px 0;">
+    SLA BREACH ALERT
+</div>
+<p><strong>Ticket:</strong> {{ ticket.ticket_no }}</p>
+<p><strong>Priority:</strong> {{ ticket.priority }}</p>
+<p><strong>Status:</strong> {{ ticket.status }}</p>
+<p><strong>Overdue:</strong> {{ ticket.sla_countdown_human }}</p>
+<p><strong>Created:</strong> {{ created }}</p>
+<p><strong>Assigned To:</strong> {{ assignee_name }}</p>
+<p style="margin-top: 16px; color: #666;">
+    Please take immediate action to resolve this ticket.
+</p>
+""")
+
+_BREACH_TEXT = _text_templates.from_string("""
+URGENT: SLA BREACH ALERT
+
+Ticket: {{ ticket.ticket_no }}
+Priority: {{ ticket.priority }}
+Status: {{ ticket.status }}
+Overdue: {{ ticket.sla_countdown_human }}
+Created: {{ created }}
+Assigned To: {{ assignee_name }}
+
+Please take immediate action to resolve this ticket.
+""")
+
+_REMINDER_HTML = _html_templates.from_string("""
+<p><strong>Ticket:</strong> {{ ticket.ticket_no }}</p>
+<p><strong>Priority:</strong> {{ ticket.priority }}</p>
+<p><strong>Time Remaining:</strong> <span style="color: #f59e0b; font-weight: bold;">{{ hours_left }}h {{ minutes_left }}m</span></p>
+<p style="margin-top: 16px; color: #666;">
+    Please complete or update this ticket before the SLA deadline.
+</p>
+""")
+
+_REMINDER_TEXT = _text_templates.from_string("""
+Reminder: Ticket {{ ticket.ticket_no }} due in {{ hours_left }}h {{ minutes_left }}m
+
+Priority: {{ ticket.priority }}
+
+Please complete or update this ticket before the SLA deadline.
+""")
+
+
+# ============================================================
+# EMAIL DELIVERY TASKS
+# ============================================================
+@celery.task(bind=True, max_retries=2)
+def send_email_task(self, to, subject, html_body, text_body=None, attachments=None, ticket_id=None, bcc=None):
+    """
+    Deliver one email from the worker (queued by utils.send_email).
+    Sends synchronously here and records the attempt in EmailLog.
+    
+    Returns:
+        dict: Task result
+    """
+    try:
+        msg = build_email_message(to, subject, html_body, text_body, attachments, bcc)
+        # Delivery errors propagate (after being logged) so the task retries
+        send_async_email(current_app._get_current_object(), msg, ticket_id, raise_errors=True)
+
+        return {"status": "sent", "to": to, "ticket_id": ticket_id}
+
+    except Exception as e:
+        logger.error(f"[TASK] send_email_task: Error - {e}", exc_info=True)
+        self.retry(exc=e, countdown=30)
+
+
 # ============================================================
 # SLA MONITORING TASKS
 # ============================================================
+# Ticket columns check_sla / send_sla_reminders read (skips description etc.)
+SLA_SCAN_COLUMNS = (
+    Ticket.id, Ticket.ticket_no, Ticket.priority, Ticket.status, Ticket.due_date,
+    Ticket.created_at, Ticket.assignee_id, Ticket.user_id,
+)
+
+
+def dispatch_emails(signatures, task_name):
+    """
+    Queue a run's collected send_email_task signatures as one Celery group,
+    so the worker pool delivers them in parallel instead of the task
+    sending each one itself.
+
+    Returns:
+        int: Number of emails queued (0 if the broker rejected the group)
+    """
+    if not signatures:
+        return 0
+    try:
+        group(signatures).apply_async()
+        return len(signatures)
+    except Exception as e:
+        logger.error(f"[TASK] {task_name}: Error queueing emails - {e}", exc_info=True)
+        return 0
+
+
+def shard_filter(shard, shards):
+    """WHERE clause limiting a scan to one shard of the tickets (by id)."""
+    if shards <= 1:
+        return db.true()
+    return Ticket.id % shards == shard
+
+
+def run_sharded(shard_task, task_name):
+    """
+    Run an SLA scan as SLA_SHARDS parallel shard tasks joined by a chord,
+    or inline when sharding is off.
+
+    Returns:
+        dict: The scan's result when run inline, else a dispatch summary
+    """
+    if SLA_SHARDS <= 1:
+        return shard_task.run(0, 1)
+
+    chord(
+        shard_task.s(shard, SLA_SHARDS) for shard in range(SLA_SHARDS)
+    )(merge_sla_results.s(task_name))
+
+    return {
+        "status": "dispatched",
+        "shards": SLA_SHARDS,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@celery.task
+def merge_sla_results(results, task_name):
+    """Chord callback: add up the per-shard counts of an SLA scan."""
+    merged = {}
+    for result in results:
+        for key, value in (result or {}).items():
+            if isinstance(value, int):
+                merged[key] = merged.get(key, 0) + value
+    merged["timestamp"] = datetime.utcnow().isoformat()
+
+    logger.info(f"[TASK] {task_name}: Complete ({len(results)} shards) - {merged}")
+    return merged
+
+
+def record_sla_history(rows, task_name):
+    """
+    Write the TicketHistory rows a task run collected in one batch and
+    one commit; on failure roll back once and log instead of raising, so
+    the notifications already sent are still reported.
+    """
+    try:
+        bulk_insert(TicketHistory, rows)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"[TASK] {task_name}: Error recording history - {e}", exc_info=True)
+
+
 @celery.task(bind=True)
 def check_sla(self):
     """
@@ -98,106 +322,100 @@ def check_sla(self):
     Returns:
         dict: Summary of breached tickets
     """
-    try:
-        from models import db, Ticket, User, TicketHistory
-        from utils import send_email, sla_class
+    return run_sharded(check_sla_shard, "check_sla")
+
 
-        logger.info("[TASK] check_sla: Starting SLA breach check")
+@celery.task(bind=True)
+def check_sla_shard(self, shard=0, shards=1):
+    """
+    Notify breaches for one shard of the tickets (see check_sla).
+    
+    Args:
+        shard (int): This shard's index
+        shards (int): Total number of shards
         
-        # Get all open tickets
-        open_tickets = Ticket.query.filter(
-            Ticket.status.in_(["Open", "In Progress", "Pending"])
-        ).all()
+    Returns:
+        dict: Summary of breached tickets in the shard
+    """
+    try:
+        logger.info(f"[TASK] check_sla: Starting SLA breach check (shard {shard + 1}/{shards})")
+        
+        # Only open tickets already past their deadline (filtered in SQL),
+        # loading just the columns the alert uses
+        breached_query = Ticket.query.options(load_only(*SLA_SCAN_COLUMNS)).filter(
+            Ticket.status.in_(["Open", "In Progress", "Pending"]),
+            Ticket.is_breached,
+            shard_filter(shard, shards),
+        )
         
         breached_count = 0
-        notified_count = 0
+        email_sigs = []
+        history_rows = []
+        
+        # Tickets already notified (via history), in one query for the batch
+        already_notified = {
+            ticket_id for (ticket_id,) in db.session.query(TicketHistory.ticket_id).filter(
+                TicketHistory.ticket_id.in_(breached_query.with_entities(Ticket.id)),
+                TicketHistory.event_type == "sla_breach_notified"
+            ).distinct()
+        }
         
-        for ticket in open_tickets:
-            # Check if SLA is breached
-            if ticket.sla_state == "Breached":
-                breached_count += 1
+        # Admins are copied on every breach; look them up once (cached in Redis)
+        admin_emails = get_admin_emails(current_app)
+        
+        # Stream the breaches instead of loading them all up front
+        for ticket in breached_query.yield_per(STREAM_BATCH_SIZE):
+            breached_count += 1
+            
+            # Only notify once per breach (not repeatedly)
+            if ticket.id not in already_notified:
+                # A set, since the assignee or creator may also be an admin
+                recipient_emails = set(admin_emails)
                 
-                # Check if already notified (via history)
-                last_breach_notify = TicketHistory.query.filter(
-                    TicketHistory.ticket_id == ticket.id,
-                    TicketHistory.event_type == "sla_breach_notified"
-                ).order_by(TicketHistory.created_at.desc()).first()
+                # Notify assignee
+                if ticket.assignee and ticket.assignee.email:
+                    recipient_emails.add(ticket.assignee.email)
                 
-                # Only notify once per breach (not repeatedly)
-                if not last_breach_notify:
-                    recipient_emails = []
-                    
-                    # Notify assignee
-                    if ticket.assignee and ticket.assignee.email:
-                        recipient_emails.append(ticket.assignee.email)
-                    
-                    # Notify ticket creator
-                    if ticket.user and ticket.user.email:
-                        recipient_emails.append(ticket.user.email)
-                    
-                    # Notify admins
-                    admins = User.query.filter_by(role="admin", active=True).all()
-                    admin_emails = [a.email for a in admins if a.email]
-                    recipient_emails.extend(admin_emails)
-                    
-                    # Remove duplicates
-                    recipient_emails = list(set(recipient_emails))
-                    
-                    if recipient_emails:
-                        try:
-                            subject = f"🚨 URGENT: SLA Breached - {ticket.ticket_no}"
-                            
-                            html_body = f"""
-                            <div style="color: #dc2626; font-weight: bold; margin: 16px 0;">
-                                SLA BREACH ALERT
-                            </div>
-                            <p><strong>Ticket:</strong> {ticket.ticket_no}</p>
-                            <p><strong>Priority:</strong> {ticket.priority}</p>
-                            <p><strong>Status:</strong> {ticket.status}</p>
-                            <p><strong>Overdue:</strong> {ticket.sla_countdown_human}</p>
-                            <p><strong>Created:</strong> {ticket.created_at.strftime('%Y-%m-%d %H:%M:%S')}</p>
-                            <p><strong>Assigned To:</strong> {ticket.assignee.name if ticket.assignee else 'Unassigned'}</p>
-                            <p style="margin-top: 16px; color: #666;">
-                                Please take immediate action to resolve this ticket.
-                            </p>
-                            """
-                            
-                            text_body = f"""
-URGENT: SLA BREACH ALERT
-
-Ticket: {ticket.ticket_no}
-Priority: {ticket.priority}
-Status: {ticket.status}
-Overdue: {ticket.sla_countdown_human}
-Created: {ticket.created_at.strftime('%Y-%m-%d %H:%M:%S')}
-Assigned To: {ticket.assignee.name if ticket.assignee else 'Unassigned'}
-
-Please take immediate action to resolve this ticket.
-                            """
-                            
-                            send_email(
-                                to=", ".join(recipient_emails),
-                                subject=subject,
-                                html_body=html_body,
-                                text_body=text_body,
-                                ticket_id=ticket.id
-                            )
-                            
-                            notified_count += 1
-                            
-                            # Record notification in history
-                            history = TicketHistory(
-                                ticket_id=ticket.id,
-                                event="SLA breach notification sent",
-                                event_type="sla_breach_notified",
-                                user_id=None
-                            )
-                            db.session.add(history)
-                            db.session.commit()
-                            
-                        except Exception as e:
-                            logger.error(f"Error sending SLA breach email for ticket {ticket.ticket_no}: {e}")
+                # Notify ticket creator
+                if ticket.user and ticket.user.email:
+                    recipient_emails.add(ticket.user.email)
+                
+                if recipient_emails:
+                    try:
+                        subject = f"🚨 URGENT: SLA Breached - {ticket.ticket_no}"
+                        
+                        context = dict(
+                            ticket=ticket,
+                            created=ticket.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                            assignee_name=ticket.assignee.name if ticket.assignee else 'Unassigned'
+                        )
+                        html_body = _BREACH_HTML.render(context)
+                        text_body = _BREACH_TEXT.render(context)
+                        
+                        email_sigs.append(send_email_task.s(
+                            to=", ".join(sorted(recipient_emails)),
+                            subject=subject,
+                            html_body=html_body,
+                            text_body=text_body,
+                            ticket_id=ticket.id
+                        ))
+                        
+                        # Record notification in history (written after the loop)
+                        history_rows.append(dict(
+                            ticket_id=ticket.id,
+                            event="SLA breach notification sent",
+                            event_type="sla_breach_notified",
+                            user_id=None
+                        ))
+                        
+                    except Exception as e:
+                        logger.error(f"Error building SLA breach email for ticket {ticket.ticket_no}: {e}")
         
+        # Fan the emails out to the worker pool, then record what was queued
+        notified_count = dispatch_emails(email_sigs, "check_sla")
+        if notified_count:
+            record_sla_history(history_rows, "check_sla")
+    
         result = {
             "breached_count": breached_count,
             "notified_count": notified_count,
@@ -222,84 +440,87 @@ def send_sla_reminders(self):
     Returns:
         dict: Summary of reminders sent
     """
-    try:
-        from models import db, Ticket, TicketHistory
-        from utils import send_email
+    return run_sharded(send_sla_reminders_shard, "send_sla_reminders")
+
 
-        logger.info("[TASK] send_sla_reminders: Starting reminder check")
+@celery.task(bind=True)
+def send_sla_reminders_shard(self, shard=0, shards=1):
+    """
+    Send reminders for one shard of the tickets (see send_sla_reminders).
+    
+    Args:
+        shard (int): This shard's index
+        shards (int): Total number of shards
         
-        # Get all open tickets
-        open_tickets = Ticket.query.filter(
-            Ticket.status.in_(["Open", "In Progress", "Pending"])
-        ).all()
+    Returns:
+        dict: Summary of reminders sent in the shard
+    """
+    try:
+        logger.info(f"[TASK] send_sla_reminders: Starting reminder check (shard {shard + 1}/{shards})")
+        
+        # Only open tickets due within the next 6 hours (filtered in SQL),
+        # loading just the columns the reminder uses
+        at_risk_query = Ticket.query.options(load_only(*SLA_SCAN_COLUMNS)).filter(
+            Ticket.status.in_(["Open", "In Progress", "Pending"]),
+            Ticket.is_at_risk,
+            Ticket.assignee_id.isnot(None),  # reminders only go to the assignee
+            shard_filter(shard, shards),
+        )
         
-        reminders_sent = 0
+        email_sigs = []
+        history_rows = []
+        
+        # Tickets reminded in the last 4 hours, in one query for the batch
+        four_hours_ago = datetime.utcnow() - timedelta(hours=4)
+        recently_reminded = {
+            ticket_id for (ticket_id,) in db.session.query(TicketHistory.ticket_id).filter(
+                TicketHistory.ticket_id.in_(at_risk_query.with_entities(Ticket.id)),
+                TicketHistory.event_type == "sla_reminder_sent",
+                TicketHistory.created_at >= four_hours_ago
+            ).distinct()
+        }
         
-        for ticket in open_tickets:
-            if not ticket.due_date:
-                continue
+        # Stream the at-risk tickets instead of loading them all up front
+        for ticket in at_risk_query.yield_per(STREAM_BATCH_SIZE):
+            # is_at_risk already limits the query to deadlines in the next 6h;
+            # clamp in case one passed while the scan was running
+            secs_left = max(ticket.sla_seconds_left or 0, 0)
             
-            secs_left = ticket.sla_seconds_left
-            
-            if secs_left is None:
-                continue
-            
-            # Remind if at risk (< 6 hours) and positive (not breached)
-            if 0 < secs_left <= 6 * 3600:
-                # Check if already reminded in last 4 hours
-                four_hours_ago = datetime.utcnow() - timedelta(hours=4)
-                recent_reminder = TicketHistory.query.filter(
-                    TicketHistory.ticket_id == ticket.id,
-                    TicketHistory.event_type == "sla_reminder_sent",
-                    TicketHistory.created_at >= four_hours_ago
-                ).first()
-                
-                if not recent_reminder and ticket.assignee and ticket.assignee.email:
-                    try:
-                        hours_left = int(secs_left // 3600)
-                        minutes_left = int((secs_left % 3600) // 60)
-                        
-                        subject = f"⏰ Reminder: {ticket.ticket_no} due in {hours_left}h {minutes_left}m"
-                        
-                        html_body = f"""
-                        <p><strong>Ticket:</strong> {ticket.ticket_no}</p>
-                        <p><strong>Priority:</strong> {ticket.priority}</p>
-                        <p><strong>Time Remaining:</strong> <span style="color: #f59e0b; font-weight: bold;">{hours_left}h {minutes_left}m</span></p>
-                        <p style="margin-top: 16px; color: #666;">
-                            Please complete or update this ticket before the SLA deadline.
-                        </p>
-                        """
-                        
-                        text_body = f"""
-Reminder: Ticket {ticket.ticket_no} due in {hours_left}h {minutes_left}m
-
-Priority: {ticket.priority}
-
-Please complete or update this ticket before the SLA deadline.
-                        """
-                        
-                        send_email(
-                            to=ticket.assignee.email,
-                            subject=subject,
-                            html_body=html_body,
-                            text_body=text_body,
-                            ticket_id=ticket.id
-                        )
-                        
-                        reminders_sent += 1
-                        
-                        # Record reminder in history
-                        history = TicketHistory(
-                            ticket_id=ticket.id,
-                            event=f"SLA reminder sent ({hours_left}h remaining)",
-                            event_type="sla_reminder_sent",
-                            user_id=None
-                        )
-                        db.session.add(history)
-                        db.session.commit()
-                        
-                    except Exception as e:
-                        logger.error(f"Error sending reminder for ticket {ticket.ticket_no}: {e}")
+            # Skip if already reminded in last 4 hours
+            if ticket.id not in recently_reminded and ticket.assignee and ticket.assignee.email:
+                try:
+                    hours_left = int(secs_left // 3600)
+                    minutes_left = int((secs_left % 3600) // 60)
+                    
+                    subject = f"⏰ Reminder: {ticket.ticket_no} due in {hours_left}h {minutes_left}m"
+                    
+                    context = dict(ticket=ticket, hours_left=hours_left, minutes_left=minutes_left)
+                    html_body = _REMINDER_HTML.render(context)
+                    text_body = _REMINDER_TEXT.render(context)
+                    
+                    email_sigs.append(send_email_task.s(
+                        to=ticket.assignee.email,
+                        subject=subject,
+                        html_body=html_body,
+                        text_body=text_body,
+                        ticket_id=ticket.id
+                    ))
+                    
+                    # Record reminder in history (written after the loop)
+                    history_rows.append(dict(
+                        ticket_id=ticket.id,
+                        event=f"SLA reminder sent ({hours_left}h remaining)",
+                        event_type="sla_reminder_sent",
+                        user_id=None
+                    ))
+                    
+                except Exception as e:
+                    logger.error(f"Error building reminder for ticket {ticket.ticket_no}: {e}")
+        
+        # Fan the emails out to the worker pool, then record what was queued
+        reminders_sent = dispatch_emails(email_sigs, "send_sla_reminders")
+        if reminders_sent:
+            record_sla_history(history_rows, "send_sla_reminders")
         
         result = {
             "reminders_sent": reminders_sent,
@@ -327,56 +548,85 @@ def daily_sla_report(self):
         dict: Report summary
     """
     try:
-        from models import db, Ticket, User
-        from utils import send_email, email_daily_sla_report
-
         logger.info("[TASK] daily_sla_report: Starting report generation")
         
-        admin_users = User.query.filter_by(role="admin", active=True).all()
-        admin_emails = [a.email for a in admin_users if a.email]
+        admin_emails = get_admin_emails(current_app)
         
         if not admin_emails:
             logger.warning("[TASK] daily_sla_report: No admin emails found")
             return {"status": "skipped", "reason": "No admin emails"}
         
-        # Get all open tickets
-        open_tickets = Ticket.query.filter(
-            Ticket.status.in_(["Open", "In Progress", "Pending"])
-        ).all()
+        open_filter = Ticket.status.in_(["Open", "In Progress", "Pending"])
         
-        # Calculate metrics
-        breached = [t for t in open_tickets if t.sla_state == "Breached"]
-        at_risk = [t for t in open_tickets if t.sla_state == "At Risk"]
+        # Calculate metrics in one aggregate instead of loading every open ticket
+        total_open, breached_count, at_risk_count = db.session.query(
+            db.func.count(Ticket.id),
+            db.func.coalesce(db.func.sum(db.case((Ticket.is_breached, 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(db.case((Ticket.is_at_risk, 1), else_=0)), 0),
+        ).filter(open_filter).one()
         
         metrics = {
             "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-            "total_open": len(open_tickets),
-            "breached": len(breached),
-            "at_risk": len(at_risk),
-            "on_track": len(open_tickets) - len(breached) - len(at_risk)
+            "total_open": total_open,
+            "breached": breached_count,
+            "at_risk": at_risk_count,
+            "on_track": total_open - breached_count - at_risk_count,
+            # Shape of the whole backlog, since only the worst are listed
+            "breached_by_priority": dict(
+                db.session.query(Ticket.priority, db.func.count(Ticket.id))
+                .filter(open_filter, Ticket.is_breached)
+                .group_by(Ticket.priority)
+                .order_by(db.func.count(Ticket.id).desc())
+                .all()
+            ) if breached_count else {}
         }
         
+        # Only the breaches listed in the report are loaded (creator's name only),
+        # most overdue first
+        breached = Ticket.query.options(
+            selectinload(Ticket.user).load_only(User.name)
+        ).filter(
+            open_filter,
+            Ticket.is_breached,
+        ).order_by(Ticket.due_date.asc()).limit(SLA_REPORT_MAX_ROWS).all()
+        
         # Format breached tickets for report
+        now = datetime.utcnow()
         breached_summaries = [
             {
                 "ticket_no": t.ticket_no,
                 "priority": t.priority,
                 "status": t.status,
                 "user": t.user.name if t.user else "Unknown",
-                "age_hours": int((datetime.utcnow() - t.created_at).total_seconds() / 3600)
+                "age_hours": int((now - t.created_at).total_seconds() / 3600),
+                "overdue_hours": int((now - t.due_date).total_seconds() / 3600)
             }
-            for t in breached[:10]  # Top 10 most recent breaches
+            for t in breached
         ]
         
-        # Send to each admin
-        for admin_email in admin_emails:
-            try:
-                email_daily_sla_report(admin_email, metrics, breached_summaries)
-            except Exception as e:
-                logger.error(f"Error sending report to {admin_email}: {e}")
+        # One report per day, even if beat fires twice or the task is re-run
+        report_key = f"sla_report:{datetime.utcnow():%Y-%m-%d}"
+        if not redis_claim(current_app, report_key, 86400):
+            logger.info(f"[TASK] daily_sla_report: Already sent ({report_key})")
+            return {"status": "skipped", "reason": "Already sent today"}
+        
+        # Render once and send one message with every admin on BCC
+        subject, html_body, text_body = build_daily_sla_report(metrics, breached_summaries)
+        queued = dispatch_emails([
+            send_email_task.s(
+                to=current_app.config.get("MAIL_DEFAULT_SENDER", "noreply@portal.com"),
+                subject=subject,
+                html_body=html_body,
+                text_body=text_body,
+                bcc=admin_emails
+            )
+        ], "daily_sla_report")
+        if not queued:
+            # Let the next run try again
+            redis_call(current_app, "delete", report_key)
         
         result = {
-            "status": "sent",
+            "status": "sent" if queued else "failed",
             "admin_count": len(admin_emails),
             "metrics": metrics,
             "timestamp": datetime.utcnow().isoformat()
@@ -403,17 +653,35 @@ def cleanup_old_email_logs(self):
         dict: Cleanup summary
     """
     try:
-        from models import db, EmailLog
-
         logger.info("[TASK] cleanup_old_email_logs: Starting cleanup")
         
-        # Delete logs older than 30 days
+        # Delete logs older than 30 days, in short batches so no single
+        # DELETE holds locks on the whole table
         cutoff_date = datetime.utcnow() - timedelta(days=30)
+        batch_size = 5000
+        deleted = 0
+        
+        while True:
+            ids = [
+                log_id for (log_id,) in db.session.query(EmailLog.id)
+                .filter(EmailLog.sent_at < cutoff_date)
+                .limit(batch_size)
+            ]
+            if not ids:
+                break
+            
+            deleted += db.session.query(EmailLog).filter(
+                EmailLog.id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            
+            if len(ids) < batch_size:
+                break
         
-        deleted = db.session.query(EmailLog).filter(
-            EmailLog.sent_at < cutoff_date
-        ).delete()
-        
+        # Send-once markers only matter while a retry could still happen
+        NotificationLog.query.filter(
+            NotificationLog.created_at < cutoff_date
+        ).delete(synchronize_session=False)
         db.session.commit()
         
         result = {
@@ -443,19 +711,20 @@ def archive_closed_tickets(self, days=90):
         dict: Archive summary
     """
     try:
-        from models import db, Ticket
-
         logger.info(f"[TASK] archive_closed_tickets: Starting archive (>{days} days)")
         
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
+        # One bulk UPDATE; updated_at is kept so archiving doesn't surface
+        # the tickets in users' notification feeds
         archived = db.session.query(Ticket).filter(
             Ticket.status.in_(["Closed", "Resolved"]),
-            Ticket.closed_at < cutoff_date
-        ).count()
-        
-        # Future: Add archive column and mark as archived
-        # db.session.query(Ticket).filter(...).update({"archived": True})
+            Ticket.closed_at < cutoff_date,
+            Ticket.archived.is_(False)
+        ).update(
+            {Ticket.archived: True, Ticket.updated_at: Ticket.updated_at},
+            synchronize_session=False
+        )
         
         db.session.commit()
         
@@ -473,6 +742,56 @@ def archive_closed_tickets(self, days=90):
         self.retry(exc=e, countdown=60, max_retries=3)
 
 
+@celery.task(bind=True)
+def send_notification_digests(self):
+    """
+    Send one summary email per user for notifications held back by the
+    per-user rate limit (see NOTIFY_RATE_PER_MINUTE).
+    
+    The rows are deleted before sending, so a crashed run drops a digest
+    rather than sending it twice.
+    
+    Returns:
+        dict: Digest summary
+    """
+    try:
+        logger.info("[TASK] send_notification_digests: Starting")
+        
+        pending = PendingNotification.query.options(
+            selectinload(PendingNotification.user).load_only(User.name, User.email),
+            selectinload(PendingNotification.ticket).load_only(Ticket.ticket_no),
+        ).order_by(PendingNotification.id).all()
+        
+        by_user = {}
+        for row in pending:
+            by_user.setdefault(row.user, []).append({
+                "ticket_no": row.ticket.ticket_no,
+                "update_text": row.update_text,
+            })
+        
+        if pending:
+            db.session.query(PendingNotification).filter(
+                PendingNotification.id.in_([row.id for row in pending])
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        
+        for user, items in by_user.items():
+            email_notification_digest(user, items)
+        
+        result = {
+            "digest_count": len(by_user),
+            "held_count": len(pending),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        
+        logger.info(f"[TASK] send_notification_digests: Complete - {result}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"[TASK] send_notification_digests: Error - {e}", exc_info=True)
+        self.retry(exc=e, countdown=60, max_retries=3)
+
+
 # ============================================================
 # ON-DEMAND TASKS
 # ============================================================
@@ -491,13 +810,6 @@ def send_ticket_notification(self, ticket_id, template_type="created", recipient
         dict: Task result
     """
     try:
-        from models import Ticket
-        from utils import (
-            email_ticket_created,
-            email_ticket_updated,
-            email_assignee_assigned
-        )
-
         logger.info(f"[TASK] send_ticket_notification: ticket_id={ticket_id}, type={template_type}")
         
         ticket = Ticket.query.get(ticket_id)
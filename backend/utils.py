@@ -1,9 +1,20 @@
+import atexit
+import hashlib
+import heapq
 import os
+import queue
+import secrets
+import smtplib
+import time
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from flask import current_app, url_for
+from functools import lru_cache
+from flask import current_app, has_request_context, url_for
 from werkzeug.utils import secure_filename
 from flask_mail import Message
-from threading import Thread
+from markupsafe import escape
+from threading import Lock, Thread, local
+from concurrent.futures import ThreadPoolExecutor
 
 # ============================================================
 # FILE UPLOAD HELPERS
@@ -19,20 +30,20 @@ def allowed_file(filename):
     Returns:
         bool: True if extension is allowed, False otherwise
     """
-    if not filename or "." not in filename:
+    if not filename:
         return False
     
-    ext = filename.rsplit(".", 1)[1].lower()
-    allowed_extensions = current_app.config.get(
-        "ALLOWED_EXTENSIONS", 
-        ["png", "jpg", "jpeg", "gif", "pdf", "doc", "docx", "txt", "zip"]
-    )
-    return ext in allowed_extensions
+    _, dot, ext = filename.rpartition(".")
+    if not dot or not ext:
+        return False
+    
+    # Lower-cased frozenset built once in create_app()
+    return ext.lower() in current_app.config["ALLOWED_EXTENSIONS_SET"]
 
 
 def save_attachment(file_storage):
     """
-    Save uploaded file to the upload folder with timestamp prefix.
+    Save uploaded file to the upload folder with a unique prefix.
     
     Args:
         file_storage: FileStorage object from Flask request
@@ -51,13 +62,12 @@ def save_attachment(file_storage):
         # Secure the filename
         filename = secure_filename(file_storage.filename)
         
-        # Ensure upload folder exists
+        # Upload folder is created once in create_app()
         folder = current_app.config.get("UPLOAD_FOLDER", "uploads")
-        os.makedirs(folder, exist_ok=True)
 
-        # Add timestamp to avoid collisions
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        filename = f"{timestamp}_{filename}"
+        # Nanosecond timestamp + random suffix: unique even for uploads
+        # in the same second, without checking the folder first
+        filename = f"{time.time_ns()}_{secrets.token_hex(4)}_{filename}"
         
         # Save file
         path = os.path.join(folder, filename)
@@ -131,12 +141,18 @@ def calculate_sla_compliance_rate(tickets):
     """
     Calculate SLA compliance rate for a list of tickets.
     
+    A Ticket query is counted in SQL instead of being loaded (see
+    calculate_sla_compliance_rate_query).
+    
     Args:
-        tickets: List of ticket objects
+        tickets: List of ticket objects, or a Ticket query
         
     Returns:
         float: Compliance rate as percentage (0-100)
     """
+    if hasattr(tickets, "with_entities"):
+        return calculate_sla_compliance_rate_query(tickets)
+    
     if not tickets:
         return 100.0
     
@@ -148,40 +164,148 @@ def calculate_sla_compliance_rate(tickets):
     return (met_sla / len(closed_tickets)) * 100
 
 
+def calculate_sla_compliance_rate_query(query):
+    """
+    SLA compliance rate of the tickets a query selects, in one aggregate.
+    
+    Args:
+        query: Ticket query (its filters are kept, its rows never loaded)
+        
+    Returns:
+        float: Compliance rate as percentage (0-100)
+    """
+    from models import Ticket, db
+
+    closed, met = query.with_entities(
+        db.func.count(Ticket.id),
+        db.func.coalesce(db.func.sum(db.case((Ticket.sla_state == "Met", 1), else_=0)), 0),
+    ).filter(Ticket.status.in_(("Closed", "Resolved"))).order_by(None).one()
+    
+    if not closed:
+        return 100.0
+    return (met / closed) * 100
+
+
 # ============================================================
 # INTERNAL: EMAIL LOGGING
 # ============================================================
 
-def _log_email(to_email, subject, html_body, status="SUCCESS", ticket_id=None, extra_error=None):
+EMAIL_PREVIEW_CHARS = 480
+
+
+def _email_preview(body):
+    """First EMAIL_PREVIEW_CHARS of an email body, for EmailLog.body_preview."""
+    body = body or ""
+    return (body[:EMAIL_PREVIEW_CHARS] + "…") if len(body) > EMAIL_PREVIEW_CHARS else body
+
+
+def _write_email_logs(app, rows):
+    """Insert EmailLog rows in one batch and commit; log (don't raise) on failure."""
+    from db_bulk import bulk_insert
+    from models import EmailLog, db
+
+    with app.app_context():
+        try:
+            bulk_insert(EmailLog, rows)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"[EMAILLOG ERROR] {e}")
+            print(f"[EMAILLOG ERROR] {e}")
+        finally:
+            db.session.remove()
+
+
+EMAIL_LOG_BATCH_SIZE = 100
+
+# Rows waiting for the writer thread, as (app, row) pairs
+_email_log_queue = queue.Queue(maxsize=10000)
+_email_log_writer = None
+_email_log_lock = Lock()
+
+
+def _drain_email_logs(block=True):
+    """Write up to EMAIL_LOG_BATCH_SIZE queued rows per app; False if none were queued."""
+    try:
+        batch = [_email_log_queue.get(block=block)]
+    except queue.Empty:
+        return False
+    while len(batch) < EMAIL_LOG_BATCH_SIZE:
+        try:
+            batch.append(_email_log_queue.get_nowait())
+        except queue.Empty:
+            break
+
+    by_app = {}
+    for app, row in batch:
+        by_app.setdefault(app, []).append(row)
+    for app, rows in by_app.items():
+        _write_email_logs(app, rows)
+    return True
+
+
+def _email_log_worker():
+    while True:
+        _drain_email_logs()
+
+
+def _flush_email_logs():
+    """Write whatever is still queued (at interpreter exit)."""
+    while _drain_email_logs(block=False):
+        pass
+
+
+# Registered at import, before the mail pool's shutdown hook, so it runs
+# after that pool has drained (atexit runs hooks in reverse order)
+atexit.register(_flush_email_logs)
+
+
+def _start_email_log_writer():
+    """Start the single EmailLog writer thread on first use."""
+    global _email_log_writer
+    if _email_log_writer is None:
+        with _email_log_lock:
+            if _email_log_writer is None:
+                _email_log_writer = Thread(target=_email_log_worker, name="email-log", daemon=True)
+                _email_log_writer.start()
+
+
+def _log_email(to_email, subject, body_preview, status="SUCCESS", ticket_id=None, extra_error=None):
     """
-    Write email log entry to database. Fails silently on error.
+    Record an email attempt in EmailLog. Fails silently on error.
+    
+    Rows are queued for a single writer thread that commits them in
+    batches, so senders don't wait on the database. Under TESTING, or if
+    the queue is full, the row is written immediately.
     
     Args:
         to_email (str): Recipient email address
         subject (str): Email subject
-        html_body (str): Email HTML body
+        body_preview (str): Preview from _email_preview(), not the full body
         status (str): Email status (SUCCESS/FAILED/PENDING)
         ticket_id (int, optional): Related ticket ID
         extra_error (str, optional): Error message if failed
     """
     try:
-        from models import EmailLog, db
-
-        # Create preview from body (first 480 chars)
-        preview_source = html_body or ""
-        preview = (preview_source[:480] + "…") if len(preview_source) > 480 else preview_source
-
-        log = EmailLog(
-            to_email=to_email,
+        app = current_app._get_current_object()
+        row = dict(
+            to_email=to_email[:255],
             from_email=current_app.config.get("MAIL_DEFAULT_SENDER", "noreply@portal.com"),
             subject=subject,
-            body_preview=preview,
+            body_preview=body_preview,
             status=status,
             ticket_id=ticket_id,
             error_message=extra_error,
+            sent_at=datetime.utcnow(),
         )
-        db.session.add(log)
-        db.session.commit()
+
+        if current_app.config.get("TESTING"):
+            _write_email_logs(app, [row])
+        else:
+            _start_email_log_writer()
+            try:
+                _email_log_queue.put_nowait((app, row))
+            except queue.Full:
+                _write_email_logs(app, [row])
         
         current_app.logger.info(f"Email logged: {to_email} - {status}")
 
@@ -194,7 +318,88 @@ def _log_email(to_email, subject, html_body, status="SUCCESS", ticket_id=None, e
 # EMAIL CORE
 # ============================================================
 
-def send_async_email(app, msg, ticket_id=None):
+def _message_recipients(msg):
+    """Comma-joined To + BCC addresses of a message, for EmailLog."""
+    return ",".join(list(msg.recipients) + list(msg.bcc or []))
+
+
+# One SMTP session per sending thread (mail pool / Celery worker), reused
+# across messages so TLS and AUTH happen once instead of per email
+_smtp_local = local()
+_smtp_connections = []
+_smtp_connections_lock = Lock()
+
+
+def _drop_smtp_connection():
+    """Close this thread's SMTP session (if any) and forget it."""
+    conn = getattr(_smtp_local, "conn", None)
+    _smtp_local.conn = None
+    if conn is None:
+        return
+    with _smtp_connections_lock:
+        if conn in _smtp_connections:
+            _smtp_connections.remove(conn)
+    try:
+        conn.host.quit()
+    except Exception:
+        pass
+
+
+def _smtp_send(mail, msg):
+    """
+    Send a message over this thread's persistent SMTP session.
+
+    The session is checked with NOOP before each use and reopened if the
+    server has dropped it; after a failed send it is discarded so the next
+    message starts clean. With sending suppressed (TESTING) this is just
+    mail.send(), which still records the message.
+    """
+    if mail.suppress:
+        mail.send(msg)
+        return
+
+    conn = getattr(_smtp_local, "conn", None)
+    if conn is not None and conn.mail is not mail:
+        _drop_smtp_connection()
+        conn = None
+    if conn is not None:
+        try:
+            if conn.host.noop()[0] != 250:
+                raise smtplib.SMTPServerDisconnected("NOOP failed")
+        except Exception:
+            _drop_smtp_connection()
+            conn = None
+
+    if conn is None:
+        conn = mail.connect().__enter__()
+        _smtp_local.conn = conn
+        with _smtp_connections_lock:
+            _smtp_connections.append(conn)
+
+    try:
+        conn.send(msg)
+    except Exception:
+        _drop_smtp_connection()
+        raise
+
+
+def _close_smtp_connections():
+    """QUIT every open SMTP session (at interpreter exit)."""
+    with _smtp_connections_lock:
+        conns = list(_smtp_connections)
+        _smtp_connections.clear()
+    for conn in conns:
+        try:
+            conn.host.quit()
+        except Exception:
+            pass
+
+
+# Registered at import, so it runs after the mail pool has drained
+atexit.register(_close_smtp_connections)
+
+
+def send_async_email(app, msg, ticket_id=None, raise_errors=False):
     """
     Send email asynchronously in background thread.
     
@@ -202,50 +407,144 @@ def send_async_email(app, msg, ticket_id=None):
         app: Flask application instance
         msg: Flask-Mail Message object
         ticket_id (int, optional): Related ticket ID for logging
+        raise_errors (bool): Re-raise a delivery failure after logging it
+            (Celery uses this to retry the task)
     """
     with app.app_context():
         mail = current_app.extensions.get("mail")
+        preview = _email_preview(msg.html or msg.body)
         
         if not mail:
             error_msg = "Flask-Mail not initialized"
             current_app.logger.error(f"[MAIL ERROR] {error_msg}")
             _log_email(
-                to_email=",".join(msg.recipients),
+                to_email=_message_recipients(msg),
                 subject=msg.subject,
-                html_body=msg.html or msg.body,
+                body_preview=preview,
                 status="FAILED",
                 ticket_id=ticket_id,
                 extra_error=error_msg,
             )
             return
 
-        error_text = None
+        error = None
         status = "SUCCESS"
 
         try:
-            mail.send(msg)
+            _smtp_send(mail, msg)
             current_app.logger.info(f"[EMAIL SENT] -> {msg.recipients}")
             print(f"[EMAIL SENT] -> {msg.recipients}")
         except Exception as e:
             status = "FAILED"
-            error_text = str(e)
+            error = e
             current_app.logger.error(f"[EMAIL ERROR] {e}")
             print(f"[EMAIL ERROR] {e}")
 
         # Log the email attempt
         _log_email(
-            to_email=",".join(msg.recipients),
+            to_email=_message_recipients(msg),
             subject=msg.subject,
-            html_body=msg.html or msg.body,
+            body_preview=preview,
             status=status,
             ticket_id=ticket_id,
-            extra_error=error_text,
+            extra_error=str(error) if error else None,
         )
 
+        if error is not None and raise_errors:
+            raise error
+
+
+@lru_cache(maxsize=16)
+def _attachment_bytes(path, mtime_ns, size):
+    # mtime/size are part of the key so an edited file is re-read
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+def _read_attachment(file_path):
+    """Contents of an attachment, read from disk once per version of the file."""
+    path = os.path.join(current_app.root_path, file_path)
+    st = os.stat(path)
+    return _attachment_bytes(path, st.st_mtime_ns, st.st_size)
+
 
-def send_email(to, subject, html_body, text_body=None, attachments=None, ticket_id=None):
+def build_email_message(to, subject, html_body, text_body=None, attachments=None, bcc=None):
+    """
+    Build a Flask-Mail Message (used by send_email and the Celery email task).
+
+    Args:
+        to (str): Recipient email address
+        subject (str): Email subject
+        html_body (str): HTML version of email body
+        text_body (str, optional): Plain text version of email body
+        attachments (list, optional): List of file paths to attach
+        bcc (list, optional): Blind-copy addresses
+
+    Returns:
+        Message: Ready-to-send message
+    """
+    msg = Message(
+        subject=subject,
+        recipients=[to],
+        bcc=bcc,
+        sender=current_app.config.get("MAIL_DEFAULT_SENDER", "noreply@portal.com"),
+    )
+
+    msg.body = text_body or "Your email client does not support HTML."
+    msg.html = html_body
+
+    # Attach files if provided
+    if attachments:
+        for file_path in attachments:
+            try:
+                msg.attach(
+                    os.path.basename(file_path),
+                    "application/octet-stream",
+                    _read_attachment(file_path),
+                )
+            except Exception as e:
+                current_app.logger.error(f"[ATTACHMENT ERROR] {e}")
+                print(f"[ATTACHMENT ERROR] {e}")
+
+    return msg
+
+
+def _enqueue_email(to, subject, html_body, text_body, attachments, ticket_id, bcc=None):
+    """Hand the email to the Celery worker; False if Celery/broker is unavailable."""
+    try:
+        from tasks import send_email_task
+        send_email_task.delay(to, subject, html_body, text_body, attachments, ticket_id, bcc)
+        return True
+    except Exception as e:
+        current_app.logger.warning(f"[MAIL QUEUE] Celery unavailable, sending in-process: {e}")
+        return False
+
+
+_email_pool = None
+_email_pool_lock = Lock()
+
+
+def _get_email_pool():
+    """Create the shared SMTP sender pool on first use; drained at exit."""
+    global _email_pool
+    if _email_pool is None:
+        with _email_pool_lock:
+            if _email_pool is None:
+                _email_pool = ThreadPoolExecutor(
+                    max_workers=current_app.config.get("MAIL_MAX_WORKERS", 8),
+                    thread_name_prefix="mail",
+                )
+                atexit.register(_email_pool.shutdown, wait=True)
+    return _email_pool
+
+
+def send_email(to, subject, html_body, text_body=None, attachments=None, ticket_id=None, bcc=None):
     """
     Send email with optional attachments. Executes asynchronously.
+
+    Delivery goes through the Celery send_email_task when EMAIL_DELIVERY is
+    "celery", otherwise (or if the broker is down) the bounded mail pool.
+    Under TESTING the email is sent inline so results are deterministic.
     
     Args:
         to (str): Recipient email address
@@ -254,6 +553,7 @@ def send_email(to, subject, html_body, text_body=None, attachments=None, ticket_
         text_body (str, optional): Plain text version of email body
         attachments (list, optional): List of file paths to attach
         ticket_id (int, optional): Related ticket ID for logging
+        bcc (list, optional): Blind-copy addresses
         
     Returns:
         bool: True if email was queued successfully, False otherwise
@@ -268,39 +568,25 @@ def send_email(to, subject, html_body, text_body=None, attachments=None, ticket_
             _log_email(
                 to_email=to,
                 subject=subject,
-                html_body=html_body or text_body,
+                body_preview=_email_preview(html_body or text_body),
                 status="FAILED",
                 ticket_id=ticket_id,
                 extra_error=error_msg,
             )
             return False
 
-        # Create message
-        msg = Message(
-            subject=subject,
-            recipients=[to],
-            sender=current_app.config.get("MAIL_DEFAULT_SENDER", "noreply@portal.com"),
-        )
+        testing = current_app.config.get("TESTING")
+        if not testing and current_app.config.get("EMAIL_DELIVERY") == "celery":
+            if _enqueue_email(to, subject, html_body, text_body, attachments, ticket_id, bcc):
+                return True
 
-        msg.body = text_body or "Your email client does not support HTML."
-        msg.html = html_body
-
-        # Attach files if provided
-        if attachments:
-            for file_path in attachments:
-                try:
-                    with app.open_resource(file_path) as fp:
-                        msg.attach(
-                            os.path.basename(file_path),
-                            "application/octet-stream",
-                            fp.read(),
-                        )
-                except Exception as e:
-                    current_app.logger.error(f"[ATTACHMENT ERROR] {e}")
-                    print(f"[ATTACHMENT ERROR] {e}")
-
-        # Send asynchronously
-        Thread(target=send_async_email, args=(app, msg, ticket_id)).start()
+        msg = build_email_message(to, subject, html_body, text_body, attachments, bcc)
+
+        if testing:
+            send_async_email(app, msg, ticket_id)
+        else:
+            # Send asynchronously on the shared mail pool
+            _get_email_pool().submit(send_async_email, app, msg, ticket_id)
         return True
         
     except Exception as e:
@@ -309,37 +595,100 @@ def send_email(to, subject, html_body, text_body=None, attachments=None, ticket_
 
 
 # ============================================================
-# EMAIL HTML TEMPLATE WRAPPER
+# BACKGROUND NOTIFICATIONS
 # ============================================================
 
-def _email_shell(title, intro_html, content_html, footer_html="", ticket_url=None):
+_notify_pool = None
+_notify_pool_lock = Lock()
+
+
+def _get_notify_pool():
+    """Create the shared notification worker pool on first use."""
+    global _notify_pool
+    if _notify_pool is None:
+        with _notify_pool_lock:
+            if _notify_pool is None:
+                _notify_pool = ThreadPoolExecutor(
+                    max_workers=current_app.config.get("NOTIFY_MAX_WORKERS", 4),
+                    thread_name_prefix="notify",
+                )
+    return _notify_pool
+
+
+def notify_async(fn, *args):
     """
-    Generate HTML email template with consistent branding.
-    
+    Run an email_* notification helper off the request thread.
+
+    Model instances are passed to the worker as (model, id) references and
+    re-loaded inside its own app context, so no ORM object crosses threads.
+    Under TESTING the helper runs inline, like send_email, so results are
+    deterministic.
+
     Args:
-        title (str): Email title/heading
-        intro_html (str): Introduction paragraph HTML
-        content_html (str): Main content HTML
-        footer_html (str, optional): Footer text
-        ticket_url (str, optional): URL to view ticket
-        
+        fn: Notification function (e.g. email_ticket_created)
+        *args: Arguments for fn; model instances are re-fetched by primary key
+
     Returns:
-        str: Complete HTML email
+        Future: Handle for the queued notification, or None when run inline
     """
-    footer = footer_html or "This is an automated notification from IT Ticketing Portal."
-    
-    action_button = ""
-    if ticket_url:
-        action_button = f"""
-        <tr>
-            <td style="padding:0 24px 18px 24px;" align="center">
-                <a href="{ticket_url}" style="display:inline-block;padding:12px 32px;background:#0a4b78;color:#ffffff;text-decoration:none;border-radius:8px;font-weight:600;font-size:14px;">
-                    View Ticket
-                </a>
-            </td>
-        </tr>
-        """
-    
+    from models import db
+
+    if current_app.config.get("TESTING"):
+        try:
+            fn(*args)
+        except Exception as e:
+            current_app.logger.error(f"[NOTIFY ERROR] {fn.__name__}: {e}")
+        return None
+
+    app = current_app._get_current_object()
+
+    refs = []
+    for arg in args:
+        obj = arg._get_current_object() if hasattr(arg, "_get_current_object") else arg
+        if isinstance(obj, db.Model):
+            refs.append((type(obj), obj.id))
+        else:
+            refs.append((None, obj))
+
+    def _run():
+        with app.app_context():
+            try:
+                call_args = [
+                    db.session.get(model, value) if model else value
+                    for model, value in refs
+                ]
+                fn(*call_args)
+            except Exception as e:
+                current_app.logger.error(f"[NOTIFY ERROR] {fn.__name__}: {e}")
+            finally:
+                db.session.remove()
+
+    return _get_notify_pool().submit(_run)
+
+
+# ============================================================
+# EMAIL HTML TEMPLATE WRAPPER
+# ============================================================
+
+_DEFAULT_EMAIL_FOOTER = "This is an automated notification from IT Ticketing Portal."
+
+# Copyright year for the shell footer, re-read at most once an hour
+_year_cache = {"year": None, "expires": 0.0}
+
+
+def _copyright_year():
+    """Current UTC year, cached so bulk sends don't re-read the clock."""
+    now = time.monotonic()
+    if now >= _year_cache["expires"]:
+        _year_cache["year"] = datetime.utcnow().year
+        _year_cache["expires"] = now + 3600
+    return _year_cache["year"]
+
+
+@lru_cache(maxsize=256)
+def _email_header(title):
+    """Shell markup up to the intro paragraph, memoized per title."""
+    title = escape(title)
     return f"""
 <!DOCTYPE html>
 <html>
@@ -371,14 +720,35 @@ def _email_shell(title, intro_html, content_html, footer_html="", ticket_url=Non
           <!-- Intro -->
           <tr>
             <td style="padding:0 24px 16px 24px;">
-              <p style="margin:0;font-size:14px;color:#4b5563;line-height:1.6;">{intro_html}</p>
+              <p style="margin:0;font-size:14px;color:#4b5563;line-height:1.6;">"""
+
+
+_EMAIL_MIDDLE = """</p>
             </td>
           </tr>
           
           <!-- Content -->
           <tr>
             <td style="padding:0 24px 24px 24px;font-size:14px;color:#111827;line-height:1.6;">
-              {content_html}
+              """
+
+
+@lru_cache(maxsize=256)
+def _email_footer(ticket_url, footer, year):
+    """Shell markup after the content (button + footer), memoized."""
+    action_button = ""
+    if ticket_url:
+        action_button = f"""
+        <tr>
+            <td style="padding:0 24px 18px 24px;" align="center">
+                <a href="{ticket_url}" style="display:inline-block;padding:12px 32px;background:#0a4b78;color:#ffffff;text-decoration:none;border-radius:8px;font-weight:600;font-size:14px;">
+                    View Ticket
+                </a>
+            </td>
+        </tr>
+        """
+
+    return f"""
             </td>
           </tr>
           
@@ -390,7 +760,7 @@ def _email_shell(title, intro_html, content_html, footer_html="", ticket_url=Non
             <td style="padding:16px 24px;font-size:12px;color:#6b7280;border-top:1px solid #e5e7eb;background:#f9fafb;">
               <p style="margin:0 0 8px 0;">{footer}</p>
               <p style="margin:0;color:#9ca3af;">
-                © {datetime.utcnow().year} IT Ticketing Portal. All rights reserved.
+                © {year} IT Ticketing Portal. All rights reserved.
               </p>
             </td>
           </tr>
@@ -404,10 +774,134 @@ def _email_shell(title, intro_html, content_html, footer_html="", ticket_url=Non
 """
 
 
+def _email_shell(title, intro_html, content_html, footer_html="", ticket_url=None):
+    """
+    Generate HTML email template with consistent branding.
+    
+    The chrome around the intro and content is built by the memoized
+    _email_header/_email_footer, so only the variable parts are formatted
+    per email.
+    
+    Args:
+        title (str): Email title/heading
+        intro_html (str): Introduction paragraph HTML
+        content_html (str): Main content HTML
+        footer_html (str, optional): Footer text
+        ticket_url (str, optional): URL to view ticket
+        
+    Returns:
+        str: Complete HTML email
+    """
+    footer = footer_html or _DEFAULT_EMAIL_FOOTER
+    return "".join((
+        _email_header(title),
+        intro_html,
+        _EMAIL_MIDDLE,
+        content_html,
+        _email_footer(ticket_url, footer, _copyright_year()),
+    ))
+
+
 # ============================================================
 # SPECIFIC EMAIL NOTIFICATIONS
 # ============================================================
 
+def _render_email(name, **context):
+    """
+    Render an email body fragment from templates/email/.
+
+    Uses the app's Jinja environment directly (compiled templates are
+    cached there, and .html autoescapes) rather than render_template, whose
+    context processors need a request.
+    """
+    return current_app.jinja_env.get_template(f"email/{name}").render(**context)
+
+
+@lru_cache(maxsize=1024)
+def _external_url(app, endpoint, values):
+    """url_for outside a request; the result only depends on app config."""
+    with app.test_request_context():
+        return url_for(endpoint, _external=True, **dict(values))
+
+
+def _ticket_url(endpoint, **values):
+    """
+    Absolute URL for a ticket page, or None if it can't be built.
+
+    Inside a request url_for is used directly (same host as the request).
+    Background sends have no request, so the throwaway test request context
+    is only built the first time each URL is needed.
+    """
+    try:
+        if has_request_context():
+            return url_for(endpoint, _external=True, **values)
+        return _external_url(current_app._get_current_object(), endpoint, frozenset(values.items()))
+    except Exception:
+        return None
+
+
+def _claim_notification(ticket_id, event, *parts):
+    """
+    Record a notification event before it is sent; False if already sent.
+
+    The row is committed on its own connection, outside the caller's
+    session, so the UNIQUE (ticket_id, event, digest) insert is the
+    idempotency gate even if the worker dies between here and SMTP. Other
+    database errors fail open (the email is sent, as before).
+    """
+    from sqlalchemy import insert
+    from sqlalchemy.exc import IntegrityError
+    from models import NotificationLog, db
+
+    digest = hashlib.blake2b(
+        "\x1f".join(str(p) for p in parts).encode(), digest_size=16
+    ).hexdigest()
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(NotificationLog).values(
+                ticket_id=ticket_id, event=event, digest=digest, created_at=datetime.utcnow()
+            ))
+    except IntegrityError:
+        current_app.logger.info(f"[EMAIL SKIPPED] {event} already sent for ticket {ticket_id}")
+        return False
+    except Exception as e:
+        current_app.logger.error(f"[NOTIFYLOG ERROR] {e}")
+    return True
+
+
+def _hold_if_throttled(user, ticket, update_text):
+    """
+    Per-recipient rate limit for update/assignment emails.
+
+    Returns False if the email may go out now. Otherwise the notification
+    is stored as a PendingNotification for the next digest and True is
+    returned, so the caller skips sending it individually.
+    """
+    limit = current_app.config.get("NOTIFY_RATE_PER_MINUTE", 10)
+    if not limit:
+        return False
+
+    from app import redis_rate_allow
+    if redis_rate_allow(current_app, f"notify_rate:{user.id}", limit, 60):
+        return False
+
+    from sqlalchemy import insert
+    from models import PendingNotification, db
+
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(PendingNotification).values(
+                user_id=user.id, ticket_id=ticket.id,
+                update_text=update_text, created_at=datetime.utcnow()
+            ))
+    except Exception as e:
+        current_app.logger.error(f"[NOTIFY DIGEST ERROR] {e}")
+        return False
+
+    current_app.logger.info(f"[EMAIL HELD] {ticket.ticket_no} -> {user.email} (rate limit, next digest)")
+    return True
+
+
 def email_ticket_created(user, ticket):
     """
     Send email notification when a new ticket is created.
@@ -420,43 +914,13 @@ def email_ticket_created(user, ticket):
 
     intro = "Your support ticket has been created successfully and assigned a tracking number."
     
-    details = f"""
-    <div style="background:#f9fafb;padding:16px;border-radius:8px;margin:16px 0;">
-        <table cellpadding="8" cellspacing="0" style="width:100%;font-size:14px;">
-          <tr>
-            <td style="color:#6b7280;width:140px;"><strong>Ticket No:</strong></td>
-            <td style="color:#0f172a;"><strong>{ticket.ticket_no}</strong></td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Type:</strong></td>
-            <td style="color:#0f172a;">{ticket.ticket_type}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Priority:</strong></td>
-            <td style="color:#0f172a;">{ticket.priority}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Category:</strong></td>
-            <td style="color:#0f172a;">{ticket.category}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;vertical-align:top;"><strong>Description:</strong></td>
-            <td style="color:#0f172a;">{ticket.description[:200]}{'...' if len(ticket.description) > 200 else ''}</td>
-          </tr>
-        </table>
-    </div>
-    <p style="margin:16px 0 0 0;color:#6b7280;">
-        <strong>Next Steps:</strong> Our IT team will review your ticket and respond as soon as possible.
-    </p>
-    """
+    if not _claim_notification(ticket.id, "created"):
+        return
 
-    # Generate ticket URL (if possible)
-    ticket_url = None
-    try:
-        with current_app.test_request_context():
-            ticket_url = url_for('ticket_view', ticket_id=ticket.id, _external=True)
-    except Exception:
-        pass
+    details = _render_email("ticket_created.html", ticket=ticket)
+
+    # Built once; the creator and admin copies share the same HTML
+    ticket_url = _ticket_url('ticket_view', ticket_id=ticket.id)
 
     html = _email_shell(subject, intro, details, ticket_url=ticket_url)
     
@@ -497,44 +961,28 @@ def email_ticket_updated(user, ticket, updated_by, update_text):
     if not user or not user.email:
         return
 
+    # Rapid edits often repeat the same update; send each one once per window
+    ttl = current_app.config.get("UPDATE_EMAIL_DEDUP_SECONDS", 60)
+    if ttl and not _claim_notification(
+        ticket.id, "updated", user.email, update_text or "", int(time.time() // ttl)
+    ):
+        return
+
+    if _hold_if_throttled(user, ticket, update_text):
+        return
+
     subject = f"Ticket Updated - {ticket.ticket_no}"
-    intro = f"Your ticket was updated by <strong>{updated_by}</strong>."
+    intro = f"Your ticket was updated by <strong>{escape(updated_by)}</strong>."
     
-    content = f"""
-    <div style="background:#eff6ff;padding:14px;border-radius:8px;border-left:4px solid #3b82f6;margin:16px 0;">
-        <p style="margin:0;color:#1e40af;font-weight:600;">Update:</p>
-        <p style="margin:8px 0 0 0;color:#1e3a8a;">{update_text}</p>
-    </div>
-
-    <div style="background:#f9fafb;padding:16px;border-radius:8px;margin:16px 0;">
-        <table cellpadding="8" cellspacing="0" style="width:100%;font-size:14px;">
-          <tr>
-            <td style="color:#6b7280;width:140px;"><strong>Ticket No:</strong></td>
-            <td style="color:#0f172a;">{ticket.ticket_no}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Current Status:</strong></td>
-            <td style="color:#0f172a;">{ticket.status}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Priority:</strong></td>
-            <td style="color:#0f172a;">{ticket.priority}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Assigned To:</strong></td>
-            <td style="color:#0f172a;">{ticket.assignee.name if ticket.assignee else (ticket.assignee_name if hasattr(ticket, 'assignee_name') and ticket.assignee_name else 'Unassigned')}</td>
-          </tr>
-        </table>
-    </div>
-    """
+    assignee_name = (
+        ticket.assignee.name if ticket.assignee
+        else getattr(ticket, "assignee_name", None) or "Unassigned"
+    )
+    content = _render_email(
+        "ticket_updated.html", ticket=ticket, update_text=update_text, assignee_name=assignee_name
+    )
 
-    # Generate ticket URL
-    ticket_url = None
-    try:
-        with current_app.test_request_context():
-            ticket_url = url_for('ticket_view', ticket_id=ticket.id, _external=True)
-    except Exception:
-        pass
+    ticket_url = _ticket_url('ticket_view', ticket_id=ticket.id)
 
     html = _email_shell(subject, intro, content, ticket_url=ticket_url)
     
@@ -566,50 +1014,19 @@ def email_assignee_assigned(assignee, ticket, assigned_by):
     if not assignee or not assignee.email:
         return
 
+    # updated_at moves on every reassignment, so only retries are dropped
+    if not _claim_notification(ticket.id, "assigned", assignee.id, ticket.updated_at):
+        return
+
+    if _hold_if_throttled(assignee, ticket, f"Assigned to you by {assigned_by}"):
+        return
+
     subject = f"New Ticket Assigned - {ticket.ticket_no}"
-    intro = f"You have been assigned a new support ticket by <strong>{assigned_by}</strong>."
+    intro = f"You have been assigned a new support ticket by <strong>{escape(assigned_by)}</strong>."
     
-    content = f"""
-    <div style="background:#f9fafb;padding:16px;border-radius:8px;margin:16px 0;">
-        <table cellpadding="8" cellspacing="0" style="width:100%;font-size:14px;">
-          <tr>
-            <td style="color:#6b7280;width:140px;"><strong>Ticket No:</strong></td>
-            <td style="color:#0f172a;"><strong>{ticket.ticket_no}</strong></td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Priority:</strong></td>
-            <td style="color:#0f172a;">{ticket.priority}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Type:</strong></td>
-            <td style="color:#0f172a;">{ticket.ticket_type}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Category:</strong></td>
-            <td style="color:#0f172a;">{ticket.category}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;vertical-align:top;"><strong>Description:</strong></td>
-            <td style="color:#0f172a;">{ticket.description[:200]}{'...' if len(ticket.description) > 200 else ''}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>Created By:</strong></td>
-            <td style="color:#0f172a;">{ticket.user.name if ticket.user else 'Unknown'}</td>
-          </tr>
-        </table>
-    </div>
-    <p style="margin:16px 0 0 0;color:#6b7280;">
-        <strong>Action Required:</strong> Please review and begin working on this ticket.
-    </p>
-    """
+    content = _render_email("ticket_assigned.html", ticket=ticket)
 
-    # Generate ticket URL
-    ticket_url = None
-    try:
-        with current_app.test_request_context():
-            ticket_url = url_for('admin_ticket_view', id=ticket.id, _external=True)
-    except Exception:
-        pass
+    ticket_url = _ticket_url('admin_ticket_view', id=ticket.id)
 
     html = _email_shell(subject, intro, content, ticket_url=ticket_url)
     
@@ -631,72 +1048,68 @@ Please review and begin working on this ticket.
     send_email(assignee.email, subject, html, text, ticket_id=ticket.id)
 
 
-def email_daily_sla_report(admin_email, metrics, breached_tickets):
+def email_notification_digest(user, items):
     """
-    Send daily SLA compliance report to administrators.
+    Send one summary email for notifications held back by the rate limit.
     
     Args:
-        admin_email (str): Administrator email address
-        metrics (dict): Dictionary with report metrics
+        user: User object receiving the digest
+        items (list): Dicts with ticket_no and update_text, oldest first
+    """
+    if not user or not user.email or not items:
+        return
+
+    subject = f"{len(items)} ticket update{'s' if len(items) != 1 else ''}"
+    intro = "These updates arrived while we were holding back individual emails to you."
+
+    content = _render_email("notification_digest.html", items=items)
+
+    html = _email_shell(subject, intro, content)
+
+    lines = "".join(f"- {i['ticket_no']}: {i['update_text'] or 'Updated'}\n" for i in items)
+    text = f"""
+{subject}
+
+{lines}"""
+
+    send_email(user.email, subject, html, text)
+
+
+SLA_REPORT_MAX_ROWS = 50
+
+
+def build_daily_sla_report(metrics, breached_tickets):
+    """
+    Render the daily SLA compliance report once for all recipients.
+    
+    The report is a digest: the SLA_REPORT_MAX_ROWS most overdue breaches
+    (by overdue_hours, hours past due) are listed and the rest are
+    summarized as "+N more", so its size doesn't grow with the backlog.
+    
+    Args:
+        metrics (dict): Dictionary with report metrics; an optional
+            "breached_by_priority" dict adds a per-priority breakdown
         breached_tickets (list): List of breached ticket summaries
+        
+    Returns:
+        tuple: (subject, html_body, text_body)
     """
     subject = f"Daily SLA Report - {metrics.get('timestamp', 'N/A')}"
     intro = "Here is your daily SLA compliance report."
     
-    # Build breached tickets table
-    breached_html = ""
-    if breached_tickets:
-        rows = "".join([
-            f"""
-            <tr>
-                <td style="padding:8px;border-bottom:1px solid #e5e7eb;">{t['ticket_no']}</td>
-                <td style="padding:8px;border-bottom:1px solid #e5e7eb;">{t['priority']}</td>
-                <td style="padding:8px;border-bottom:1px solid #e5e7eb;">{t['status']}</td>
-                <td style="padding:8px;border-bottom:1px solid #e5e7eb;">{t['user']}</td>
-                <td style="padding:8px;border-bottom:1px solid #e5e7eb;">{t['age_hours']}h</td>
-            </tr>
-            """
-            for t in breached_tickets
-        ])
-        
-        breached_html = f"""
-        <h3 style="color:#0f172a;font-size:16px;margin:24px 0 12px 0;">Breached Tickets ({len(breached_tickets)})</h3>
-        <table cellpadding="0" cellspacing="0" style="width:100%;font-size:13px;border:1px solid #e5e7eb;border-radius:8px;overflow:hidden;">
-            <tr style="background:#f9fafb;">
-                <th style="padding:10px 8px;text-align:left;font-weight:600;">Ticket</th>
-                <th style="padding:10px 8px;text-align:left;font-weight:600;">Priority</th>
-                <th style="padding:10px 8px;text-align:left;font-weight:600;">Status</th>
-                <th style="padding:10px 8px;text-align:left;font-weight:600;">User</th>
-                <th style="padding:10px 8px;text-align:left;font-weight:600;">Age</th>
-            </tr>
-            {rows}
-        </table>
-        """
-    
-    content = f"""
-    <div style="background:#f9fafb;padding:16px;border-radius:8px;margin:16px 0;">
-        <h3 style="color:#0f172a;font-size:16px;margin:0 0 16px 0;">Summary</h3>
-        <table cellpadding="8" cellspacing="0" style="width:100%;font-size:14px;">
-          <tr>
-            <td style="color:#6b7280;width:200px;"><strong>Total Open Tickets:</strong></td>
-            <td style="color:#0f172a;">{metrics.get('total_open', 0)}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>SLA Breached:</strong></td>
-            <td style="color:#ef4444;font-weight:600;">{metrics.get('breached', 0)}</td>
-          </tr>
-          <tr>
-            <td style="color:#6b7280;"><strong>At Risk (&lt; 6h):</strong></td>
-            <td style="color:#f59e0b;font-weight:600;">{metrics.get('at_risk', 0)}</td>
-          </tr>
-        </table>
-    </div>
+    rows = heapq.nlargest(SLA_REPORT_MAX_ROWS, breached_tickets, key=lambda t: t.get("overdue_hours", 0))
+    # Callers list only some breaches; the total comes from the metrics
+    more = max(metrics.get("breached", 0), len(breached_tickets)) - len(rows)
+    by_priority = metrics.get("breached_by_priority") or {}
     
-    {breached_html}
-    """
+    content = _render_email(
+        "sla_report.html", metrics=metrics, breached_tickets=rows, more=more, by_priority=by_priority
+    )
 
     html = _email_shell(subject, intro, content)
     
+    priority_text = "".join(f"  - {p}: {n}\n" for p, n in by_priority.items())
+    more_text = f" (+ {more} more)" if more > 0 else ""
     text = f"""
 Daily SLA Report
 
@@ -706,11 +1119,36 @@ Summary:
 - Total Open Tickets: {metrics.get('total_open', 0)}
 - SLA Breached: {metrics.get('breached', 0)}
 - At Risk: {metrics.get('at_risk', 0)}
-
-Breached Tickets: {len(breached_tickets)}
+{priority_text}
+Breached Tickets listed: {len(rows)}{more_text}
 """
 
-    send_email(admin_email, subject, html, text)
+    return subject, html, text
+
+
+def email_daily_sla_report(admin_emails, metrics, breached_tickets):
+    """
+    Send daily SLA compliance report to administrators.
+    
+    Several admins get one message, addressed to the portal sender with
+    the admins on BCC, instead of one SMTP send per admin.
+    
+    Args:
+        admin_emails (str | list): Administrator email address(es)
+        metrics (dict): Dictionary with report metrics
+        breached_tickets (list): List of breached ticket summaries
+    """
+    if isinstance(admin_emails, str):
+        admin_emails = [admin_emails]
+    if not admin_emails:
+        return False
+    
+    subject, html, text = build_daily_sla_report(metrics, breached_tickets)
+    if len(admin_emails) == 1:
+        return send_email(admin_emails[0], subject, html, text)
+    
+    sender = current_app.config.get("MAIL_DEFAULT_SENDER", "noreply@portal.com")
+    return send_email(sender, subject, html, text, bcc=list(admin_emails))
 
 
 # ============================================================
@@ -733,12 +1171,25 @@ def format_datetime(dt, format_str="%Y-%m-%d %H:%M:%S"):
     return dt.strftime(format_str)
 
 
-def get_time_ago(dt):
+# (upper bound in seconds, unit in seconds, suffix), sorted for bisect
+_TIME_AGO_BUCKETS = (
+    (60, 1, "s"),
+    (3600, 60, "m"),
+    (86400, 3600, "h"),
+    (604800, 86400, "d"),
+    (float("inf"), 604800, "w"),
+)
+_TIME_AGO_CUTOFFS = [b[0] for b in _TIME_AGO_BUCKETS]
+
+
+def get_time_ago(dt, now=None):
     """
     Get human-readable time difference from now.
     
     Args:
         dt (datetime): Past datetime object
+        now (datetime): Reference time; pass one value when formatting many
+            rows so they share a single clock read (default utcnow())
         
     Returns:
         str: Human-readable time difference
@@ -746,19 +1197,9 @@ def get_time_ago(dt):
     if not dt:
         return "N/A"
     
-    delta = datetime.utcnow() - dt
-    seconds = delta.total_seconds()
-    
-    if seconds < 60:
-        return f"{int(seconds)}s ago"
-    elif seconds < 3600:
-        return f"{int(seconds // 60)}m ago"
-    elif seconds < 86400:
-        return f"{int(seconds // 3600)}h ago"
-    elif seconds < 604800:
-        return f"{int(seconds // 86400)}d ago"
-    else:
-        return f"{int(seconds // 604800)}w ago"
+    seconds = ((now or datetime.utcnow()) - dt).total_seconds()
+    _, divisor, suffix = _TIME_AGO_BUCKETS[bisect_right(_TIME_AGO_CUTOFFS, seconds)]
+    return f"{int(seconds // divisor)}{suffix} ago"
 
 
 def truncate_text(text, length=100):
@@ -779,19 +1220,62 @@ def truncate_text(text, length=100):
     return text[:length] + "..."
 
 
-def paginate_query(query, page=1, per_page=20):
+def paginate_query(query, page=None, per_page=20, *, cursor=None, order_col=None, use_offset=False):
     """
-    Paginate a SQLAlchemy query.
+    Paginate a SQLAlchemy query by keyset (seek) on an indexed column.
+    
+    Pages are fetched newest first with WHERE order_col < cursor, so deep
+    pages cost the same as the first one and no COUNT(*) is run. One extra
+    row is read to tell whether there is a next page. Any ORDER BY already
+    on the query is replaced, since the cursor only works in order_col order.
+    
+    Passing a page number (the original positional call) or use_offset=True
+    keeps the COUNT + LIMIT/OFFSET paging and its return value.
     
     Args:
         query: SQLAlchemy query object
-        page (int): Page number (1-indexed)
+        page (int): Page number (1-indexed); selects offset paging
         per_page (int): Items per page
+        cursor: order_col value of the last item on the previous page
+            (None for the first page)
+        order_col: Unique, indexed column to page on (default Ticket.id)
+        use_offset (bool): Offset paging even without a page number
         
     Returns:
-        tuple: (items, total_count, total_pages)
+        tuple: (items, next_cursor, has_next), or with offset paging
+            (items, total_count, total_pages)
     """
-    total = query.count()
-    pages = (total + per_page - 1) // per_page
-    items = query.limit(per_page).offset((page - 1) * per_page).all()
-    return items, total, pages
\ No newline at end of file
+    if use_offset or page is not None:
+        page = page or 1
+        from models import db
+
+        offset = (page - 1) * per_page
+        rows = None
+        if db.engine.dialect.name == "postgresql":
+            # Page and total in one round trip via COUNT(*) OVER ()
+            rows = (
+                query.add_columns(db.func.count().over().label("total"))
+                .limit(per_page).offset(offset).all()
+            )
+        if rows:
+            total = rows[0].total
+            items = [row[0] for row in rows]
+        else:
+            # Other databases, or a page past the end (no row to carry the total)
+            total = query.count()
+            items = query.limit(per_page).offset(offset).all() if rows is None else []
+        pages = (total + per_page - 1) // per_page
+        return items, total, pages
+
+    if order_col is None:
+        from models import Ticket
+        order_col = Ticket.id
+
+    if cursor is not None:
+        query = query.filter(order_col < cursor)
+    items = query.order_by(None).order_by(order_col.desc()).limit(per_page + 1).all()
+
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    next_cursor = getattr(items[-1], order_col.key) if has_next else None
+    return items, next_cursor, has_next
\ No newline at end of file